@@ -1,14 +1,21 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from io import BytesIO
-from datetime import datetime
 # import locale # Eliminar o comentar si no se usa después
-import unicodedata
-import re
-import time
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from utils.data_loader import mostrar_estadisticas_cache, version_archivo
+from utils.export import boton_exportar
+from utils.figuras import grafico
+from utils.limites import RESOLUCIONES, asignar_features, cargar_capa, disponible, mapa_coropletico
+from utils.tablas import tabla_paginada
+from utils.geocodificador import mapa_ubicaciones, texto_ubicacion
+from utils.filter_index import (PERIODO_PERSONALIZADO, PERIODOS_FECHAS, filtrar, indices_filtros, opciones,
+                                orden_por_fecha, rango_periodo, ventana_fechas)
+from utils.rollup import COLUMNA_SEMANA, construir_cubo, contar_por, cubo_permisos
+from utils.permisos import (ARCHIVO_PERMISOS, COLUMNA_ACM, COLUMNA_CATEGORIA, COLUMNA_CIUDAD_ESTADO_PROVINCIA,
+                            COLUMNA_FECHA_EMISION, COLUMNA_GUIA, COLUMNA_PAIS, COLUMNAS_FILTRO,
+                            MAX_CIUDADES_MAPA, MAX_PAISES_MAPA, NOMBRES_MESES_ES, RUTA_REGLAS_EXCLUSION,
+                            agregar_entidades, cargar_permisos, permisos_preprocesados)
+from utils.precalentamiento import iniciar_precalentamiento, mostrar_precalentamiento
+from utils.instrumentacion import finalizar_medicion, iniciar_medicion, seccion, span
 
 st.set_page_config(
     page_title=" Permisos de Caza", # Este será el nombre que aparece en el menú
@@ -16,57 +23,6 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- Text Normalization Function ---
-def normalize_text(text):
-    """Normalizes text by lowercasing, stripping, removing accents, and non-alphanumeric chars."""
-    if pd.isna(text):
-        return ""  # Return empty string for NaN values
-    text = str(text).lower().strip()
-    # Remove accents
-    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
-    # Remove characters that are not letters, numbers, spaces, or hyphens (useful for names)
-    text = re.sub(r'[^a-z0-9\s-]', '', text)
-    return text
-
-
-# --- Geocoding Function with Cache ---
-# Cache to store geocoded results
-_geocoding_cache = {}
-# Initialize geolocator (use a unique user_agent if deploying for production)
-geolocator = Nominatim(user_agent="streamlit_caza_app_v2")
-
-
-def get_lat_lon_country(location_name):
-    """
-    Geocodes a location name and returns (latitude, longitude, country).
-    Uses a cache to avoid repeated API calls and handles rate limits.
-    """
-    if location_name in _geocoding_cache:
-        return _geocoding_cache[location_name]
-
-    try:
-        # Add a small delay to respect Nominatim's rate limit (1 request per second)
-        time.sleep(1.2)  # A bit more than 1 second to be safe
-
-        location = geolocator.geocode(location_name, addressdetails=True, language='es')
-        if location:
-            country = location.raw.get('address', {}).get('country', 'Desconocido')
-            result = (location.latitude, location.longitude, country)
-            _geocoding_cache[location_name] = result
-            return result
-        else:
-            _geocoding_cache[location_name] = (None, None, 'Desconocido')
-            return (None, None, 'Desconocido')
-    except (GeocoderTimedOut, GeocoderServiceError) as e:
-        # st.warning(f"Error de geocodificación para '{location_name}': {e}. Reintentando o saltando.") # Can be uncommented for debugging
-        _geocoding_cache[location_name] = (None, None, 'Desconocido')
-        return (None, None, 'Desconocido')
-    except Exception as e:
-        # st.warning(f"Error inesperado al geocodificar '{location_name}': {e}") # Can be uncommented for debugging
-        _geocoding_cache[location_name] = (None, None, 'Desconocido')
-        return (None, None, 'Desconocido')
-
-
 # # BLOQUE COMENTADO/ELIMINADO: Intentos de establecer la configuración regional
 # try:
 #     locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
@@ -81,108 +37,83 @@ def get_lat_lon_country(location_name):
 # # st.set_page_config(layout="wide")
 
 
-def cargar_datos(ruta_archivo):
-    """
-    Carga datos desde un archivo CSV.
-    """
-    try:
-        df = pd.read_csv(ruta_archivo)
-        return df
-    except FileNotFoundError:
-        st.error(
-            f"Error: El archivo '{ruta_archivo}' no fue encontrado. Asegúrate de que la ruta y el nombre sean correctos.")
-        return None
-    except Exception as e:
-        st.error(f"Ocurrió un error al cargar el CSV: {e}. Por favor, verifica el formato del archivo.")
-        return None
-
-
-# --- Función para crear botón de descarga a Excel ---
-def to_excel(df):
-    output = BytesIO()
-    # Asegúrate de que xlsxwriter está instalado y en requirements.txt
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Sheet1')
-    writer.close()
-    processed_data = output.getvalue()
-    return processed_data
-
+# Precalienta en segundo plano las cachés de los tres datasets (una vez por proceso)
+mostrar_precalentamiento(iniciar_precalentamiento())
+iniciar_medicion('Permiso_Caza')
 
 st.title("📊 Tablero de Análisis de Permisos de Caza - Página Principal") # Título ligeramente modificado
 st.markdown("---")  # Separador para mejor apariencia
 
 # --- Nombre de tu archivo CSV ---
-nombre_nuevo_csv = 'mis_datos_maestros_final_v1.csv'
+nombre_nuevo_csv = ARCHIVO_PERMISOS
+
+# Modos del mapa de la sección 3
+MODO_MAPA_SIN_CONEXION = "Sin conexión (límites)"
+MODO_MAPA_EN_LINEA = "OpenStreetMap (en línea)"
+
+
+# --- Selector de rango de fechas (barra lateral) ---
+def _aplicar_periodo(fecha_min, fecha_max):
+    rango = rango_periodo(st.session_state["periodo_fechas"], fecha_min, fecha_max)
+    if rango is not None:
+        st.session_state["filtro_fechas"] = rango
+
 
-df = cargar_datos(nombre_nuevo_csv)
+def _marcar_personalizado():
+    st.session_state["periodo_fechas"] = PERIODO_PERSONALIZADO
+
+
+def selector_rango_fechas(fecha_min, fecha_max):
+    """
+    Período predefinido (últimos 30 días, último año...) y rango de fechas de la barra lateral.
+    Elegir un período fija el rango; cambiar el rango a mano pasa el período a "Personalizado".
+    Devuelve (desde, hasta), o None si el rango es todo el período o todavía está incompleto.
+    """
+    st.sidebar.selectbox("Período", PERIODOS_FECHAS, key="periodo_fechas", on_change=_aplicar_periodo,
+                         args=(fecha_min, fecha_max))
+    if "filtro_fechas" not in st.session_state:
+        st.session_state["filtro_fechas"] = (fecha_min, fecha_max)
+    seleccion = st.sidebar.date_input("Rango de fechas", min_value=fecha_min, max_value=fecha_max,
+                                      key="filtro_fechas", on_change=_marcar_personalizado)
+    # Mientras se elige el rango el widget devuelve una sola fecha: no filtrar hasta tener ambas
+    if isinstance(seleccion, tuple) and len(seleccion) == 2 and seleccion != (fecha_min, fecha_max):
+        return seleccion
+    return None
+
+seccion('Carga de datos')
+# Si existe el store consolidado (ver utils/ingesta.py) se usa en lugar del CSV maestro
+df, origen_datos, version_datos, partes_store = cargar_permisos(nombre_nuevo_csv)
+mostrar_estadisticas_cache(origen_datos)
 
 if df is not None:
-    st.success(f"Datos cargados exitosamente desde '{nombre_nuevo_csv}'.")
+    st.success(f"Datos cargados exitosamente desde '{origen_datos}'.")
 
     st.subheader("🔍 Vista Previa de los Datos")
-    st.write(df.head())
+    # Se pagina en el servidor: al navegador solo llegan las filas de la página visible
+    tabla_paginada(df, key="vista_previa", filas_por_pagina=5, version=version_datos)
     st.markdown("---")
 
-    # --- NOMBRES DE COLUMNA REALES DE TU CSV ---
-    COLUMNA_ACM = 'ACM-(Área de caza mayor)'
-    COLUMNA_GUIA = 'Responsable Guía de Caza'
-    COLUMNA_CIUDAD_ESTADO_PROVINCIA = 'Ciudad, Estado o Provincia'
-    COLUMNA_CATEGORIA = 'Categoria '
-    COLUMNA_FECHA_EMISION = 'Fecha '
-    COLUMNA_PAIS = 'País'
+    # Los nombres de columna reales del CSV están en utils/permisos.py
+    version_reglas = version_archivo(RUTA_REGLAS_EXCLUSION)
 
     # --- FILTRADO GLOBAL DE FECHAS Y DATOS INVÁLIDOS ANTES DE CUALQUIER ANÁLISIS ---
+    seccion('Pre-procesamiento', filas=len(df))
     st.markdown("### Pre-procesamiento de Datos")
     if COLUMNA_FECHA_EMISION in df.columns:
-        df[COLUMNA_FECHA_EMISION] = pd.to_datetime(df[COLUMNA_FECHA_EMISION], format='%d/%m/%Y', errors='coerce')
-        df.dropna(subset=[COLUMNA_FECHA_EMISION], inplace=True)
-
-        # Definir las fechas y valores a excluir
-        fecha_excluir_nov_1964_start = datetime(1964, 11, 1)
-        fecha_excluir_nov_1964_end = datetime(1964, 11, 30)
-        fecha_excluir_mar_1970_start = datetime(1970, 3, 1)
-        fecha_excluir_mar_1970_end = datetime(1970, 3, 31)
-
-        # Crear una máscara para las filas a mantener (excluir fechas específicas)
-        mask_fechas_a_mantener = ~ (
-                ((df[COLUMNA_FECHA_EMISION] >= fecha_excluir_nov_1964_start) & (
-                        df[COLUMNA_FECHA_EMISION] <= fecha_excluir_nov_1964_end)) |
-                ((df[COLUMNA_FECHA_EMISION] >= fecha_excluir_mar_1970_start) & (
-                        df[COLUMNA_FECHA_EMISION] <= fecha_excluir_mar_1970_end))
-        )
-        df = df[mask_fechas_a_mantener].copy()
-
-        # Filtro específico para ACM (aplicado después de la carga para no modificar el original)
-        if COLUMNA_ACM in df.columns:
-            ACM_EXCLUSION_LIST = ['04342341992025242amccc3agar4algar']
-            df['ACM_Normalizado'] = df[COLUMNA_ACM].astype(str).str.lower().str.strip()
-            df = df[~df['ACM_Normalizado'].isin(ACM_EXCLUSION_LIST)].copy()
-            df.drop(columns=['ACM_Normalizado'], inplace=True, errors='ignore')  # Clean up temp column
-            st.info("Se han excluido entradas específicas de ACM.")
-
-        # Filtro específico para Guías (aplicado después de la carga para no modificar el original)
-        if COLUMNA_GUIA in df.columns:
-            # Applying normalization *before* filtering specific exclusion list and before getting uniques
-            df['Guia_Normalizado'] = df[COLUMNA_GUIA].apply(normalize_text)
-            # Example problematic strings (normalize them for the list)
-            GUIA_EXCLUSION_LIST = ['0-132432432243432', 'fila0', 'fila1', 'fila2',
-                                   '']  # Added empty string for robustness
-            df = df[~df['Guia_Normalizado'].isin(GUIA_EXCLUSION_LIST)].copy()
-            st.info("Se han excluido entradas específicas de Guías y se han normalizado los nombres.")
-
-        # --- NUEVO: Normalización de Ciudad, Estado o Provincia ---
-        if COLUMNA_CIUDAD_ESTADO_PROVINCIA in df.columns:
-            df['Ciudad_Estado_Provincia_Normalizada'] = df[COLUMNA_CIUDAD_ESTADO_PROVINCIA].apply(normalize_text)
-            # Remove empty strings after normalization as they won't geocode
-            df = df[df['Ciudad_Estado_Provincia_Normalizada'] != ''].copy()
-            st.info("Se han normalizado los nombres de Ciudad, Estado o Provincia.")
-        else:
-            st.warning(f"Columna '{COLUMNA_CIUDAD_ESTADO_PROVINCIA}' no encontrada para normalización.")
+        # Todas las exclusiones (fechas erróneas, ACMs, guías y ciudades vacías) se definen
+        # en config/reglas_exclusion.toml y se aplican en una sola pasada. El resultado se
+        # cachea por versión de datos y reglas (ver utils/permisos.py).
+        filas_antes = len(df)
+        df, reporte_exclusiones, reglas_omitidas = permisos_preprocesados(df, (version_datos, version_reglas))
+        st.info(f"Se han aplicado {len(reporte_exclusiones)} reglas de exclusión y se han normalizado los nombres de "
+                f"Guías y de Ciudad, Estado o Provincia. Se excluyeron {filas_antes - len(df)} filas.")
+        for regla in reglas_omitidas:
+            st.warning(f"Columna '{regla['columna']}' no encontrada. Regla '{regla.get('nombre', '')}' no aplicada.")
+        with st.expander("Ver detalle de las reglas de exclusión"):
+            st.dataframe(reporte_exclusiones, hide_index=True)
 
         # --- NUEVO: Normalización de País ---
         if COLUMNA_PAIS in df.columns:
-            df['Pais_Normalizado'] = df[COLUMNA_PAIS].astype(str).str.title()
-            # No excluir vacíos aquí a menos que sea deseado, ya que el mapeo los corrige.
             st.info("Se ha normalizado la columna País.")
         else:
             st.warning(f"Columna '{COLUMNA_PAIS}' no encontrada para normalización.")
@@ -193,26 +124,59 @@ if df is not None:
                 "Después de aplicar los filtros, no quedan datos para analizar. Ajusta los filtros o verifica el CSV.")
             st.stop()
         else:
+            # Las columnas de mes y año ya se derivaron después del filtrado global
             st.info(f"Datos filtrados y listos para análisis. Quedan {len(df)} filas.")
 
-            # --- IMPORTANT: Create derived date columns HERE, after global filtering ---
-            df['Mes_Numero'] = df[COLUMNA_FECHA_EMISION].dt.month
-            df['Anio'] = df[COLUMNA_FECHA_EMISION].dt.year
-
-            # Mapeo de números de mes a nombres en español
-            # (Si el locale no funciona, esto asegura los nombres en español)
-            nombres_meses_es = {
-                1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio",
-                7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
-            }
-            df['Mes_Nombre'] = df['Mes_Numero'].map(nombres_meses_es)
-            df['Mes_Anio_Display'] = df['Mes_Nombre'] + ' - ' + df['Anio'].astype(str)
-
     else:
         st.warning(f"Columna '{COLUMNA_FECHA_EMISION}' no encontrada. No se pudo aplicar el filtro de fechas.")
     st.markdown("---")
 
+    # --- Cubo de conteos (Anio, Mes, Semana, ACM, Categoría, País, Tipo de caza) ---
+    seccion('Cubo, entidades y filtros', filas=len(df))
+    # Se calcula una vez por versión de datos y reglas; las secciones siguientes son cortes del cubo.
+    cubo = cubo_permisos(df, origen_datos, version_datos, version_reglas, partes_store)
+
+    # --- Resolución de entidades (guías y cazadores) ---
+    # Asigna un ID canónico por fila. Se calcula una vez por versión de datos y reglas.
+    guias_entidades, cazadores_entidades = agregar_entidades(df, (version_datos, version_reglas))
+
+    # --- Filtros cruzados (barra lateral) ---
+    # Los índices por valor se construyen una vez por versión de datos: combinar filtros es
+    # una intersección de posiciones, sin volver a recorrer el DataFrame en cada cambio de widget.
+    indices = indices_filtros(df, list(COLUMNAS_FILTRO), COLUMNA_FECHA_EMISION, (version_datos, version_reglas))
+
+    st.sidebar.header("🔎 Filtros")
+    selecciones = {}
+    for columna_filtro, etiqueta_filtro in COLUMNAS_FILTRO.items():
+        if columna_filtro in indices['columnas']:
+            selecciones[columna_filtro] = st.sidebar.multiselect(
+                etiqueta_filtro, opciones(indices, columna_filtro), key=f"filtro_{columna_filtro}")
+    rango_fechas = None
+    texto_periodo = "todo el período"
+    if indices['fechas'] is not None and indices['filas'] > 0:
+        fechas_ordenadas = indices['fechas']['fechas_ordenadas']
+        fecha_min = pd.Timestamp(fechas_ordenadas[0]).date()
+        fecha_max = pd.Timestamp(fechas_ordenadas[-1]).date()
+        rango_fechas = selector_rango_fechas(fecha_min, fecha_max)
+        desde, hasta = rango_fechas or (fecha_min, fecha_max)
+        texto_periodo = f"{desde:%d/%m/%Y} a {hasta:%d/%m/%Y}"
+
+    # Los filtros por valor se intersectan con los índices; el rango de fechas se corta después,
+    # sobre las filas filtradas en orden de fecha: dos searchsorted y un tramo contiguo, sin
+    # recorrer las filas. Con algún filtro activo el DataFrame queda ordenado por fecha.
+    posiciones_filtradas = filtrar(indices, selecciones)
+    if indices['fechas'] is not None and (rango_fechas is not None or posiciones_filtradas is not None):
+        orden_fechas, fechas_en_orden = orden_por_fecha(indices['fechas'], posiciones_filtradas)
+        posiciones_filtradas = orden_fechas
+        if rango_fechas is not None:
+            posiciones_filtradas = ventana_fechas(orden_fechas, fechas_en_orden, *rango_fechas)
+    if posiciones_filtradas is not None:
+        df = df.take(posiciones_filtradas)
+        cubo = construir_cubo(df)
+        st.info(f"Filtros activos: se muestran **{len(df)}** de {indices['filas']} filas.")
+
     # --- 1. Áreas de Caza Mayor (ACMs) ---
+    seccion('ACMs', filas=len(df))
     st.header("📍 Áreas de Caza Mayor (ACMs) Únicas")
     if COLUMNA_ACM in df.columns:
         acms_unicos = pd.DataFrame(df[COLUMNA_ACM].astype(str).str.strip().dropna().unique(), columns=[COLUMNA_ACM])
@@ -221,120 +185,169 @@ if df is not None:
         col1_acm, col2_acm = st.columns([0.7, 0.3])
         with col1_acm:
             with st.expander(f"Ver los {min(5, len(acms_unicos))} primeros ACMs (Haz clic para ver todos)"):
-                st.dataframe(acms_unicos, hide_index=True)
+                tabla_paginada(acms_unicos, key="tabla_acms")
         with col2_acm:
             st.info(f"Hay **{len(acms_unicos)}** áreas de caza mayor únicas.")  # Auto-display count
-            st.download_button(
+            boton_exportar(
+                acms_unicos,
                 label=f"⬇️ Exportar todos los ACMs",
-                data=to_excel(acms_unicos),
-                file_name=f'acms_unicos_{nombre_nuevo_csv.replace(".csv", "")}.xlsx',
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                file_name=f'acms_unicos_{nombre_nuevo_csv.replace(".csv", "")}',
+                key="acms_unicos"
             )
     else:
         st.warning(f"Columna '{COLUMNA_ACM}' no encontrada. Por favor, revisa el nombre de la columna.")
     st.markdown("---")
 
     # --- 2. Responsables/Guías de Caza ---
+    seccion('Guías', filas=len(df))
     st.header("👤 Responsables/Guías de Caza Únicos")
-    if COLUMNA_GUIA in df.columns:
-        # Use the normalized column for uniqueness, but display original if preferred.
-        # 'Guia_Normalizado' should already exist from global filter section
-        guias_unicos_df = pd.DataFrame(df['Guia_Normalizado'].dropna().unique(), columns=['Guía Normalizado'])
-        guias_unicos_df = guias_unicos_df.sort_values(by='Guía Normalizado').reset_index(drop=True)
+    if guias_entidades is not None:
+        # Un guía por ID canónico: las variantes del mismo nombre se muestran agrupadas
+        registros_guia = df.loc[df['Guia_ID'] >= 0, 'Guia_ID'].value_counts()
+        guias_unicos_df = guias_entidades.loc[registros_guia.index.sort_values(), ['id', 'nombre', 'variantes']]
+        guias_unicos_df = pd.DataFrame({
+            'Guía': guias_unicos_df['nombre'].to_numpy(),
+            'Variantes del nombre': guias_unicos_df['variantes'].str.join(' | ').to_numpy(),
+            'Permisos': registros_guia.sort_index().to_numpy(),
+        })
+        variantes_agrupadas = int((guias_entidades.loc[registros_guia.index, 'variantes'].str.len() > 1).sum())
 
         col1_guia, col2_guia = st.columns([0.7, 0.3])
         with col1_guia:
             with st.expander(
                     f"Ver los {min(5, len(guias_unicos_df))} primeros Responsables/Guías (Haz clic para ver todos)"):
-                st.dataframe(guias_unicos_df, hide_index=True)
+                tabla_paginada(guias_unicos_df, key="tabla_guias")
         with col2_guia:
             st.info(
-                f"Hay **{len(guias_unicos_df)}** responsables/guías de caza únicos (normalizados).")  # Auto-display count
-            st.download_button(
+                f"Hay **{len(guias_unicos_df)}** responsables/guías de caza únicos "
+                f"({variantes_agrupadas} con variantes de nombre agrupadas).")  # Auto-display count
+            boton_exportar(
+                guias_unicos_df,
                 label=f"⬇️ Exportar todos los Responsables/Guías",
-                data=to_excel(guias_unicos_df),
-                file_name=f'guias_unicos_{nombre_nuevo_csv.replace(".csv", "")}.xlsx',
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                file_name=f'guias_unicos_{nombre_nuevo_csv.replace(".csv", "")}',
+                key="guias_unicos"
             )
     else:
         st.warning(f"Columna '{COLUMNA_GUIA}' no encontrada. Por favor, revisa el nombre de la columna.")
+
+    if cazadores_entidades is not None:
+        registros_cazador = df.loc[df['Cazador_ID'] >= 0, 'Cazador_ID'].value_counts()
+        cazadores_agrupados = cazadores_entidades.loc[registros_cazador.index]
+        cazadores_agrupados = cazadores_agrupados[cazadores_agrupados['variantes'].str.len() > 1]
+        st.info(f"Hay **{len(registros_cazador)}** cazadores únicos (por documento y nombre); "
+                f"{len(cazadores_agrupados)} aparecen con más de una variante de nombre.")
+        if len(cazadores_agrupados):
+            with st.expander("Ver cazadores con variantes de nombre agrupadas"):
+                tabla_paginada(pd.DataFrame({
+                    'Cazador': cazadores_agrupados['nombre'].to_numpy(),
+                    'Variantes del nombre': cazadores_agrupados['variantes'].str.join(' | ').to_numpy(),
+                }), key="tabla_cazadores")
     st.markdown("---")
 
     # --- 3. Tabla y Gráfico de País y Mapa ---
+    seccion('Países y mapa', filas=len(df))
     st.header("🌎 Análisis Geográfico de Permisos por País") # Título ajustado
     if COLUMNA_PAIS in df.columns: # Ahora usamos COLUMNA_PAIS
         # Usamos la columna normalizada para contar y agrupar
-        paises_counts = df.groupby(COLUMNA_PAIS).size().reset_index(name='Cantidad') # Agrupamos por COLUMNA_PAIS
+        paises_counts = contar_por(cubo, [COLUMNA_PAIS]) # Agrupamos por COLUMNA_PAIS
         paises_counts.columns = ['País', 'Cantidad']
         paises_counts = paises_counts.sort_values(by='Cantidad', ascending=False)
 
         st.markdown("##### Detalles por País")
         with st.expander(f"Ver los {min(10, len(paises_counts))} principales (Haz clic para ver todos)"):
-            st.dataframe(paises_counts, hide_index=True)
-        st.download_button(
+            tabla_paginada(paises_counts, key="tabla_paises")
+        boton_exportar(
+            paises_counts,
             label=f"⬇️ Exportar Países",
-            data=to_excel(paises_counts),
-            file_name=f'paises_{nombre_nuevo_csv.replace(".csv", "")}.xlsx',
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            file_name=f'paises_{nombre_nuevo_csv.replace(".csv", "")}',
+            key="paises"
         )
 
         st.markdown("##### Cantidad de Permisos por País (Top 15)") # Título del gráfico ajustado
         top_n_paises = paises_counts.head(15)
-        fig_paises = px.bar(top_n_paises,
-                              x='País', # Eje X ahora es País
-                              y='Cantidad',
-                              text='Cantidad', # ¡NUEVO! Mostrar etiquetas de valor en las barras
-                              title='Permisos por País (Top 15)', # Título del gráfico ajustado
-                              labels={'País': 'País', 'Cantidad': 'Número de Permisos'}) # Etiquetas ajustadas
-        fig_paises.update_xaxes(tickangle=45)
-        fig_paises.update_traces(texttemplate='%{text}', textposition='outside') # Formato de etiquetas
-        st.plotly_chart(fig_paises, use_container_width=True, key="main_pais_chart") # Key ajustada
+        grafico('bar', top_n_paises,
+                key="main_pais_chart", # Key ajustada
+                x='País', # Eje X ahora es País
+                y='Cantidad',
+                text='Cantidad', # ¡NUEVO! Mostrar etiquetas de valor en las barras
+                title='Permisos por País (Top 15)', # Título del gráfico ajustado
+                labels={'País': 'País', 'Cantidad': 'Número de Permisos'}, # Etiquetas ajustadas
+                ajustes={'update_xaxes': {'tickangle': 45},
+                         'update_traces': {'texttemplate': '%{text}', 'textposition': 'outside'}}) # Formato de etiquetas
 
         st.markdown("---")
-        st.markdown("##### Mapa de Distribución de Permisos por País (Top 20)") # Título del mapa ajustado
-        st.info(
-            "Obteniendo coordenadas geográficas para las ubicaciones. Esto puede tomar un tiempo (aproximadamente 1 segundo por ubicación única).")
-
-        # Get top 20 unique locations for geocoding
-        # Ahora usamos paises_counts para obtener los países más frecuentes
-        top_20_locations_map = paises_counts.head(20)['País'].tolist()
-
-        # Geocode and prepare data for map
-        geo_data_map = []
-        progress_text_map = "Geocodificando países, por favor espera..."
-        my_bar_map = st.progress(0, text=progress_text_map)
-
-        for i, loc_name in enumerate(top_20_locations_map):
-            lat, lon, country_from_geo = get_lat_lon_country(loc_name) # 'country_from_geo' es el país devuelto por geocodificador
-            if lat is not None and lon is not None:
-                cantidad = paises_counts[paises_counts['País'] == loc_name]['Cantidad'].iloc[0]
-                geo_data_map.append(
-                    {'Ubicación': loc_name, 'Latitud': lat, 'Longitud': lon, 'Cantidad': cantidad, 'País_Geocodificado': country_from_geo})
-            my_bar_map.progress((i + 1) / len(top_20_locations_map), text=f"{progress_text_map} ({i + 1}/{len(top_20_locations_map)})")
-        my_bar_map.empty()
-
-        df_map_countries = pd.DataFrame(geo_data_map)
-
-        if not df_map_countries.empty:
-            # Create a scatter map with marker size and color by Quantity
-            fig_map_countries = px.scatter_mapbox(df_map_countries,
-                                        lat="Latitud",
-                                        lon="Longitud",
-                                        size="Cantidad",
-                                        color="Cantidad",
-                                        color_continuous_scale=px.colors.sequential.Reds, # ¡NUEVO! Gradiente de rojos
-                                        hover_name="Ubicación",
-                                        hover_data={"Cantidad": True, "País_Geocodificado": True},
-                                        zoom=1,
-                                        height=600,
-                                        title="Distribución Geográfica de Permisos por País (Top 20 Países)", # Título del mapa ajustado
-                                        mapbox_style="open-street-map")
-
-            fig_map_countries.update_layout(mapbox_bounds={"west": -180, "east": 180, "south": -90, "north": 90})
-            st.plotly_chart(fig_map_countries, use_container_width=True, key="location_map_chart_countries") # Key ajustada
+        # Con los límites de data/limites/ el mapa se dibuja sin conexión (coroplético, sin
+        # teselas ni geocodificación); el mapa de burbujas sobre OpenStreetMap queda como alternativa
+        modo_mapa = MODO_MAPA_EN_LINEA
+        if disponible('paises'):
+            col_modo, col_detalle = st.columns([0.6, 0.4])
+            modo_mapa = col_modo.radio("Mapa", [MODO_MAPA_SIN_CONEXION, MODO_MAPA_EN_LINEA], horizontal=True,
+                                       key="modo_mapa")
+            resolucion_mapa = col_detalle.select_slider("Nivel de detalle", options=list(RESOLUCIONES),
+                                                        value='media', key="resolucion_mapa",
+                                                        disabled=modo_mapa != MODO_MAPA_SIN_CONEXION)
+
+        if modo_mapa == MODO_MAPA_SIN_CONEXION:
+            st.markdown("##### Mapa de Permisos por País")
+            mapa_coropletico(paises_counts, 'País', 'paises', resolucion_mapa,
+                             key="mapa_coropletico_paises",
+                             height=600,
+                             title="Permisos por País",
+                             labels={'Cantidad': 'Número de Permisos'})
+            if disponible('provincias') and 'Ciudad_Estado_Provincia_Normalizada' in df.columns:
+                # Provincia de los permisos de Argentina, reconocida en el texto libre de la ubicación
+                st.markdown("##### Mapa de Permisos por Provincia (Argentina)")
+                en_argentina = df['Pais_Normalizado'] == 'Argentina'
+                provincias = asignar_features(df.loc[en_argentina, 'Ciudad_Estado_Provincia_Normalizada'],
+                                              cargar_capa('provincias', resolucion_mapa))
+                provincias_counts = provincias.dropna().value_counts().rename_axis('Provincia').reset_index(
+                    name='Cantidad')
+                mapa_coropletico(provincias_counts, 'Provincia', 'provincias', resolucion_mapa,
+                                 key="mapa_coropletico_provincias",
+                                 height=600,
+                                 title="Permisos por Provincia",
+                                 labels={'Cantidad': 'Número de Permisos'})
+                st.caption(f"{int(provincias.isna().sum())} de {int(en_argentina.sum())} permisos de Argentina "
+                           f"sin provincia reconocida en '{COLUMNA_CIUDAD_ESTADO_PROVINCIA}'.")
         else:
-            st.warning(
-                "No se pudieron obtener coordenadas geográficas para generar el mapa de países. Esto puede deberse a problemas de conexión a internet o a nombres de países no reconocidos.")
+            st.markdown("##### Mapa de Distribución de Permisos por País (Top 20)") # Título del mapa ajustado
+            st.info(
+                "Obteniendo coordenadas geográficas desde el store local (pre-cargado con centroides de países). "
+                "Las ubicaciones desconocidas se consultan en línea en segundo plano y el mapa se completa solo.")
+            with span('Geocodificación', filas=min(MAX_PAISES_MAPA, len(paises_counts))):
+                mapa_ubicaciones(paises_counts.head(MAX_PAISES_MAPA).assign(Ubicación=lambda d: d['País']),
+                                 key="location_map_chart_countries", # Key ajustada
+                                 hover_name="País",
+                                 hover_data={"Cantidad": True, "País_Geocodificado": True, "Ubicación": False},
+                                 zoom=1,
+                                 height=600,
+                                 title="Distribución Geográfica de Permisos por País (Top 20 Países)", # Título del mapa ajustado
+                                 ajustes={'update_layout': {'mapbox_bounds': {"west": -180, "east": 180, "south": -90, "north": 90}}})
+
+        if 'Ciudad_Estado_Provincia_Normalizada' in df.columns:
+            # Una entrada por ciudad normalizada y país: cada ubicación distinta se geocodifica una sola vez
+            st.markdown(f"##### Mapa de Permisos por Ciudad (Top {MAX_CIUDADES_MAPA})")
+            ciudades_counts = (df.groupby(['Ciudad_Estado_Provincia_Normalizada', 'Pais_Normalizado'], observed=True)
+                               .size().reset_index(name='Cantidad')
+                               .sort_values(by='Cantidad', ascending=False, kind='stable')
+                               .head(MAX_CIUDADES_MAPA))
+            ciudades_counts = pd.DataFrame({
+                'Ciudad': ciudades_counts['Ciudad_Estado_Provincia_Normalizada'].str.title().to_numpy(),
+                'País': ciudades_counts['Pais_Normalizado'].to_numpy(),
+                'Cantidad': ciudades_counts['Cantidad'].to_numpy(),
+                'Ubicación': [texto_ubicacion(ciudad, pais) for ciudad, pais in
+                              zip(ciudades_counts['Ciudad_Estado_Provincia_Normalizada'],
+                                  ciudades_counts['Pais_Normalizado'])],
+            })
+            mapa_ubicaciones(ciudades_counts,
+                             key="mapa_ciudades",
+                             en_linea=modo_mapa == MODO_MAPA_EN_LINEA,
+                             hover_name="Ciudad",
+                             hover_data={"País": True, "Cantidad": True, "Ubicación": False, "Latitud": False,
+                                         "Longitud": False, "País_Geocodificado": False},
+                             zoom=1,
+                             height=600,
+                             title=f"Distribución Geográfica de Permisos por Ciudad (Top {MAX_CIUDADES_MAPA})")
 
         st.markdown("---")
 
@@ -345,56 +358,61 @@ if df is not None:
 
 
     # --- 4. Tabla y Gráfico de Categoría ---
+    seccion('Categorías', filas=len(df))
     st.header("🏷️ Análisis por Categoría")
     if COLUMNA_CATEGORIA in df.columns:
-        categoria_counts = df[COLUMNA_CATEGORIA].value_counts().reset_index()
+        categoria_counts = contar_por(cubo, [COLUMNA_CATEGORIA])
         categoria_counts.columns = ['Categoría', 'Cantidad']
         categoria_counts = categoria_counts.sort_values(by='Cantidad', ascending=False)
 
         st.markdown("##### Detalles por Categoría")
         with st.expander(f"Ver todas las Categorías (Haz clic para ver todos)"):
-            st.dataframe(categoria_counts, hide_index=True)
-        st.download_button(
+            tabla_paginada(categoria_counts, key="tabla_categorias")
+        boton_exportar(
+            categoria_counts,
             label=f"⬇️ Exportar Categorías",
-            data=to_excel(categoria_counts),
-            file_name=f'categorias_{nombre_nuevo_csv.replace(".csv", "")}.xlsx',
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            file_name=f'categorias_{nombre_nuevo_csv.replace(".csv", "")}',
+            key="categorias"
         )
 
         st.markdown("##### Distribución de Categorías")
-        fig_categoria = px.pie(categoria_counts,
-                               names='Categoría',
-                               values='Cantidad',
-                               title='Distribución de Permisos por Categoría',
-                               hole=0.3,
-                               width=800,
-                               height=600)
-        st.plotly_chart(fig_categoria, use_container_width=True, key="main_categoria_chart")
+        grafico('pie', categoria_counts,
+                key="main_categoria_chart",
+                names='Categoría',
+                values='Cantidad',
+                title='Distribución de Permisos por Categoría',
+                hole=0.3,
+                width=800,
+                height=600)
     else:
         st.warning(f"Columna '{COLUMNA_CATEGORIA}' no encontrada. Por favor, revisa el nombre de la columna.")
     st.markdown("---")
 
     # --- Análisis Mensual y Semanal de Permisos ---
+    seccion('Mensual', filas=len(df))
     st.header("🗓️ Análisis de Permisos por Mes y Semana")
+    st.caption(f"Período: {texto_periodo} (se elige en la barra lateral).")
     if COLUMNA_FECHA_EMISION in df.columns:
         try:
             if not df.empty:
                 # --- Conteo por Mes ---
-                permisos_por_mes = df.groupby(['Anio', 'Mes_Numero', 'Mes_Anio_Display']).size().reset_index(
-                    name='Cantidad de Permisos')
+                permisos_por_mes = contar_por(cubo, ['Anio', 'Mes_Numero']).rename(
+                    columns={'Cantidad': 'Cantidad de Permisos'})
                 permisos_por_mes = permisos_por_mes.sort_values(by=['Anio', 'Mes_Numero']).reset_index(drop=True)
+                permisos_por_mes['Mes_Anio_Display'] = permisos_por_mes['Mes_Numero'].map(NOMBRES_MESES_ES) + ' - ' + \
+                                                       permisos_por_mes['Anio'].astype(str)
 
                 st.markdown("##### Permisos por Mes y Año")
-                st.dataframe(permisos_por_mes[['Mes_Anio_Display', 'Cantidad de Permisos']], hide_index=True)
+                tabla_paginada(permisos_por_mes[['Mes_Anio_Display', 'Cantidad de Permisos']], key="tabla_meses")
 
-                fig_permisos_mes = px.bar(permisos_por_mes,
-                                          x='Mes_Anio_Display',
-                                          y='Cantidad de Permisos',
-                                          title='Permisos de Caza por Mes y Año',
-                                          labels={'Mes_Anio_Display': 'Mes y Año',
-                                                  'Cantidad de Permisos': 'Número de Permisos'})
-                fig_permisos_mes.update_traces(width=0.5)
-                st.plotly_chart(fig_permisos_mes, use_container_width=True, key="main_permisos_mes_chart")
+                grafico('bar', permisos_por_mes[['Mes_Anio_Display', 'Cantidad de Permisos']],
+                        key="main_permisos_mes_chart",
+                        x='Mes_Anio_Display',
+                        y='Cantidad de Permisos',
+                        title='Permisos de Caza por Mes y Año',
+                        labels={'Mes_Anio_Display': 'Mes y Año',
+                                'Cantidad de Permisos': 'Número de Permisos'},
+                        ajustes={'update_traces': {'width': 0.5}})
 
                 mes_mas_permisos = permisos_por_mes.loc[permisos_por_mes['Cantidad de Permisos'].idxmax()]
                 st.info(
@@ -411,54 +429,53 @@ if df is not None:
             f"Columna '{COLUMNA_FECHA_EMISION}' no encontrada. No se pudo generar el gráfico combinado de fechas.")
     st.markdown("---")
 
-    # --- Gráfico Combinado de Permisos Semanales por Mes (Enero a Junio) ---
-    st.header("📊 Permisos Semanales Combinados por Mes (Enero a Junio)")
+    # --- Gráfico Combinado de Permisos Semanales por Mes (período elegido) ---
+    seccion('Semanal', filas=len(df))
+    st.header("📊 Permisos Semanales Combinados por Mes")
+    st.caption(f"Período: {texto_periodo} (se elige en la barra lateral).")
     if COLUMNA_FECHA_EMISION in df.columns:
-        df_grafico_combinado = df[
-            (df['Mes_Numero'] >= 1) & (df['Mes_Numero'] <= 6)
-            ].copy()
-
-        if not df_grafico_combinado.empty:
-            df_grafico_combinado['Dia_Del_Mes'] = df_grafico_combinado[COLUMNA_FECHA_EMISION].dt.day
-            df_grafico_combinado['Semana_Del_Mes'] = ((df_grafico_combinado['Dia_Del_Mes'] - 1) // 7) + 1
-            df_grafico_combinado['Semana_Etiqueta'] = 'Semana ' + df_grafico_combinado['Semana_Del_Mes'].astype(str)
-
-            df_grafico_combinado['Mes_Semana_Label'] = df_grafico_combinado['Mes_Nombre'] + ' - ' + \
-                                                       df_grafico_combinado['Semana_Etiqueta']
-
-            permisos_mes_semana_combinado = df_grafico_combinado.groupby(
-                ['Anio', 'Mes_Numero', 'Mes_Nombre', 'Semana_Del_Mes', 'Mes_Semana_Label']).size().reset_index(
-                name='Cantidad de Permisos')
+        # El cubo ya es el del período elegido: no hace falta filtrar meses
+        permisos_mes_semana_combinado = contar_por(
+            cubo, ['Anio', 'Mes_Numero', COLUMNA_SEMANA]
+        ).rename(columns={'Cantidad': 'Cantidad de Permisos'})
+
+        if not permisos_mes_semana_combinado.empty:
+            permisos_mes_semana_combinado['Mes_Nombre'] = permisos_mes_semana_combinado['Mes_Numero'].map(
+                NOMBRES_MESES_ES)
+            permisos_mes_semana_combinado['Mes_Semana_Label'] = permisos_mes_semana_combinado['Mes_Nombre'] + \
+                                                                ' - Semana ' + \
+                                                                permisos_mes_semana_combinado[COLUMNA_SEMANA].astype(str)
 
             permisos_mes_semana_combinado = permisos_mes_semana_combinado.sort_values(
-                by=['Anio', 'Mes_Numero', 'Semana_Del_Mes'])
-
-            fig_combined_weekly = px.bar(permisos_mes_semana_combinado,
-                                         x='Mes_Semana_Label',
-                                         y='Cantidad de Permisos',
-                                         color='Mes_Nombre',
-                                         facet_col='Anio',
-                                         facet_col_wrap=2,
-                                         title='Permisos de Caza por Semana dentro de cada Mes (Enero - Junio)',
-                                         labels={'Mes_Semana_Label': 'Mes y Semana',
-                                                 'Cantidad de Permisos': 'Número de Permisos', 'Mes_Nombre': 'Mes'},
-                                         category_orders={"Mes_Semana_Label": permisos_mes_semana_combinado[
-                                             'Mes_Semana_Label'].tolist()},
-                                         height=600
-                                         )
-            fig_combined_weekly.update_xaxes(tickangle=45, showgrid=True)
-            fig_combined_weekly.update_layout(
-                legend_title_text='Mes',
-                hovermode="x unified"
-            )
-            st.plotly_chart(fig_combined_weekly, use_container_width=True, key="combined_monthly_weekly_chart")
+                by=['Anio', 'Mes_Numero', COLUMNA_SEMANA])
+
+            # Solo las columnas que usa el gráfico: el resto engordaría el JSON (y la clave de la caché)
+            grafico('bar', permisos_mes_semana_combinado[['Anio', 'Mes_Nombre', 'Mes_Semana_Label',
+                                                          'Cantidad de Permisos']],
+                    key="combined_monthly_weekly_chart",
+                    x='Mes_Semana_Label',
+                    y='Cantidad de Permisos',
+                    color='Mes_Nombre',
+                    facet_col='Anio',
+                    facet_col_wrap=2,
+                    title=f'Permisos de Caza por Semana dentro de cada Mes ({texto_periodo})',
+                    labels={'Mes_Semana_Label': 'Mes y Semana',
+                            'Cantidad de Permisos': 'Número de Permisos', 'Mes_Nombre': 'Mes'},
+                    # Las etiquetas se repiten entre años: sin duplicados alcanza para fijar el orden
+                    category_orders={"Mes_Semana_Label": permisos_mes_semana_combinado[
+                        'Mes_Semana_Label'].drop_duplicates().tolist()},
+                    height=600,
+                    ajustes={'update_xaxes': {'tickangle': 45, 'showgrid': True},
+                             'update_layout': {'legend_title_text': 'Mes', 'hovermode': "x unified"}})
         else:
             st.info(
-                "No hay datos para generar el gráfico combinado de permisos semanales por mes (Enero a Junio) después del filtrado.")
+                "No hay datos para generar el gráfico combinado de permisos semanales por mes en el período elegido.")
     else:
         st.warning(
             f"Columna '{COLUMNA_FECHA_EMISION}' no encontrada. No se pudo generar el gráfico combinado de fechas.")
     st.markdown("---")
 
 else:
-    st.error("No se pudieron cargar los datos. Por favor, verifica el archivo CSV y la ruta.")
\ No newline at end of file
+    st.error("No se pudieron cargar los datos. Por favor, verifica el archivo CSV y la ruta.")
+
+finalizar_medicion()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Parseo de coordenadas de texto libre y consultas espaciales (utils/coordenadas.py) con puntos
+sintéticos en Neuquén: "a menos de X km" y "más cercano" con la grilla contra recorrer todas
+las filas con haversine.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_coordenadas --filas 10000 100000 1000000 --radio 25
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.coordenadas import cerca_de, construir_grilla, distancia_km, mas_cercano, parsear_coordenadas
+
+CONSULTAS = 200
+
+
+def _textos(latitudes, longitudes):
+    """Mitad en decimal y mitad en grados/minutos/segundos con hemisferio."""
+    decimales = [f"{a:.5f}, {b:.5f}" for a, b in zip(latitudes[::2], longitudes[::2])]
+    dms = [f"{int(-a)}°{int(-a * 60 % 60)}'{int(-a * 3600 % 60)}\" S {int(-b)}°{int(-b * 60 % 60)}' O"
+           for a, b in zip(latitudes[1::2], longitudes[1::2])]
+    textos = np.empty(len(latitudes), dtype=object)
+    textos[::2], textos[1::2] = decimales, dms
+    return pd.Series(textos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--radio', type=float, default=25, help="Radio de las consultas en km")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'filas':>10} {'parseo (s)':>11} {'grilla (s)':>11} {'radio scan (ms)':>16} {'radio grilla (ms)':>18} "
+          f"{'cercano scan (ms)':>18} {'cercano grilla (ms)':>20}")
+    for n in args.filas:
+        latitudes, longitudes = rng.uniform(-41, -36, n), rng.uniform(-71.5, -68, n)
+        inicio = time.perf_counter()
+        coordenadas = parsear_coordenadas(_textos(latitudes, longitudes))
+        t_parseo = time.perf_counter() - inicio
+        assert np.allclose(coordenadas['Latitud'], latitudes, atol=1e-3)
+
+        inicio = time.perf_counter()
+        grilla = construir_grilla(latitudes, longitudes)
+        t_grilla = time.perf_counter() - inicio
+
+        consultas = rng.integers(0, n, CONSULTAS)
+        t_radio_scan = t_radio_grilla = t_cercano_scan = t_cercano_grilla = 0.0
+        for i in consultas:
+            inicio = time.perf_counter()
+            distancias = distancia_km(latitudes[i], longitudes[i], latitudes, longitudes)
+            esperado = np.flatnonzero(distancias <= args.radio)
+            distancias[i] = np.inf
+            cercano_esperado = int(np.argmin(distancias))
+            t_medio = time.perf_counter()
+            t_radio_scan += t_medio - inicio
+            t_cercano_scan += t_medio - inicio
+
+            inicio = time.perf_counter()
+            posiciones, _ = cerca_de(grilla, latitudes[i], longitudes[i], args.radio)
+            t_radio_grilla += time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            cercano, _ = mas_cercano(grilla, latitudes[i], longitudes[i], excluir=i)
+            t_cercano_grilla += time.perf_counter() - inicio
+            assert set(posiciones) == set(esperado) and cercano == cercano_esperado
+
+        ms = 1000 / CONSULTAS
+        print(f"{n:>10} {t_parseo:>11.2f} {t_grilla:>11.3f} {t_radio_scan * ms:>16.2f} {t_radio_grilla * ms:>18.2f} "
+              f"{t_cercano_scan * ms:>18.2f} {t_cercano_grilla * ms:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Cruce de permisos y guías de traslado por ACM (utils/dimension_acm.py) con las columnas de
+ACM reales repetidas hasta distintos tamaños: la dimensión se arma una vez y cada cruce
+busca solo los valores distintos en el índice (hash join) contra un merge de pandas de todas
+las filas (texto) con la tabla valor -> id.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_dimension_acm --filas 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.dimension_acm import FUENTE_GUIAS, FUENTE_PERMISOS, construir_dimension, cruce_registros
+
+ARCHIVO_PERMISOS = 'mis_datos_maestros_final_v1.csv'
+ARCHIVO_GUIAS = 'guia_traslado_2.csv'
+COLUMNA_ACM = 'ACM-(Área de caza mayor)'
+
+
+def _repetir(serie, n, rng):
+    return pd.Series(rng.choice(serie.dropna().to_numpy(dtype=object), n), dtype=object)
+
+
+def cruce_con_merge(dimension, permisos, guias):
+    """Mismo resultado con merge de pandas fila a fila contra la tabla valor -> id y groupby."""
+    por_valor = dimension['por_valor'].rename('id').rename_axis('valor').reset_index()
+    tabla = dimension['tabla'][['id', 'nombre']]
+    for nombre, serie in (('Permisos', permisos), ('Guías', guias)):
+        filas = pd.DataFrame({'valor': serie.str.strip()}).merge(por_valor, on='valor')
+        tabla = tabla.merge(filas.groupby('id').size().rename(nombre), left_on='id', right_index=True, how='left')
+    return tabla.fillna(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    permisos_base = pd.read_csv(ARCHIVO_PERMISOS, usecols=[COLUMNA_ACM])[COLUMNA_ACM]
+    guias_base = pd.read_csv(ARCHIVO_GUIAS, usecols=[COLUMNA_ACM])[COLUMNA_ACM]
+    print(f"{'filas':>10} {'dimensión (s)':>14} {'cruce índice (s)':>17} {'cruce merge (s)':>16}")
+    for n in args.filas:
+        permisos, guias = _repetir(permisos_base, n, rng), _repetir(guias_base, n, rng)
+        inicio = time.perf_counter()
+        dimension = construir_dimension({FUENTE_PERMISOS: permisos, FUENTE_GUIAS: guias})
+        t_dimension = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        cruce = cruce_registros(dimension, {'Permisos': permisos, 'Guías': guias})
+        t_cruce = time.perf_counter() - inicio
+        assert cruce['Permisos'].sum() == n and cruce['Guías'].sum() == n
+
+        inicio = time.perf_counter()
+        referencia = cruce_con_merge(dimension, permisos, guias)
+        t_merge = time.perf_counter() - inicio
+        assert referencia['Permisos'].sum() == n and referencia['Guías'].sum() == n
+        print(f"{n:>10} {t_dimension:>14.3f} {t_cruce:>17.3f} {t_merge:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
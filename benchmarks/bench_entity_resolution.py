@@ -0,0 +1,63 @@
+"""
+Escalado de la resolución de entidades (utils/entity_resolution.py) con nombres sintéticos.
+
+Cada nombre se arma con palabras reales de 'Nombre y Apellido' y una parte de las filas
+se repite con un error de tipeo o con las palabras en otro orden, para medir tiempo
+y cuántos de esos duplicados se recuperan.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_entity_resolution --filas 10000 100000 300000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.entity_resolution import resolver_nombres
+
+ARCHIVO_MAESTRO = 'mis_datos_maestros_final_v1.csv'
+PROPORCION_DUPLICADOS = 0.1
+
+
+def _con_error(nombre, rng):
+    """Borra, duplica o invierte las palabras de un nombre."""
+    accion = rng.integers(3)
+    posicion = int(rng.integers(1, len(nombre) - 1))
+    if accion == 0:
+        return nombre[:posicion] + nombre[posicion + 1:]
+    if accion == 1:
+        return nombre[:posicion] + nombre[posicion] + nombre[posicion:]
+    return ' '.join(reversed(nombre.split()))
+
+
+def _nombres_sinteticos(palabras, n_filas, rng):
+    n_base = int(n_filas * (1 - PROPORCION_DUPLICADOS))
+    partes = rng.choice(palabras, size=(n_base, 3))
+    base = [' '.join(p) for p in partes]
+    originales = rng.integers(n_base, size=n_filas - n_base)
+    duplicados = [_con_error(base[i], rng) for i in originales]
+    return pd.Series(base + duplicados, dtype=object), originales
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    palabras = (pd.read_csv(ARCHIVO_MAESTRO, usecols=['Nombre y Apellido'])['Nombre y Apellido']
+                .dropna().str.split().explode().str.title().unique())
+    print(f"{'filas':>10} {'entidades':>10} {'tiempo (s)':>11} {'duplicados recuperados':>23}")
+    for n in args.filas:
+        nombres, originales = _nombres_sinteticos(palabras, n, rng)
+        inicio = time.perf_counter()
+        ids, tabla = resolver_nombres(nombres)
+        segundos = time.perf_counter() - inicio
+        n_base = n - len(originales)
+        recuperados = np.mean(ids[n_base:] == ids[originales])
+        print(f"{n:>10} {len(tabla):>10} {segundos:>11.2f} {recuperados:>23.1%}")
+
+
+if __name__ == '__main__':
+    main()
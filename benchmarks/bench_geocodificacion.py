@@ -0,0 +1,97 @@
+"""
+Tiempo para geocodificar las ciudades del maestro de permisos: consultas una por una (como el
+bucle que bloqueaba la página) contra el worker asíncrono de utils/geocodificador.py con
+distintas concurrencias.
+
+No usa Nominatim: levanta un servidor local que responde como su endpoint /search con una
+latencia fija, y cada medición usa un store SQLite temporal vacío.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_geocodificacion --latencia 0.3 --concurrencias 1 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from utils.exclusion_rules import cargar_reglas
+from utils.geocodificador import Geocodificador, texto_ubicacion
+from utils.geocoding import consultar_store, inicializar_store
+from utils.permisos import RUTA_REGLAS_EXCLUSION, cargar_permisos, preprocesar_permisos
+
+
+def servidor_local(latencia):
+    """Servidor tipo Nominatim en un puerto libre: coordenadas derivadas del hash del texto."""
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            texto = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)['q'][0]
+            time.sleep(latencia)
+            h = zlib.crc32(texto.encode())
+            cuerpo = json.dumps([{'lat': str(h % 120 - 60), 'lon': str(h % 360 - 180),
+                                  'address': {'country': 'Local'}}]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def ubicaciones_permisos():
+    df, _, _, _ = cargar_permisos()
+    df, _, _ = preprocesar_permisos(df, cargar_reglas(RUTA_REGLAS_EXCLUSION))
+    pares = df[['Ciudad_Estado_Provincia_Normalizada', 'Pais_Normalizado']].drop_duplicates()
+    return [texto_ubicacion(c, p) for c, p in pares.itertuples(index=False)]
+
+
+def medir(url, ubicaciones, intervalo, concurrencia):
+    """Segundos hasta que todas las ubicaciones están en un store nuevo."""
+    with tempfile.TemporaryDirectory() as directorio:
+        db_path = os.path.join(directorio, 'geocoding.sqlite3')
+        inicializar_store(db_path)
+        faltantes = [u for u in ubicaciones if u not in consultar_store(ubicaciones, db_path=db_path)]
+        geocodificador = Geocodificador(url=url, intervalo=intervalo, concurrencia=concurrencia, db_path=db_path)
+        inicio = time.perf_counter()
+        geocodificador.encolar(faltantes)
+        while geocodificador.pendientes():
+            time.sleep(0.01)
+        segundos = time.perf_counter() - inicio
+        resueltas = len(consultar_store(ubicaciones, db_path=db_path))
+    return segundos, len(faltantes), resueltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latencia', type=float, default=0.3, help="Segundos que tarda cada respuesta")
+    parser.add_argument('--intervalo', type=float, default=0.0,
+                        help="Segundos mínimos entre consultas (1.1 con el Nominatim público)")
+    parser.add_argument('--concurrencias', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--limite', type=int, default=100, help="Ubicaciones distintas a geocodificar")
+    args = parser.parse_args()
+
+    servidor = servidor_local(args.latencia)
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/search"
+    ubicaciones = ubicaciones_permisos()[:args.limite]
+    filas = []
+    for concurrencia in args.concurrencias:
+        segundos, consultadas, resueltas = medir(url, ubicaciones, args.intervalo, concurrencia)
+        filas.append({'concurrencia': concurrencia, 'consultadas': consultadas, 'en store': resueltas,
+                      'segundos': round(segundos, 2), 'ubicaciones/s': round(consultadas / segundos, 1)})
+    servidor.shutdown()
+    print(pd.DataFrame(filas).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Memoria de cada dataset leído sin tipos (read_csv por defecto) contra la lectura
+con su esquema de config/esquemas.toml (usecols, category, string[pyarrow], fechas).
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_memoria_esquemas [--detalle]
+"""
+import argparse
+
+from utils.schemas import obtener_esquema, reporte_memoria
+
+DATASETS = {
+    'permisos': 'mis_datos_maestros_final_v1.csv',
+    'guias_traslado': 'guia_traslado_2.csv',
+    'establecimientos': 'planilla-de-inscripción-de-establecimiento-particulares-2025-07-01.csv',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--detalle', action='store_true', help="Muestra el reporte por columna")
+    args = parser.parse_args()
+
+    print(f"{'dataset':<18} {'KB antes':>10} {'KB después':>11} {'reducción':>10}")
+    for nombre, ruta in DATASETS.items():
+        reporte = reporte_memoria(ruta, obtener_esquema(nombre))
+        total = reporte.iloc[-1]
+        reduccion = 1 - total['KB después'] / total['KB antes']
+        print(f"{nombre:<18} {total['KB antes']:>10.1f} {total['KB después']:>11.1f} {reduccion:>10.0%}")
+        if args.detalle:
+            print(reporte.to_string(index=False))
+            print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Compara `series.apply(normalize_text)` con `normalize_series` a distintos tamaños.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_normalize_text --filas 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.text import normalize_series, normalize_text
+
+ARCHIVO_MAESTRO = 'mis_datos_maestros_final_v1.csv'
+COLUMNAS = ['Responsable Guía de Caza', 'Ciudad, Estado o Provincia']
+
+
+def _serie_sintetica(valores, n_filas, seed=0):
+    """Remuestrea los valores reales de la columna hasta llegar a n_filas."""
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.choice(valores, size=n_filas, replace=True), dtype=object)
+
+
+def _medir(func, serie):
+    inicio = time.perf_counter()
+    resultado = func(serie)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    df = pd.read_csv(ARCHIVO_MAESTRO, usecols=COLUMNAS)
+    print(f"{'columna':<30} {'filas':>10} {'distintos':>10} {'apply (s)':>10} {'batch (s)':>10} {'speedup':>8}")
+    for col in COLUMNAS:
+        valores = df[col].to_numpy(dtype=object)
+        for n in args.filas:
+            serie = _serie_sintetica(valores, n)
+            t_apply, esperado = _medir(lambda s: s.apply(normalize_text), serie)
+            t_batch, obtenido = _medir(normalize_series, serie)
+            assert esperado.equals(obtenido), f"Resultados distintos para '{col}' con {n} filas"
+            print(f"{col[:30]:<30} {n:>10} {serie.nunique():>10} {t_apply:>10.3f} {t_batch:>10.3f} "
+                  f"{t_apply / t_batch:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
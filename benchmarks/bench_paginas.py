@@ -0,0 +1,247 @@
+"""
+Latencia de punta a punta de cada página, ejecutada sin navegador con AppTest.
+
+Por página mide:
+- corrida en frío (cachés de datos vacías) y reruns en caliente;
+- primera corrida después del precalentamiento de cachés (utils/precalentamiento.py);
+- tiempo hasta el primer elemento (primer delta que la página envía al navegador);
+- cada interacción de widget (filtros, rango de fechas, preparar exportación).
+
+Con --sesiones corre N sesiones concurrentes (una AppTest por hilo, todas reruns en
+caliente) y reporta throughput y latencias p50/p95 para ver dónde se satura una instancia.
+
+El geocodificador de los mapas (y del precalentamiento) corre con GEOCODER_URL vacío:
+solo se lee el store local, para que los tiempos no dependan de Nominatim.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_paginas --reruns 5 --sesiones 1 2 4 8
+"""
+import argparse
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+from benchmarks.bench_pipeline import DIRECTORIO_RESULTADOS, commit_actual
+from utils import geocodificador, precalentamiento
+
+TIMEOUT_CORRIDA = 300
+# Página liviana cuya primera corrida lanza el precalentamiento en el escenario 'precalentada'
+PAGINA_LANZADORA = 'pages/Consola_SQL.py'
+
+
+def _filtrar_primer_acm(at):
+    filtro = at.sidebar.multiselect(key='filtro_ACM-(Área de caza mayor)')
+    filtro.select(filtro.options[0])
+
+
+def _acotar_fechas(at):
+    filtro = at.sidebar.date_input(key='filtro_fechas')
+    desde, hasta = filtro.value
+    filtro.set_value((desde, desde + (hasta - desde) / 2))
+
+
+def _preparar_exportacion(clave):
+    def interaccion(at):
+        at.button(key=f'exportar_{clave}_preparar').click()
+    return interaccion
+
+
+# Página -> interacciones (nombre -> función que modifica los widgets de la AppTest)
+PAGINAS = {
+    'Permiso_Caza.py': {
+        'filtro_acm': _filtrar_primer_acm,
+        'rango_fechas': _acotar_fechas,
+        'preparar_exportacion': _preparar_exportacion('acms_unicos'),
+    },
+    'pages/Guia_Traslado.py': {
+        'preparar_exportacion': _preparar_exportacion('guias_por_acm'),
+    },
+    'pages/Análisis_Establecimientos.py': {
+        'preparar_exportacion': _preparar_exportacion('datos_establecimientos'),
+    },
+    'pages/Cruces_por_ACM.py': {
+        'preparar_exportacion': _preparar_exportacion('permisos_guias_acm'),
+    },
+}
+
+_corrida_actual = threading.local()
+
+
+def _registrar_primer_elemento(init_original):
+    """
+    Envuelve LocalScriptRunner.__init__ para anotar cuándo se encola el primer delta
+    (primer elemento visible) de cada corrida. AppTest crea el runner en el hilo que
+    llama a run(), así que se guarda en un threading.local de ese hilo.
+    """
+    @functools.wraps(init_original)
+    def init(self, *args, **kwargs):
+        init_original(self, *args, **kwargs)
+        corrida = {'primer_elemento': None}
+        _corrida_actual.datos = corrida
+        encolar = self.forward_msg_queue.enqueue
+
+        def encolar_con_marca(msg):
+            if corrida['primer_elemento'] is None and msg.HasField('delta'):
+                corrida['primer_elemento'] = time.perf_counter()
+            return encolar(msg)
+        self.forward_msg_queue.enqueue = encolar_con_marca
+    return init
+
+
+def _runtime_compartido():
+    """
+    Runtime simulado único para todas las corridas. AppTest instala uno propio al empezar
+    cada corrida y lo borra al terminar, lo que rompe a las demás sesiones si corren en
+    paralelo; con Runtime.instance()/exists() fijos todas ven el mismo.
+    """
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    return runtime
+
+
+def _correr(at):
+    """Corre la AppTest y devuelve (segundos, segundos hasta el primer elemento, excepciones)."""
+    inicio = time.perf_counter()
+    at.run(timeout=TIMEOUT_CORRIDA)
+    fin = time.perf_counter()
+    primer = _corrida_actual.datos['primer_elemento']
+    return fin - inicio, (primer - inicio) if primer is not None else None, [e.value for e in at.exception]
+
+
+def _resultado(pagina, escenario, segundos, primer_elemento, errores, sesiones=1):
+    return {
+        'pagina': pagina, 'escenario': escenario, 'sesiones': sesiones,
+        'segundos': round(segundos, 4),
+        'primer_elemento': round(primer_elemento, 4) if primer_elemento is not None else None,
+        'errores': errores,
+    }
+
+
+def medir_pagina(pagina, interacciones, reruns):
+    """Corrida en frío, reruns en caliente y cada interacción (sobre una sesión recién cargada)."""
+    resultados = []
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(pagina, default_timeout=TIMEOUT_CORRIDA)
+    resultados.append(_resultado(pagina, 'frio', *_correr(at)))
+    for _ in range(reruns):
+        resultados.append(_resultado(pagina, 'rerun', *_correr(at)))
+    for nombre, interaccion in interacciones.items():
+        at = AppTest.from_file(pagina, default_timeout=TIMEOUT_CORRIDA)
+        _correr(at)
+        interaccion(at)
+        resultados.append(_resultado(pagina, f'interaccion:{nombre}', *_correr(at)))
+
+    # Primera visita a la página después de un deploy, con el precalentamiento (lanzado por
+    # otra página) ya terminado
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    # (el estado se consulta desde una corrida: fuera de ella st.cache_resource no devuelve el guardado)
+    lanzadora = AppTest.from_file(PAGINA_LANZADORA, default_timeout=TIMEOUT_CORRIDA)
+    lanzadora.run(timeout=TIMEOUT_CORRIDA)
+    while any(aviso.value.startswith(precalentamiento.AVISO_PENDIENTE) for aviso in lanzadora.sidebar.caption):
+        time.sleep(0.1)
+        lanzadora.run(timeout=TIMEOUT_CORRIDA)
+    at = AppTest.from_file(pagina, default_timeout=TIMEOUT_CORRIDA)
+    resultados.append(_resultado(pagina, 'precalentada', *_correr(at)))
+    return resultados
+
+
+def medir_concurrencia(pagina, n_sesiones, reruns):
+    """
+    N sesiones en hilos, cada una con su AppTest, haciendo 'reruns' corridas en caliente.
+    Devuelve las corridas individuales y un resumen con throughput y percentiles.
+    """
+    barrera = threading.Barrier(n_sesiones)
+    corridas = []
+    lock = threading.Lock()
+
+    def sesion():
+        at = AppTest.from_file(pagina, default_timeout=TIMEOUT_CORRIDA)
+        barrera.wait()
+        for _ in range(reruns):
+            try:
+                medicion = _correr(at)
+            except Exception as e:  # Una sesión que falla no debe detener a las demás
+                medicion = (float('nan'), None, [f"{type(e).__name__}: {e}"])
+            with lock:
+                corridas.append(_resultado(pagina, 'concurrente', *medicion, sesiones=n_sesiones))
+
+    hilos = [threading.Thread(target=sesion) for _ in range(n_sesiones)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = time.perf_counter() - inicio
+
+    latencias = np.array([c['segundos'] for c in corridas if not c['errores']])
+    resumen = {
+        'pagina': pagina, 'sesiones': n_sesiones, 'corridas': len(corridas),
+        'errores': sum(1 for c in corridas if c['errores']),
+        'corridas_por_segundo': round(len(latencias) / total, 3),
+        'p50': round(float(np.percentile(latencias, 50)), 4) if latencias.size else None,
+        'p95': round(float(np.percentile(latencias, 95)), 4) if latencias.size else None,
+    }
+    return corridas, resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paginas', nargs='+', default=list(PAGINAS), choices=list(PAGINAS))
+    parser.add_argument('--reruns', type=int, default=5, help="Reruns en caliente por página y por sesión")
+    parser.add_argument('--sesiones', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Cantidades de sesiones concurrentes a simular")
+    parser.add_argument('--salida', help="Archivo JSON de resultados (por defecto en benchmarks/resultados/)")
+    args = parser.parse_args()
+
+    runtime = _runtime_compartido()
+    resultados, resumenes = [], []
+    with mock.patch.object(geocodificador, 'GEOCODER_URL', ''), \
+            mock.patch.object(LocalScriptRunner, '__init__', _registrar_primer_elemento(LocalScriptRunner.__init__)), \
+            mock.patch.object(Runtime, 'instance', classmethod(lambda cls: runtime)), \
+            mock.patch.object(Runtime, 'exists', classmethod(lambda cls: True)):
+        for pagina in args.paginas:
+            for r in medir_pagina(pagina, PAGINAS[pagina], args.reruns):
+                resultados.append(r)
+                print(f"{pagina:<36} {r['escenario']:<34} {r['segundos']:>8.3f} s "
+                      f"(primer elemento {r['primer_elemento'] or float('nan'):.3f} s) {'; '.join(r['errores'])}")
+            for n in args.sesiones:
+                corridas, resumen = medir_concurrencia(pagina, n, args.reruns)
+                resultados.extend(corridas)
+                resumenes.append(resumen)
+                print(f"{pagina:<36} {n:>3} sesiones: {resumen['corridas_por_segundo']:>7.2f} corridas/s, "
+                      f"p50 {resumen['p50']} s, p95 {resumen['p95']} s, errores {resumen['errores']}")
+
+    commit = commit_actual()
+    salida = args.salida or os.path.join(DIRECTORIO_RESULTADOS, f"paginas_{commit or 'sin_commit'}.json")
+    os.makedirs(os.path.dirname(salida) or '.', exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+            'streamlit': st.__version__,
+            'pandas': pd.__version__,
+            'resultados': resultados,
+            'concurrencia': resumenes,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {salida}")
+
+
+if __name__ == '__main__':
+    main()
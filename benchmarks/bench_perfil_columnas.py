@@ -0,0 +1,59 @@
+"""
+Perfilado de columnas de la planilla de establecimientos (utils/perfil_columnas.py) contra
+el bucle anterior de la página, que hacía varias pasadas por columna sobre el DataFrame.
+
+Las filas se generan remuestreando la planilla real (ver benchmarks/datos_sinteticos.py)
+y se leen con el esquema 'establecimientos', como en la página.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_perfil_columnas --filas 1000 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.datos_sinteticos import escribir_csv
+from utils.perfil_columnas import MAX_VALORES_CATEGORICA, UMBRAL_NUMERICO, perfilar
+from utils.schemas import leer_csv_tipado, obtener_esquema
+
+ARCHIVO_ESTABLECIMIENTOS = 'planilla-de-inscripción-de-establecimiento-particulares-2025-07-01.csv'
+
+
+def _bucle_anterior(df, columnas):
+    """Las pasadas que hacía la página por cada columna (copia, to_numeric, nunique, normalización, conteo)."""
+    df = df.copy()
+    for col in columnas:
+        temp = pd.to_numeric(df[col].copy(), errors='coerce')
+        if temp.count() / len(df) > UMBRAL_NUMERICO:
+            continue
+        if df[col].dtype in ('object', 'category', 'string') or df[col].nunique() < MAX_VALORES_CATEGORICA:
+            df[col] = df[col].astype(str).str.title().str.strip()
+            df[col].value_counts().reset_index(name='Cantidad').sort_values(by='Cantidad', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    esquema = obtener_esquema('establecimientos')
+    print(f"{'filas':>10} {'anterior (s)':>13} {'perfilador (s)':>15}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.filas:
+            ruta = escribir_csv(ARCHIVO_ESTABLECIMIENTOS, os.path.join(directorio, 'establecimientos.csv'), n)
+            df = leer_csv_tipado(ruta, esquema)
+            columnas = [c for c in df.columns if 'FECHA' not in c.upper()]
+            inicio = time.perf_counter()
+            _bucle_anterior(df, columnas)
+            anterior = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            perfilar(df, columnas)
+            nuevo = time.perf_counter() - inicio
+            print(f"{n:>10} {anterior:>13.3f} {nuevo:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
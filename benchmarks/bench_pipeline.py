@@ -0,0 +1,188 @@
+"""
+Tiempo de cada etapa del pipeline de Permiso_Caza.py (y de la página de guías) con datos
+sintéticos de distintos tamaños (ver benchmarks/datos_sinteticos.py).
+
+Etapas: carga, parseo de fechas, exclusiones, normalización, resolución de guías,
+columnas derivadas, cubo, cada agregación, índices y filtro cruzado, ventana de fechas
+(máscara contra el orden por fecha), cada exportación y carga/conteo de guías de traslado.
+
+El resultado se guarda en JSON (commit, versiones y una fila por tamaño y etapa) para
+comparar corridas entre commits con --comparar.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_pipeline --filas 10000 100000 1000000 5000000
+    python -m benchmarks.bench_pipeline --filas 100000 --comparar benchmarks/resultados/pipeline_<commit>.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datos_sinteticos import ARCHIVO_GUIAS, ARCHIVO_PERMISOS, escribir_csv
+from utils.entity_resolution import resolver_nombres
+from utils.exclusion_rules import aplicar_reglas, cargar_reglas
+from utils.export import FORMATOS_EXPORTACION, _escribir_streaming
+from utils.filter_index import (construir_indice_columna, construir_indice_fechas, filtrar, orden_por_fecha,
+                                ventana_fechas)
+from utils.rollup import COLUMNA_SEMANA, construir_cubo, contar_por
+from utils.schemas import leer_csv_tipado, obtener_esquema, parsear_fechas
+
+DIRECTORIO_RESULTADOS = 'benchmarks/resultados'
+RUTA_REGLAS_EXCLUSION = 'config/reglas_exclusion.toml'
+
+COLUMNA_ACM = 'ACM-(Área de caza mayor)'
+COLUMNA_GUIA = 'Responsable Guía de Caza'
+COLUMNA_CATEGORIA = 'Categoria '
+COLUMNA_FECHA_EMISION = 'Fecha '
+COLUMNA_PAIS = 'País'
+COLUMNA_TIPO_CAZA = 'Tipo de caza'
+
+# Cortes del cubo que hace la página: nombre -> (columnas, filtro)
+AGREGACIONES = {
+    'pais': ([COLUMNA_PAIS], None),
+    'categoria': ([COLUMNA_CATEGORIA], None),
+    'mes': (['Anio', 'Mes_Numero'], None),
+    'semana': (['Anio', 'Mes_Numero', COLUMNA_SEMANA], None),
+}
+COLUMNAS_FILTRO = [COLUMNA_ACM, COLUMNA_CATEGORIA, COLUMNA_PAIS, COLUMNA_TIPO_CAZA]
+
+
+class _Medidor:
+    """Acumula el tiempo de cada etapa para un tamaño de datos."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.resultados = []
+
+    def medir(self, etapa, func, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = func(*args, **kwargs)
+        segundos = time.perf_counter() - inicio
+        self.resultados.append({'filas': self.filas, 'etapa': etapa, 'segundos': round(segundos, 4)})
+        print(f"{self.filas:>10} {etapa:<30} {segundos:>9.3f} s")
+        return resultado
+
+
+def _columnas_fecha(df):
+    df['Mes_Numero'] = df[COLUMNA_FECHA_EMISION].dt.month
+    df['Anio'] = df[COLUMNA_FECHA_EMISION].dt.year
+    return df
+
+
+def _exportar(df, formato):
+    with tempfile.TemporaryFile() as archivo:
+        _escribir_streaming(df, formato, archivo)
+        return archivo.seek(0, os.SEEK_END)
+
+
+def correr_permisos(medidor, ruta, max_filas_xlsx):
+    esquema = obtener_esquema('permisos')
+    df = medidor.medir('carga', leer_csv_tipado, ruta, esquema, con_fechas=False)
+    df = medidor.medir('parseo_fechas', parsear_fechas, df, esquema)
+    reglas = cargar_reglas(RUTA_REGLAS_EXCLUSION)
+    df, _, _ = medidor.medir('exclusiones', aplicar_reglas, df, reglas, medir_memoria=False)
+    medidor.medir('normalizacion_pais', lambda: df[COLUMNA_PAIS].astype(str).str.title())
+    medidor.medir('entidades_guias', resolver_nombres, df[COLUMNA_GUIA])
+    df = medidor.medir('columnas_fecha', _columnas_fecha, df)
+
+    cubo = medidor.medir('cubo', construir_cubo, df)
+    for nombre, (columnas, filtro) in AGREGACIONES.items():
+        medidor.medir(f'agregacion_{nombre}', contar_por, cubo, columnas, filtro(cubo) if filtro else None)
+
+    def _indices():
+        return {
+            'columnas': {col: construir_indice_columna(df[col]) for col in COLUMNAS_FILTRO},
+            'fechas': construir_indice_fechas(df[COLUMNA_FECHA_EMISION]),
+            'filas': len(df),
+        }
+    indices = medidor.medir('indices_filtros', _indices)
+    # Filtro cruzado típico: el ACM y la categoría más frecuentes
+    selecciones = {col: [df[col].mode().iloc[0]] for col in (COLUMNA_ACM, COLUMNA_CATEGORIA)}
+    medidor.medir('filtro_cruzado', filtrar, indices, selecciones)
+    # Ventana de los últimos 30 días: máscara sobre todas las filas contra corte del orden por fecha
+    hasta = df[COLUMNA_FECHA_EMISION].max()
+    desde = hasta - pd.Timedelta(days=29)
+    medidor.medir('ventana_fechas_mascara', lambda: np.flatnonzero(
+        (df[COLUMNA_FECHA_EMISION] >= desde) & (df[COLUMNA_FECHA_EMISION] < hasta + pd.Timedelta(days=1))))
+    orden, fechas_en_orden = orden_por_fecha(indices['fechas'])
+    medidor.medir('ventana_fechas_indice', ventana_fechas, orden, fechas_en_orden, desde, hasta)
+
+    for formato in FORMATOS_EXPORTACION:
+        if formato == 'xlsx' and len(df) > max_filas_xlsx:
+            print(f"{medidor.filas:>10} {'exportacion_xlsx':<30} {'omitida':>11}")
+            continue
+        medidor.medir(f'exportacion_{formato}', _exportar, df, formato)
+
+
+def correr_guias(medidor, ruta):
+    df = medidor.medir('guias_carga', leer_csv_tipado, ruta, obtener_esquema('guias_traslado'))
+    medidor.medir('guias_conteo_acm', lambda: df[COLUMNA_ACM].astype(str).str.title().str.strip().value_counts())
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultados, ruta_base):
+    """Imprime, por tamaño y etapa, el tiempo de esta corrida contra el de 'ruta_base'."""
+    with open(ruta_base, encoding='utf-8') as f:
+        base = json.load(f)
+    anterior = pd.DataFrame(base['resultados']).set_index(['filas', 'etapa'])['segundos']
+    actual = pd.DataFrame(resultados).set_index(['filas', 'etapa'])['segundos']
+    tabla = pd.DataFrame({'base (s)': anterior, 'actual (s)': actual}).dropna()
+    tabla['relación'] = (tabla['actual (s)'] / tabla['base (s)']).round(2)
+    print(f"\nComparación contra {ruta_base} (commit {base.get('commit')}):")
+    print(tabla.to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--max-filas-xlsx', type=int, default=1_000_000,
+                        help="Por encima de este tamaño no se mide la exportación a Excel")
+    parser.add_argument('--salida', help="Archivo JSON de resultados (por defecto en benchmarks/resultados/)")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para comparar")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    commit = commit_actual()
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.filas:
+            medidor = _Medidor(n)
+            ruta_permisos = escribir_csv(ARCHIVO_PERMISOS, os.path.join(directorio, 'permisos.csv'), n, args.seed)
+            correr_permisos(medidor, ruta_permisos, args.max_filas_xlsx)
+            ruta_guias = escribir_csv(ARCHIVO_GUIAS, os.path.join(directorio, 'guias.csv'), n, args.seed)
+            correr_guias(medidor, ruta_guias)
+            resultados.extend(medidor.resultados)
+
+    salida = args.salida or os.path.join(DIRECTORIO_RESULTADOS, f"pipeline_{commit or 'sin_commit'}.json")
+    os.makedirs(os.path.dirname(salida) or '.', exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'resultados': resultados,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {salida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
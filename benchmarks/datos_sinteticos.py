@@ -0,0 +1,100 @@
+"""
+Genera datos sintéticos con las mismas columnas y distribuciones que los CSV reales:
+- mis_datos_maestros_final_v1.csv (permisos)
+- guia_traslado_2.csv (guías de traslado)
+
+Las columnas categóricas y las fechas se remuestrean con las frecuencias observadas
+(incluida la proporción de nulos y de valores inválidos); los identificadores son
+únicos y los nombres y documentos se arman a partir de partes reales.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.datos_sinteticos --filas 1000000 --salida /tmp/sinteticos
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ARCHIVO_PERMISOS = 'mis_datos_maestros_final_v1.csv'
+ARCHIVO_GUIAS = 'guia_traslado_2.csv'
+
+TAMANO_BLOQUE = 500_000
+
+COLUMNA_ID = 'ID único'
+COLUMNAS_NOMBRE = ('Nombre y Apellido',)
+COLUMNAS_DOCUMENTO = ('DNI o Pasaporte', 'WhatsApp')
+
+
+def _remuestrear(serie, n_filas, rng):
+    """Valores con la misma distribución empírica que 'serie' (los nulos cuentan como un valor más)."""
+    frecuencias = serie.value_counts(dropna=False, normalize=True)
+    codigos = rng.choice(len(frecuencias), size=n_filas, p=frecuencias.to_numpy())
+    return pd.Series(frecuencias.index.to_numpy(dtype=object)[codigos], dtype=object)
+
+
+def _nombres(serie, n_filas, rng):
+    """Nombres de 2 o 3 palabras tomadas de los nombres reales."""
+    palabras = serie.dropna().astype(str).str.split().explode().str.strip()
+    palabras = palabras[palabras != ''].to_numpy(dtype=object)
+    partes = rng.choice(palabras, size=(n_filas, 3))
+    tres = rng.random(n_filas) < 0.3
+    return pd.Series(np.where(tres, partes[:, 0] + ' ' + partes[:, 1] + ' ' + partes[:, 2],
+                              partes[:, 0] + ' ' + partes[:, 1]), dtype=object)
+
+
+def _documentos(serie, n_filas, rng):
+    """Números con la misma cantidad de dígitos que los reales."""
+    largos = _remuestrear(serie.dropna().astype(str).str.len(), n_filas, rng).to_numpy(dtype=np.int64)
+    largos = np.clip(largos, 1, 18)
+    return pd.Series(rng.integers(10 ** (largos - 1), 10 ** largos).astype(str), dtype=object)
+
+
+def generar(ruta_base, n_filas, seed=0, primer_id=0):
+    """
+    DataFrame sintético de 'n_filas' con las columnas (en el mismo orden) del CSV 'ruta_base'.
+    Todas las columnas se generan como texto, igual que se leen del CSV.
+    """
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(ruta_base, dtype=str)
+    datos = {}
+    for columna in base.columns:
+        if columna == COLUMNA_ID:
+            ids = np.arange(primer_id, primer_id + n_filas).astype(str)
+            datos[columna] = pd.Series(np.char.add('SYN', ids), dtype=object)
+        elif columna in COLUMNAS_NOMBRE:
+            datos[columna] = _nombres(base[columna], n_filas, rng)
+        elif columna in COLUMNAS_DOCUMENTO:
+            datos[columna] = _documentos(base[columna], n_filas, rng)
+        else:
+            datos[columna] = _remuestrear(base[columna], n_filas, rng)
+    return pd.DataFrame(datos)
+
+
+def escribir_csv(ruta_base, ruta, n_filas, seed=0, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Escribe un CSV sintético de 'n_filas' con el formato de 'ruta_base' (sin índice).
+    Se genera por bloques para no tener millones de filas de texto en memoria a la vez.
+    """
+    for numero, inicio in enumerate(range(0, n_filas, tamano_bloque)):
+        bloque = generar(ruta_base, min(tamano_bloque, n_filas - inicio), seed + numero, primer_id=inicio)
+        bloque.to_csv(ruta, index=False, mode='w' if numero == 0 else 'a', header=numero == 0)
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--salida', default='.', help="Directorio donde escribir los CSV")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.salida, exist_ok=True)
+    for ruta_base in (ARCHIVO_PERMISOS, ARCHIVO_GUIAS):
+        ruta = os.path.join(args.salida, f"sintetico_{args.filas}_{os.path.basename(ruta_base)}")
+        escribir_csv(ruta_base, ruta, args.filas, args.seed)
+        print(f"{ruta}: {args.filas} filas")
+
+
+if __name__ == '__main__':
+    main()
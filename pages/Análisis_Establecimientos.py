@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from io import BytesIO, StringIO  # Import StringIO for text output
+import numpy as np
+from io import StringIO  # Import StringIO for text output
 import locale  # Si necesitas manejar formatos de fecha/hora específicos del idioma
+from utils.data_loader import cargar_datos, mostrar_estadisticas_cache, version_datos
+from utils.coordenadas import cerca_de, construir_grilla, indice_coordenadas, mas_cercanos
+from utils.export import boton_exportar
+from utils.figuras import grafico
+from utils.multi_hot import coocurrencia, conteos, filas_con, indice_multi_hot
+from utils.perfil_columnas import TIPO_NUMERICA, TIPO_CATEGORICA, perfiles_columnas
+from utils.tablas import tabla_paginada
+from utils.precalentamiento import iniciar_precalentamiento, mostrar_precalentamiento
+from utils.instrumentacion import finalizar_medicion, iniciar_medicion, seccion
 
 # --- Configuración de la página ---
 # Esto define cómo aparecerá la página en la barra lateral de Streamlit
@@ -14,40 +23,15 @@ st.set_page_config(
 )
 
 
-# --- Función para cargar datos (reutilizada de tus otras páginas) ---
-def cargar_datos(ruta_archivo):
-    """
-    Carga datos desde un archivo CSV.
-    """
-    try:
-        df = pd.read_csv(ruta_archivo)
-        return df
-    except FileNotFoundError:
-        st.error(
-            f"Error: El archivo '{ruta_archivo}' no fue encontrado. Asegúrate de que la ruta y el nombre sean correctos.")
-        return None
-    except Exception as e:
-        st.error(f"Ocurrió un error al cargar el CSV: {e}. Por favor, verifica el formato del archivo.")
-        return None
-
-
-# --- Función para crear botón de descarga a Excel (reutilizada) ---
-def to_excel(df):
-    """
-    Convierte un DataFrame a formato Excel (BytesIO) para descarga.
-    """
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Sheet1')
-    writer.close()
-    processed_data = output.getvalue()
-    return processed_data
-
-
 # --- Nombre de tu tercer archivo CSV ---
 nombre_tercer_csv = 'planilla-de-inscripción-de-establecimiento-particulares-2025-07-01.csv'
 
-df_tercero = cargar_datos(nombre_tercer_csv)
+# Precalienta en segundo plano las cachés de los tres datasets (una vez por proceso)
+mostrar_precalentamiento(iniciar_precalentamiento())
+iniciar_medicion('Análisis_Establecimientos')
+seccion('Carga de datos')
+df_tercero = cargar_datos(nombre_tercer_csv, esquema='establecimientos')
+mostrar_estadisticas_cache(nombre_tercer_csv)
 
 if df_tercero is not None:
     # --- SECCIONES ELIMINADAS SEGÚN TU SOLICITUD ---
@@ -68,14 +52,35 @@ if df_tercero is not None:
     # --- CONSTANTES DE NOMBRES DE COLUMNAS ESPECÍFICAS ---
     COLUMNA_INSCRIPCION_CRIADERO = 'Su establecimiento está inscripto y habilitado como criadero de fauna silvestre'
     COLUMNA_CIERVOS_CAMPO = 'Dentro de su campo los ciervos: (marque lo que corresponde).'
+    COLUMNA_MANEJO_CIERVOS = 'Dentro de su campo o realiza algún tipo de manejo o aprovechamiento de los ciervos colorados. '
     COLUMNA_CIERVOS_CINCO_ANOS = 'En los últimos cinco años, el número de ciervos en su campo'
     COLUMNA_JABALI_TRES_ANOS = 'En los últimos tres años, la población de jabalí europeo:'
     COLUMNA_PUMAS_TRES_ANOS = 'En los últimos tres años, la población de pumas'
     COLUMNA_GUANACOS_VIVEN = 'En su establecimiento viven poblaciones de guanacos?'
     COLUMNA_ESPECIES_CAZA_MAYOR = 'Marque el casillero de la especies para las que solicita la práctica de caza. mayor.  Estas especies son exclusivamente para caza en establecimientos debidamente inscriptos como Criaderos de Fauna Silvestre y habilitados como Áreas de Caza Mayor.'
     COLUMNA_PORCENTAJE_CIERVOS_CAMPO = 'De las superficies total del establecimiento, qué porcentaje estima Ud. Que es utilizado por los ciervos'
+    COLUMNA_COORDENADAS = 'Coordenada Geográfica ( punto de referencia centro del campo) Latitud y Longitud.'
+    COLUMNAS_DATOS_ESTABLECIMIENTO = ['Nombre del establecimiento', 'Ubicación del ACM',
+                                      'Departamento donde se ubica el establecimiento']
+
+    version_establecimientos = version_datos(nombre_tercer_csv, 'establecimientos')
+    # Índice multi-hot de las especies marcadas, una vez por versión de datos. Se arma antes de que
+    # las secciones de abajo descarten filas de df_tercero: sus posiciones son las del archivo cargado
+    # (que siguen siendo el índice de df_tercero).
+    indice_especies = None
+    if COLUMNA_ESPECIES_CAZA_MAYOR in df_tercero.columns:
+        indice_especies = indice_multi_hot(df_tercero[COLUMNA_ESPECIES_CAZA_MAYOR],
+                                           version_establecimientos + (COLUMNA_ESPECIES_CAZA_MAYOR,))
+    # Coordenadas parseadas (texto libre, decimal o grados/minutos/segundos) y grilla espacial,
+    # también una vez por versión de datos. La columna es opcional en la planilla (ver 'coordenadas'
+    # en config/esquemas.toml).
+    indice_ubicaciones = None
+    if COLUMNA_COORDENADAS in df_tercero.columns:
+        indice_ubicaciones = indice_coordenadas(df_tercero[COLUMNA_COORDENADAS],
+                                                version_establecimientos + (COLUMNA_COORDENADAS,))
 
     # --- ANÁLISIS AUTOMÁTICO DE COLUMNAS ---
+    seccion('Gráficos automáticos por columna', filas=len(df_tercero))
     st.header("📊 Gráficos por Columnas (Generados Automáticamente)")
 
     # Lista de columnas a EXCLUIR del análisis automático de gráficos
@@ -83,7 +88,7 @@ if df_tercero is not None:
     columns_to_exclude_from_auto_charts = [
         'Nombre del establecimiento',
         'Ubicación del ACM',
-        'Coordenada Geográfica ( punto de referencia centro del campo) Latitud y Longitud.',  # Excluida
+        COLUMNA_COORDENADAS,  # Tiene su propia sección (mapa y búsquedas por distancia)
         # Excluida
         'En los últimos 3 años, la población de guanacos',
         'Planilla completada por...',
@@ -96,52 +101,134 @@ if df_tercero is not None:
         COLUMNA_PORCENTAJE_CIERVOS_CAMPO  # Excluida
     ]
 
+    # Excluir columnas de ID que no suelen ser útiles para gráficos de distribución
+    # y las columnas solicitadas para exclusión
+    columnas_auto = tuple(col for col in df_tercero.columns
+                          if not ('ID' in col.upper() or 'FECHA' in col.upper()
+                                  or col in columns_to_exclude_from_auto_charts))
+    # Todas las columnas se clasifican y resumen juntas (en paralelo) y el resultado se cachea por
+    # versión del archivo y del esquema: los reruns dibujan desde los perfiles ya calculados
+    # (también los que dejó el precalentamiento al iniciar)
+    perfiles = perfiles_columnas(df_tercero, version_establecimientos)
+
     # Iterar sobre las columnas para generar gráficos automáticamente
-    for col in df_tercero.columns:
-        # Excluir columnas de ID que no suelen ser útiles para gráficos de distribución
-        # y las columnas solicitadas para exclusión
-        if 'ID' in col.upper() or 'FECHA' in col.upper() or col in columns_to_exclude_from_auto_charts:
-            continue
-
-        # Intentar convertir a tipo numérico (float/int)
-        try:
-            temp_series = df_tercero[col].copy()
-            temp_series_numeric = pd.to_numeric(temp_series, errors='coerce')
-            if temp_series_numeric.count() / len(temp_series) > 0.8:
-                st.subheader(f"Distribución de: {col}")
-                fig = px.histogram(df_tercero, x=col, title=f'Distribución de {col}')
-                st.plotly_chart(fig, use_container_width=True, key=f"hist_{col}")
-                st.markdown("---")
-                continue
-        except:
-            pass
+    for col in columnas_auto:
+        perfil = perfiles[col]
+
+        if perfil['tipo'] == TIPO_NUMERICA:
+            st.subheader(f"Distribución de: {col}")
+            # Los intervalos se calculan en el servidor: se envía una barra por intervalo, no cada fila
+            grafico('bar', perfil['histograma'],
+                    key=f"hist_{col}",
+                    x='Centro',
+                    y='Cantidad',
+                    hover_data=['Desde', 'Hasta'],
+                    title=f'Distribución de {col}',
+                    labels={'Centro': col},
+                    ajustes={'update_layout': {'bargap': 0}})
+            st.markdown("---")
 
         # Tratar como categórica si no es numérica y tiene pocos valores únicos
-        if df_tercero[col].dtype == 'object' or df_tercero[col].nunique() < 50:
+        # Las columnas de opción fija llegan como 'category' (ver config/esquemas.toml)
+        elif perfil['tipo'] == TIPO_CATEGORICA:
             st.subheader(f"Conteo por: {col}")
-            df_tercero[col] = df_tercero[col].astype(str).str.title().str.strip()
-
-            counts = df_tercero[col].value_counts().reset_index(name='Cantidad')
-            counts.columns = [col, 'Cantidad']
-            counts = counts.sort_values(by='Cantidad', ascending=False)
+            counts = perfil['conteo']
 
-            if len(counts) < 100:
-                with st.expander(f"Ver detalle de '{col}' (Haz clic para ver todos)"):
-                    st.dataframe(counts, hide_index=True)
+            # Paginada en el servidor: aun con muchos valores distintos solo se envía una página
+            with st.expander(f"Ver detalle de '{col}' (Haz clic para ver todos)"):
+                tabla_paginada(counts, key=f"tabla_{col}")
 
             top_n = min(15, len(counts))
-            fig = px.bar(counts.head(top_n),
-                         x=col,
-                         y='Cantidad',
-                         text='Cantidad',
-                         title=f'Cantidad de Registros por {col} (Top {top_n})',
-                         labels={col: col, 'Cantidad': 'Número de Registros'})
-            fig.update_xaxes(tickangle=45)
-            fig.update_traces(texttemplate='%{text}', textposition='outside')
-            st.plotly_chart(fig, use_container_width=True, key=f"bar_{col}")
+            grafico('bar', counts.head(top_n),
+                    key=f"bar_{col}",
+                    x=col,
+                    y='Cantidad',
+                    text='Cantidad',
+                    title=f'Cantidad de Registros por {col} (Top {top_n})',
+                    labels={col: col, 'Cantidad': 'Número de Registros'},
+                    ajustes={'update_xaxes': {'tickangle': 45},
+                             'update_traces': {'texttemplate': '%{text}', 'textposition': 'outside'}})
             st.markdown("---")
 
+    # --- UBICACIÓN DE LOS ESTABLECIMIENTOS (antes de que las secciones de abajo descarten filas) ---
+    seccion('Ubicación de establecimientos', filas=len(df_tercero))
+    st.header("🗺️ Ubicación de los Establecimientos")
+    if indice_ubicaciones is not None:
+        grilla = indice_ubicaciones['grilla']
+        nombres = df_tercero['Nombre del establecimiento'].astype(str).str.strip().to_numpy()
+        # Los establecimientos habilitados como criadero son las ACMs
+        es_acm = np.zeros(len(df_tercero), dtype=bool)
+        if COLUMNA_INSCRIPCION_CRIADERO in df_tercero.columns:
+            es_acm = (df_tercero[COLUMNA_INSCRIPCION_CRIADERO].astype(str).str.title().str.strip() == 'Si').to_numpy()
+        posiciones_ubicadas = np.sort(grilla['posiciones'])
+        ubicados = pd.DataFrame({
+            'Establecimiento': nombres[posiciones_ubicadas],
+            'ACM (criadero habilitado)': np.where(es_acm[posiciones_ubicadas], 'Si', 'No'),
+            'Latitud': grilla['latitudes'][posiciones_ubicadas],
+            'Longitud': grilla['longitudes'][posiciones_ubicadas],
+        })
+        st.info(f"**{len(ubicados)}** de {len(df_tercero)} establecimientos tienen coordenadas válidas.")
+
+        if not ubicados.empty:
+            grafico('scatter_mapbox', ubicados,
+                    key="mapa_establecimientos",
+                    lat='Latitud',
+                    lon='Longitud',
+                    color='ACM (criadero habilitado)',
+                    hover_name='Establecimiento',
+                    hover_data={'Latitud': ':.4f', 'Longitud': ':.4f'},
+                    zoom=5,
+                    height=600,
+                    title='Ubicación de los Establecimientos',
+                    mapbox_style='open-street-map')
+
+            # Las búsquedas por distancia solo recorren las celdas de la grilla que tocan el radio
+            st.markdown("##### Establecimientos Cercanos")
+            col_referencia, col_radio = st.columns([0.7, 0.3])
+            referencia = col_referencia.selectbox("Establecimiento de referencia", posiciones_ubicadas,
+                                                  format_func=lambda posicion: nombres[posicion],
+                                                  key="establecimiento_referencia")
+            radio_km = col_radio.number_input("Radio (km)", min_value=1, max_value=1000, value=25, step=5,
+                                              key="radio_establecimientos")
+            cercanos, distancias = cerca_de(grilla, grilla['latitudes'][referencia],
+                                            grilla['longitudes'][referencia], radio_km)
+            otros = cercanos != referencia
+            st.info(f"**{int(otros.sum())}** establecimientos a menos de {radio_km} km de {nombres[referencia]}.")
+            if otros.any():
+                tabla_paginada(pd.DataFrame({
+                    'Establecimiento': nombres[cercanos[otros]],
+                    'ACM (criadero habilitado)': np.where(es_acm[cercanos[otros]], 'Si', 'No'),
+                    'Distancia (km)': distancias[otros].round(1),
+                }), key="tabla_establecimientos_cercanos")
+
+            st.markdown("##### ACM Más Cercana a Cada Establecimiento")
+            grilla_acm = construir_grilla(grilla['latitudes'], grilla['longitudes'],
+                                          posiciones=posiciones_ubicadas[es_acm[posiciones_ubicadas]])
+            if len(grilla_acm['posiciones']):
+                acm_cercana, distancia_acm = mas_cercanos(grilla_acm, posiciones_ubicadas)
+                tabla_acm = pd.DataFrame({
+                    'Establecimiento': nombres[posiciones_ubicadas],
+                    'ACM más cercana': np.where(acm_cercana >= 0, nombres[np.maximum(acm_cercana, 0)], ''),
+                    'Distancia (km)': distancia_acm.round(1),
+                }).sort_values(by='Distancia (km)', kind='stable').reset_index(drop=True)
+                tabla_paginada(tabla_acm, key="tabla_acm_cercana")
+                boton_exportar(
+                    tabla_acm,
+                    label="⬇️ Exportar ACM más cercana",
+                    file_name=f'acm_cercana_{nombre_tercer_csv.replace(".csv", "")}',
+                    key="acm_cercana"
+                )
+            else:
+                st.info("Ningún establecimiento con coordenadas está habilitado como criadero (ACM).")
+        else:
+            st.warning(f"No se pudieron interpretar las coordenadas de '{COLUMNA_COORDENADAS}'.")
+    else:
+        st.info(f"La planilla no incluye la columna '{COLUMNA_COORDENADAS}': no se pueden ubicar los "
+                f"establecimientos en el mapa.")
+    st.markdown("---")
+
     # --- SECCIÓN DE ANÁLISIS DE FECHAS (si existe una columna de fecha) ---
+    seccion('Tendencia temporal', filas=len(df_tercero))
     date_cols = [col for col in df_tercero.columns if 'FECHA' in col.upper()]
 
     if date_cols:
@@ -158,13 +245,14 @@ if df_tercero is not None:
                     tendencia = tendencia.sort_values(by='Anio_Mes')
 
                     st.subheader(f"Tendencia de Registros por Mes y Año ({date_col})")
-                    fig_tendencia = px.line(tendencia,
-                                            x='Anio_Mes',
-                                            y='Cantidad de Registros',
-                                            title=f'Cantidad de Registros a lo Largo del Tiempo ({date_col})',
-                                            labels={'Anio_Mes': 'Año-Mes',
-                                                    'Cantidad de Registros': 'Número de Registros'})
-                    st.plotly_chart(fig_tendencia, use_container_width=True, key=f"line_{date_col}")
+                    # Con muchos puntos la línea se reduce y pasa a WebGL (ver utils/figuras.py)
+                    grafico('line', tendencia,
+                            key=f"line_{date_col}",
+                            x='Anio_Mes',
+                            y='Cantidad de Registros',
+                            title=f'Cantidad de Registros a lo Largo del Tiempo ({date_col})',
+                            labels={'Anio_Mes': 'Año-Mes',
+                                    'Cantidad de Registros': 'Número de Registros'})
                     st.markdown("---")
                 else:
                     st.info(f"No hay datos válidos en la columna de fecha '{date_col}' para generar la tendencia.")
@@ -175,6 +263,7 @@ if df_tercero is not None:
     st.markdown("---")
 
     # --- GRÁFICOS PERSONALIZADOS (SOLICITADOS ESPECÍFICAMENTE) ---
+    seccion('Gráficos personalizados', filas=len(df_tercero))
 
     # 1. Cantidad de establecimientos y "Su establecimiento está inscripto y habilitado como criadero de fauna silvestre"
     st.header("📈 Inscripción y Habilitación de Criaderos")
@@ -191,15 +280,15 @@ if df_tercero is not None:
             st.dataframe(criadero_counts, hide_index=True)
 
         # Gráfico de Torta con Porcentajes
-        fig_criadero = px.pie(criadero_counts,
-                              names='Estado de Inscripción',
-                              values='Cantidad de Establecimientos',
-                              title='Porcentaje de Establecimientos Inscriptos/Habilitados como Criadero',
-                              hole=0.3,  # Para hacer un donut chart
-                              labels={'Estado de Inscripción': 'Estado de Inscripción',
-                                      'Cantidad de Establecimientos': 'Número de Establecimientos'})
-        fig_criadero.update_traces(textinfo='percent+label')  # Muestra porcentaje y etiqueta
-        st.plotly_chart(fig_criadero, use_container_width=True, key="criadero_inscripcion_chart")
+        grafico('pie', criadero_counts,
+                key="criadero_inscripcion_chart",
+                names='Estado de Inscripción',
+                values='Cantidad de Establecimientos',
+                title='Porcentaje de Establecimientos Inscriptos/Habilitados como Criadero',
+                hole=0.3,  # Para hacer un donut chart
+                labels={'Estado de Inscripción': 'Estado de Inscripción',
+                        'Cantidad de Establecimientos': 'Número de Establecimientos'},
+                ajustes={'update_traces': {'textinfo': 'percent+label'}})  # Muestra porcentaje y etiqueta
     else:
         st.warning(
             f"Columna '{COLUMNA_INSCRIPCION_CRIADERO}' no encontrada. No se puede generar el gráfico de criaderos.")
@@ -207,34 +296,53 @@ if df_tercero is not None:
 
     # 2. Cantidad de establecimiento y "Marque el casillero de la especies para las que solicita la práctica de caza. mayor. Estas especies son exclusivamente para caza en establecimientos debidamente inscriptos como Criaderos de Fauna Silvestre y habilitados como Áreas de Caza Mayor."
     st.header("🦌 Especies Solicitadas para Caza Mayor en Establecimientos")
-    if COLUMNA_ESPECIES_CAZA_MAYOR in df_tercero.columns:
+    if indice_especies is not None:
         df_tercero[COLUMNA_ESPECIES_CAZA_MAYOR] = df_tercero[COLUMNA_ESPECIES_CAZA_MAYOR].astype(str).str.strip()
         df_tercero[COLUMNA_ESPECIES_CAZA_MAYOR] = df_tercero[COLUMNA_ESPECIES_CAZA_MAYOR].replace(['Nan', 'nan', ''],
                                                                                                   pd.NA)
         df_tercero.dropna(subset=[COLUMNA_ESPECIES_CAZA_MAYOR], inplace=True)
 
         if not df_tercero.empty:
-            species_exploded = df_tercero[COLUMNA_ESPECIES_CAZA_MAYOR].str.split(', ').explode()
-            species_exploded = species_exploded.astype(str).str.title().str.strip()
-
-            species_counts = species_exploded.value_counts().reset_index(name='Cantidad de Solicitudes')
+            # Los conteos salen del índice multi-hot (sin volver a separar el texto), solo de las
+            # filas que siguen en df_tercero
+            filas_especies = df_tercero.index.to_numpy()
+            species_counts = conteos(indice_especies, filas_especies).sort_values(ascending=False).reset_index(
+                name='Cantidad de Solicitudes')
             species_counts.columns = ['Especie', 'Cantidad de Solicitudes']
             species_counts = species_counts.sort_values(by='Cantidad de Solicitudes', ascending=False)
 
             st.markdown("##### Cantidad de Solicitudes por Especie de Caza Mayor")
             with st.expander("Ver detalle de Solicitudes de Especies"):
-                st.dataframe(species_counts, hide_index=True)
-
-            fig_especies_solicitadas = px.bar(species_counts.head(15),  # Top 15 especies solicitadas
-                                              x='Especie',
-                                              y='Cantidad de Solicitudes',
-                                              text='Cantidad de Solicitudes',
-                                              title='Especies Solicitadas para Caza Mayor en Establecimientos (Top 15)',
-                                              labels={'Especie': 'Especie Solicitada',
-                                                      'Cantidad de Solicitudes': 'Número de Solicitudes'})
-            fig_especies_solicitadas.update_xaxes(tickangle=45)
-            fig_especies_solicitadas.update_traces(texttemplate='%{text}', textposition='outside')
-            st.plotly_chart(fig_especies_solicitadas, use_container_width=True, key="especies_caza_mayor_chart")
+                tabla_paginada(species_counts, key="tabla_especies_solicitadas")
+
+            grafico('bar', species_counts.head(15),  # Top 15 especies solicitadas
+                    key="especies_caza_mayor_chart",
+                    x='Especie',
+                    y='Cantidad de Solicitudes',
+                    text='Cantidad de Solicitudes',
+                    title='Especies Solicitadas para Caza Mayor en Establecimientos (Top 15)',
+                    labels={'Especie': 'Especie Solicitada',
+                            'Cantidad de Solicitudes': 'Número de Solicitudes'},
+                    ajustes={'update_xaxes': {'tickangle': 45},
+                             'update_traces': {'texttemplate': '%{text}', 'textposition': 'outside'}})
+
+            st.markdown("##### Especies Solicitadas en Conjunto")
+            grafico('imshow', coocurrencia(indice_especies, filas_especies),
+                    key="coocurrencia_especies_chart",
+                    text_auto=True,
+                    color_continuous_scale='Reds',
+                    title='Establecimientos que solicitan cada par de especies (la diagonal es el total por especie)',
+                    labels={'x': 'Especie', 'y': 'Especie', 'color': 'Establecimientos'},
+                    height=650)
+
+            st.markdown("##### Establecimientos por Especie")
+            especies_buscadas = st.multiselect("Establecimientos que solicitan todas estas especies",
+                                               species_counts['Especie'].tolist(), key="buscar_especies")
+            if especies_buscadas:
+                filas_encontradas = np.intersect1d(filas_con(indice_especies, especies_buscadas), filas_especies)
+                st.info(f"**{len(filas_encontradas)}** establecimientos solicitan: {', '.join(especies_buscadas)}.")
+                columnas_datos = [c for c in COLUMNAS_DATOS_ESTABLECIMIENTO if c in df_tercero.columns]
+                tabla_paginada(df_tercero.loc[filas_encontradas, columnas_datos], key="tabla_establecimientos_especie")
         else:
             st.info("No hay datos válidos en la columna de especies de caza mayor después de la limpieza.")
     else:
@@ -258,15 +366,15 @@ if df_tercero is not None:
         with st.expander("Ver detalle de Tendencia de Ciervos"):
             st.dataframe(ciervos_cinco_anos_counts, hide_index=True)
 
-        fig_ciervos_cinco_anos = px.pie(ciervos_cinco_anos_counts,
-                                        names='Tendencia de Ciervos',
-                                        values='Cantidad de Establecimientos',
-                                        title='Porcentaje de Tendencia de Ciervos en los Últimos Cinco Años',
-                                        hole=0.3,
-                                        labels={'Tendencia de Ciervos': 'Tendencia',
-                                                'Cantidad de Establecimientos': 'Número de Establecimientos'})
-        fig_ciervos_cinco_anos.update_traces(textinfo='percent+label')
-        st.plotly_chart(fig_ciervos_cinco_anos, use_container_width=True, key="ciervos_cinco_anos_chart")
+        grafico('pie', ciervos_cinco_anos_counts,
+                key="ciervos_cinco_anos_chart",
+                names='Tendencia de Ciervos',
+                values='Cantidad de Establecimientos',
+                title='Porcentaje de Tendencia de Ciervos en los Últimos Cinco Años',
+                hole=0.3,
+                labels={'Tendencia de Ciervos': 'Tendencia',
+                        'Cantidad de Establecimientos': 'Número de Establecimientos'},
+                ajustes={'update_traces': {'textinfo': 'percent+label'}})
     else:
         st.warning(
             f"Columna '{COLUMNA_CIERVOS_CINCO_ANOS}' no encontrada. No se puede generar el gráfico de tendencia de ciervos.")
@@ -286,15 +394,15 @@ if df_tercero is not None:
         with st.expander("Ver detalle de Manejo de Ciervos Colorados"):
             st.dataframe(manejo_ciervos_counts, hide_index=True)
 
-        fig_manejo_ciervos = px.pie(manejo_ciervos_counts,
-                                    names='Tipo de Manejo',
-                                    values='Cantidad de Establecimientos',
-                                    title='Porcentaje de Manejo o Aprovechamiento de Ciervos Colorados',
-                                    hole=0.3,
-                                    labels={'Tipo de Manejo': 'Manejo',
-                                            'Cantidad de Establecimientos': 'Número de Establecimientos'})
-        fig_manejo_ciervos.update_traces(textinfo='percent+label')
-        st.plotly_chart(fig_manejo_ciervos, use_container_width=True, key="manejo_ciervos_chart")
+        grafico('pie', manejo_ciervos_counts,
+                key="manejo_ciervos_chart",
+                names='Tipo de Manejo',
+                values='Cantidad de Establecimientos',
+                title='Porcentaje de Manejo o Aprovechamiento de Ciervos Colorados',
+                hole=0.3,
+                labels={'Tipo de Manejo': 'Manejo',
+                        'Cantidad de Establecimientos': 'Número de Establecimientos'},
+                ajustes={'update_traces': {'textinfo': 'percent+label'}})
     else:
         st.warning(
             f"Columna '{COLUMNA_MANEJO_CIERVOS}' no encontrada. No se puede generar el gráfico de manejo de ciervos.")
@@ -313,15 +421,15 @@ if df_tercero is not None:
         with st.expander("Ver detalle de Tendencia de Jabalí"):
             st.dataframe(jabali_counts, hide_index=True)
 
-        fig_jabali = px.pie(jabali_counts,
-                            names='Tendencia de Población',
-                            values='Cantidad de Establecimientos',
-                            title='Porcentaje de Tendencia de Población de Jabalí Europeo (Últimos 3 Años)',
-                            hole=0.3,
-                            labels={'Tendencia de Población': 'Tendencia',
-                                    'Cantidad de Establecimientos': 'Número de Establecimientos'})
-        fig_jabali.update_traces(textinfo='percent+label')
-        st.plotly_chart(fig_jabali, use_container_width=True, key="jabali_tendencia_chart")
+        grafico('pie', jabali_counts,
+                key="jabali_tendencia_chart",
+                names='Tendencia de Población',
+                values='Cantidad de Establecimientos',
+                title='Porcentaje de Tendencia de Población de Jabalí Europeo (Últimos 3 Años)',
+                hole=0.3,
+                labels={'Tendencia de Población': 'Tendencia',
+                        'Cantidad de Establecimientos': 'Número de Establecimientos'},
+                ajustes={'update_traces': {'textinfo': 'percent+label'}})
     else:
         st.warning(f"Columna '{COLUMNA_JABALI_TRES_ANOS}' no encontrada. No se puede generar el gráfico de jabalí.")
     st.markdown("---")
@@ -339,15 +447,15 @@ if df_tercero is not None:
         with st.expander("Ver detalle de Tendencia de Pumas"):
             st.dataframe(pumas_counts, hide_index=True)
 
-        fig_pumas = px.pie(pumas_counts,
-                           names='Tendencia de Población',
-                           values='Cantidad de Establecimientos',
-                           title='Porcentaje de Tendencia de Población de Pumas (Últimos 3 Años)',
-                           hole=0.3,
-                           labels={'Tendencia de Población': 'Tendencia',
-                                   'Cantidad de Establecimientos': 'Número de Establecimientos'})
-        fig_pumas.update_traces(textinfo='percent+label')
-        st.plotly_chart(fig_pumas, use_container_width=True, key="pumas_tendencia_chart")
+        grafico('pie', pumas_counts,
+                key="pumas_tendencia_chart",
+                names='Tendencia de Población',
+                values='Cantidad de Establecimientos',
+                title='Porcentaje de Tendencia de Población de Pumas (Últimos 3 Años)',
+                hole=0.3,
+                labels={'Tendencia de Población': 'Tendencia',
+                        'Cantidad de Establecimientos': 'Número de Establecimientos'},
+                ajustes={'update_traces': {'textinfo': 'percent+label'}})
     else:
         st.warning(f"Columna '{COLUMNA_PUMAS_TRES_ANOS}' no encontrada. No se puede generar el gráfico de pumas.")
     st.markdown("---")
@@ -365,15 +473,15 @@ if df_tercero is not None:
         with st.expander("Ver detalle de Presencia de Guanacos"):
             st.dataframe(guanacos_counts, hide_index=True)
 
-        fig_guanacos = px.pie(guanacos_counts,
-                              names='Presencia de Guanacos',
-                              values='Cantidad de Establecimientos',
-                              title='Porcentaje de Establecimientos con Poblaciones de Guanacos',
-                              hole=0.3,
-                              labels={'Presencia de Guanacos': 'Presencia',
-                                      'Cantidad de Establecimientos': 'Número de Establecimientos'})
-        fig_guanacos.update_traces(textinfo='percent+label')
-        st.plotly_chart(fig_guanacos, use_container_width=True, key="guanacos_chart")
+        grafico('pie', guanacos_counts,
+                key="guanacos_chart",
+                names='Presencia de Guanacos',
+                values='Cantidad de Establecimientos',
+                title='Porcentaje de Establecimientos con Poblaciones de Guanacos',
+                hole=0.3,
+                labels={'Presencia de Guanacos': 'Presencia',
+                        'Cantidad de Establecimientos': 'Número de Establecimientos'},
+                ajustes={'update_traces': {'textinfo': 'percent+label'}})
     else:
         st.warning(f"Columna '{COLUMNA_GUANACOS_VIVEN}' no encontrada. No se puede generar el gráfico de guanacos.")
     st.markdown("---")
@@ -382,16 +490,20 @@ if df_tercero is not None:
     st.markdown("Aquí puedes agregar más gráficos, tablas y análisis específicos para tu tercer archivo CSV.")
     # ... (Más código de análisis para el nuevo CSV)
 
-    st.download_button(
+    boton_exportar(
+        df_tercero,
         label=f"⬇️ Exportar datos completos de {nombre_tercer_csv}",
-        data=to_excel(df_tercero),
-        file_name=f'datos_{nombre_tercer_csv.replace(".csv", "")}_analisis.xlsx',
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        file_name=f'datos_{nombre_tercer_csv.replace(".csv", "")}_analisis',
+        key="datos_establecimientos",
+        streaming=True,
+        version=version_establecimientos
     )
 
 else:
     st.error("No se pudieron cargar los datos para esta página. Verifica el archivo y la ruta.")
 
+finalizar_medicion()
+
 
 
 
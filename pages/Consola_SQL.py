@@ -0,0 +1,71 @@
+import time
+
+import streamlit as st
+from utils import sql_engine
+from utils.export import boton_exportar
+from utils.precalentamiento import iniciar_precalentamiento, mostrar_precalentamiento
+
+# --- Configuración de la página ---
+st.set_page_config(
+    page_title="Consola SQL",  # Este será el nombre que aparece en el menú
+    page_icon="🧮",
+    layout="wide"
+)
+
+# Precalienta en segundo plano las cachés de los tres datasets (una vez por proceso)
+mostrar_precalentamiento(iniciar_precalentamiento())
+
+# Máximo de filas que se muestran en pantalla (la exportación incluye todas)
+MAX_FILAS_EN_PANTALLA = 10_000
+
+st.title("🧮 Consola SQL")
+st.markdown("Consultas SQL de solo lectura (DuckDB) sobre los datasets del tablero. "
+            "Las columnas se leen como texto: usa `CAST` o `TRY_CAST` para operar con números o fechas.")
+st.markdown("---")
+
+if not sql_engine.disponible():
+    st.error("DuckDB no está instalado. Agrega 'duckdb' a requirements.txt para usar la consola SQL.")
+    st.stop()
+
+# --- Tablas disponibles ---
+with st.expander("Ver tablas y columnas disponibles"):
+    for tabla in sql_engine.fuentes():
+        try:
+            columnas = sql_engine.consultar(f'DESCRIBE "{tabla}"')
+            st.markdown(f"**{tabla}**")
+            st.dataframe(columnas[['column_name', 'column_type']], hide_index=True)
+        except Exception as e:
+            st.warning(f"No se pudo leer la tabla '{tabla}': {e}")
+
+consulta = st.text_area(
+    "Consulta SQL",
+    value='SELECT "País", COUNT(*) AS "Cantidad"\nFROM permisos\nGROUP BY 1\nORDER BY 2 DESC',
+    height=180,
+    key="consola_sql_consulta"
+)
+
+if st.button("▶️ Ejecutar", key="consola_sql_ejecutar"):
+    st.session_state["consola_sql_ultima"] = consulta
+
+ultima = st.session_state.get("consola_sql_ultima")
+if ultima:
+    if not sql_engine.es_consulta_de_lectura(ultima):
+        st.error("Solo se permite una única consulta de lectura (SELECT, WITH, DESCRIBE, SHOW, SUMMARIZE o EXPLAIN).")
+    else:
+        try:
+            inicio = time.perf_counter()
+            resultado = sql_engine.consultar(ultima)
+            duracion = time.perf_counter() - inicio
+        except Exception as e:
+            st.error(f"Error al ejecutar la consulta: {e}")
+        else:
+            st.info(f"**{len(resultado)}** filas en {duracion * 1000:.0f} ms.")
+            if len(resultado) > MAX_FILAS_EN_PANTALLA:
+                st.warning(f"Se muestran las primeras {MAX_FILAS_EN_PANTALLA} filas; la exportación incluye todas.")
+            st.dataframe(resultado.head(MAX_FILAS_EN_PANTALLA), hide_index=True)
+            boton_exportar(
+                resultado,
+                label="⬇️ Exportar resultado",
+                file_name='consulta_sql',
+                key="consola_sql_resultado"
+            )
@@ -0,0 +1,168 @@
+import streamlit as st
+from utils.data_loader import cargar_datos, version_archivo, version_datos
+from utils.dimension_acm import (FUENTE_ESTABLECIMIENTOS, FUENTE_GUIAS, FUENTE_PERMISOS, SOLICITADA_SIN_TRASLADOS,
+                                 SOLICITADA_Y_TRASLADADA, TRASLADADA_SIN_SOLICITUD, cruce_especies,
+                                 cruce_registros, dimension_acm, especies_por_acm)
+from utils.export import boton_exportar
+from utils.figuras import grafico
+from utils.multi_hot import indice_multi_hot
+from utils.tablas import tabla_paginada
+from utils.permisos import (COLUMNA_ACM, COLUMNA_FECHA_EMISION, RUTA_REGLAS_EXCLUSION, cargar_permisos,
+                            permisos_preprocesados)
+from utils.precalentamiento import (ARCHIVO_ESTABLECIMIENTOS, ARCHIVO_GUIAS_TRASLADO, iniciar_precalentamiento,
+                                    mostrar_precalentamiento)
+from utils.instrumentacion import finalizar_medicion, iniciar_medicion, seccion
+
+# --- Configuración de la página ---
+st.set_page_config(
+    page_title="Cruces por ACM",
+    page_icon="🔗",
+    layout="wide"
+)
+
+# --- NOMBRES DE COLUMNA DE LAS GUÍAS Y DE LA PLANILLA DE ESTABLECIMIENTOS ---
+COLUMNA_ACM_GUIA_TRASLADO = 'ACM-(Área de caza mayor)'
+COLUMNA_ESPECIES_EXOTICAS = 'Especies exóticas posibles de ser cazada legalmente. (Tilde lo que corresponda). '
+COLUMNA_NOMBRE_ESTABLECIMIENTO = 'Nombre del establecimiento'
+COLUMNA_ESPECIES_CAZA_MAYOR = 'Marque el casillero de la especies para las que solicita la práctica de caza. mayor.  Estas especies son exclusivamente para caza en establecimientos debidamente inscriptos como Criaderos de Fauna Silvestre y habilitados como Áreas de Caza Mayor.'
+
+st.title("🔗 Cruces entre Permisos, Guías de Traslado y Establecimientos")
+st.markdown("Esta página une los tres conjuntos de datos por Área de Caza Mayor (ACM).")
+st.markdown("---")
+
+# Precalienta en segundo plano las cachés de los tres datasets (una vez por proceso)
+mostrar_precalentamiento(iniciar_precalentamiento())
+iniciar_medicion('Cruces_por_ACM')
+seccion('Carga de datos')
+# Las mismas funciones cacheadas y claves que las otras páginas: si ya se visitaron, no se recalcula nada
+df_permisos, origen_permisos, version_permisos, _ = cargar_permisos()
+df_guias = cargar_datos(ARCHIVO_GUIAS_TRASLADO, esquema='guias_traslado')
+df_establecimientos = cargar_datos(ARCHIVO_ESTABLECIMIENTOS, esquema='establecimientos')
+
+if df_permisos is None or df_guias is None or df_establecimientos is None:
+    st.error("No se pudieron cargar los tres conjuntos de datos. Verifica los archivos y las rutas.")
+elif (COLUMNA_ACM not in df_permisos.columns or COLUMNA_ACM_GUIA_TRASLADO not in df_guias.columns
+      or COLUMNA_NOMBRE_ESTABLECIMIENTO not in df_establecimientos.columns):
+    st.warning(f"Faltan las columnas de ACM ('{COLUMNA_ACM}' en permisos y guías, "
+               f"'{COLUMNA_NOMBRE_ESTABLECIMIENTO}' en establecimientos). No se pueden cruzar los datos.")
+else:
+    # Los permisos se cruzan después de las reglas de exclusión, como en la página principal
+    version_reglas = version_archivo(RUTA_REGLAS_EXCLUSION)
+    if COLUMNA_FECHA_EMISION in df_permisos.columns:
+        df_permisos, _, _ = permisos_preprocesados(df_permisos, (version_permisos, version_reglas))
+    version_guias = version_datos(ARCHIVO_GUIAS_TRASLADO, 'guias_traslado')
+    version_establecimientos = version_datos(ARCHIVO_ESTABLECIMIENTOS, 'establecimientos')
+
+    # --- 1. Dimensión de ACMs ---
+    seccion('Dimensión de ACMs', filas=len(df_permisos) + len(df_guias) + len(df_establecimientos))
+    st.header("🏷️ ACMs Canónicas")
+    fuentes = {
+        FUENTE_PERMISOS: df_permisos[COLUMNA_ACM],
+        FUENTE_GUIAS: df_guias[COLUMNA_ACM_GUIA_TRASLADO],
+        FUENTE_ESTABLECIMIENTOS: df_establecimientos[COLUMNA_NOMBRE_ESTABLECIMIENTO],
+    }
+    # Clave normalizada e índice valor -> ACM, una vez por versión de los tres datasets (ver utils/dimension_acm.py)
+    dimension = dimension_acm(fuentes, (version_permisos, version_reglas, version_guias, version_establecimientos))
+    tabla_dimension = dimension['tabla']
+    st.info(f"Se identificaron {len(tabla_dimension)} ACMs a partir de {len(dimension['por_valor'])} nombres "
+            f"distintos en los tres conjuntos de datos.")
+    with st.expander("Ver las ACMs y sus variantes de nombre (Haz clic para ver todas)"):
+        vista_dimension = tabla_dimension.drop(columns=['id', 'clave']).rename(
+            columns={'nombre': 'ACM', 'variantes': 'Variantes'})
+        vista_dimension['Variantes'] = vista_dimension['Variantes'].str.join(' | ')
+        tabla_paginada(vista_dimension, key="tabla_dimension_acm")
+    st.markdown("---")
+
+    # --- 2. Permisos y guías de traslado por ACM ---
+    seccion('Permisos y guías por ACM', filas=len(df_permisos) + len(df_guias))
+    st.header("📈 Permisos de Caza y Guías de Traslado por ACM")
+    permisos_y_guias = cruce_registros(dimension, {
+        'Permisos': df_permisos[COLUMNA_ACM],
+        'Guías de Traslado': df_guias[COLUMNA_ACM_GUIA_TRASLADO],
+    }).drop(columns='id').rename(columns={'nombre': 'ACM'})
+    permisos_y_guias['Guías por Permiso'] = (
+        permisos_y_guias['Guías de Traslado'] / permisos_y_guias['Permisos'].where(permisos_y_guias['Permisos'] > 0)
+    ).round(2)
+    permisos_y_guias = permisos_y_guias.sort_values(by='Permisos', ascending=False).reset_index(drop=True)
+
+    sin_guias = int(((permisos_y_guias['Permisos'] > 0) & (permisos_y_guias['Guías de Traslado'] == 0)).sum())
+    sin_permisos = int(((permisos_y_guias['Guías de Traslado'] > 0) & (permisos_y_guias['Permisos'] == 0)).sum())
+    st.markdown(f"**{sin_guias}** ACMs tienen permisos y ninguna guía de traslado; "
+                f"**{sin_permisos}** tienen guías de traslado y ningún permiso.")
+
+    st.markdown("##### Detalle por ACM")
+    with st.expander(f"Ver los {min(10, len(permisos_y_guias))} principales (Haz clic para ver todos)"):
+        tabla_paginada(permisos_y_guias, key="tabla_permisos_guias")
+    boton_exportar(
+        permisos_y_guias,
+        label="⬇️ Exportar Permisos y Guías por ACM",
+        file_name='permisos_y_guias_por_acm',
+        key="permisos_guias_acm"
+    )
+
+    st.markdown("##### Gráfico de Permisos y Guías por ACM (Top 15 por Permisos)")
+    top_permisos_guias = permisos_y_guias.head(15).melt(
+        id_vars='ACM', value_vars=['Permisos', 'Guías de Traslado'], var_name='Registro', value_name='Cantidad')
+    grafico('bar', top_permisos_guias,
+            key="permisos_guias_chart",
+            x='ACM',
+            y='Cantidad',
+            color='Registro',
+            barmode='group',
+            title='Permisos de Caza y Guías de Traslado por ACM (Top 15)',
+            labels={'ACM': 'Área de Caza Mayor', 'Cantidad': 'Número de Registros'},
+            ajustes={'update_xaxes': {'tickangle': 45}})
+    st.markdown("---")
+
+    # --- 3. Especies solicitadas y trasladadas por establecimiento ---
+    seccion('Especies solicitadas y trasladadas', filas=len(df_guias) + len(df_establecimientos))
+    st.header("🦌 Especies Solicitadas y Trasladadas por Establecimiento")
+    if COLUMNA_ESPECIES_CAZA_MAYOR in df_establecimientos.columns and COLUMNA_ESPECIES_EXOTICAS in df_guias.columns:
+        # Los mismos índices multi-hot (y claves de caché) que las páginas de cada dataset
+        indice_solicitadas = indice_multi_hot(df_establecimientos[COLUMNA_ESPECIES_CAZA_MAYOR],
+                                              version_establecimientos + (COLUMNA_ESPECIES_CAZA_MAYOR,))
+        indice_trasladadas = indice_multi_hot(df_guias[COLUMNA_ESPECIES_EXOTICAS],
+                                              version_guias + (COLUMNA_ESPECIES_EXOTICAS,))
+        especies = cruce_especies(
+            dimension,
+            especies_por_acm(dimension, df_establecimientos[COLUMNA_NOMBRE_ESTABLECIMIENTO], indice_solicitadas),
+            especies_por_acm(dimension, df_guias[COLUMNA_ACM_GUIA_TRASLADO], indice_trasladadas))
+
+        resumen_estados = especies['Estado'].value_counts()
+        col_ambas, col_solicitadas, col_trasladadas = st.columns(3)
+        col_ambas.metric(SOLICITADA_Y_TRASLADADA, int(resumen_estados.get(SOLICITADA_Y_TRASLADADA, 0)))
+        col_solicitadas.metric(SOLICITADA_SIN_TRASLADOS, int(resumen_estados.get(SOLICITADA_SIN_TRASLADOS, 0)))
+        col_trasladadas.metric(TRASLADADA_SIN_SOLICITUD, int(resumen_estados.get(TRASLADADA_SIN_SOLICITUD, 0)))
+
+        estados_elegidos = st.multiselect(
+            "Estados a mostrar",
+            [SOLICITADA_Y_TRASLADADA, SOLICITADA_SIN_TRASLADOS, TRASLADADA_SIN_SOLICITUD],
+            default=[SOLICITADA_Y_TRASLADADA, SOLICITADA_SIN_TRASLADOS, TRASLADADA_SIN_SOLICITUD],
+            key="estados_especies")
+        especies_visibles = especies[especies['Estado'].isin(estados_elegidos)].reset_index(drop=True)
+        st.markdown("##### Detalle por Establecimiento y Especie")
+        st.caption("'Solicitada' es la cantidad de inscripciones del establecimiento que marcan la especie; "
+                   "'Guías de traslado', la cantidad de guías de la ACM que la incluyen.")
+        tabla_paginada(especies_visibles, key="tabla_especies_acm")
+        boton_exportar(
+            especies_visibles,
+            label="⬇️ Exportar Especies Solicitadas y Trasladadas",
+            file_name='especies_solicitadas_trasladadas_por_acm',
+            key="especies_acm"
+        )
+
+        st.markdown("##### Gráfico de Especies por Estado")
+        especies_por_estado = especies.groupby(['Especie', 'Estado']).size().reset_index(name='ACMs')
+        grafico('bar', especies_por_estado,
+                key="especies_estado_chart",
+                x='Especie',
+                y='ACMs',
+                color='Estado',
+                title='ACMs por Especie y Estado (Solicitada / Trasladada)',
+                labels={'ACMs': 'Número de ACMs'},
+                ajustes={'update_xaxes': {'tickangle': 45}})
+    else:
+        st.warning("No se encontraron las columnas de especies en las guías de traslado o en la planilla de "
+                   "establecimientos. No se pueden cruzar las especies.")
+
+finalizar_medicion()
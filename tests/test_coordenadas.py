@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.coordenadas import parsear_coordenadas
+
+FORMATOS = [
+    ("-39.12, -71.45", (-39.12, -71.45)),
+    ("-39,12 -71,45", (-39.12, -71.45)),
+    ("39°7'12\" S 71°27' O", (-39.12, -71.45)),
+    ("39° 7.2' Sur, 71° 27' Oeste", (-39.12, -71.45)),
+    ("-39°7'12\", -71°27'30\"", (-39.12, -71.458333)),
+    ("71.3 W 40.1 S", (-40.1, -71.3)),
+    ("S 40 09 00 W 71 21 00", (-40.15, -71.35)),
+    ("S 40° 09' W 71° 21'", (-40.15, -71.35)),
+    ("Sur 40 9 Oeste 71 21", (-40.15, -71.35)),
+    ("N 10 E 20", (10.0, 20.0)),
+]
+
+
+@pytest.mark.parametrize('texto, esperado', FORMATOS)
+def test_formatos(texto, esperado):
+    coordenadas = parsear_coordenadas(pd.Series([texto]))
+    np.testing.assert_allclose(coordenadas.iloc[0].to_numpy(), esperado, atol=1e-6)
+
+
+@pytest.mark.parametrize('texto', ["40 09 00 S 71 21 00 W", "sin dato", "95, 200"])
+def test_valores_que_no_se_pueden_interpretar(texto):
+    assert parsear_coordenadas(pd.Series([texto])).isna().all(axis=None)
+
+
+def test_nulos_y_valores_repetidos():
+    coordenadas = parsear_coordenadas(pd.Series(["-39.12, -71.45", None, "-39.12, -71.45"], index=[5, 6, 7]))
+    assert list(coordenadas.index) == [5, 6, 7]
+    assert coordenadas.loc[6].isna().all()
+    assert coordenadas.loc[5].equals(coordenadas.loc[7])
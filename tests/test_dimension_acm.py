@@ -0,0 +1,35 @@
+import pandas as pd
+
+from utils.dimension_acm import clave_acm, construir_dimension, ids_acm
+
+
+def _variantes(dimension):
+    return sorted(sorted(variantes) for variantes in dimension['tabla']['variantes'])
+
+
+def test_prefijo_de_una_palabra_con_varias_extensiones_no_une():
+    dimension = construir_dimension({'a': pd.Series(['Estancia Cerro', 'Cerro Bayo', 'Cerro Negro'])})
+    assert _variantes(dimension) == [['Cerro Bayo'], ['Cerro Negro'], ['Estancia Cerro']]
+
+
+def test_prefijo_sin_ambiguedad_se_une():
+    dimension = construir_dimension({'a': pd.Series(['Sihuen', 'Sihuen Cinag', 'Refugio Quillen', 'Refugio'])})
+    assert _variantes(dimension) == [['Refugio', 'Refugio Quillen'], ['Sihuen', 'Sihuen Cinag']]
+
+
+def test_prefijo_de_varias_palabras_se_une():
+    dimension = construir_dimension({'a': pd.Series(['Cerro Bayo', 'Cerro Bayo Norte', 'Cerro Bayo Sur'])})
+    assert _variantes(dimension) == [['Cerro Bayo', 'Cerro Bayo Norte', 'Cerro Bayo Sur']]
+
+
+def test_nombre_que_es_solo_un_articulo_y_palabras_genericas():
+    claves = clave_acm(pd.Series(['La Estancia', 'Estancia La Belisle', 'El Criadero']))
+    assert list(claves) == ['la estancia', 'belisle', 'el criadero']
+
+
+def test_valores_nuevos_se_unen_como_en_la_construccion():
+    dimension = construir_dimension({'a': pd.Series(['Cerro', 'Cerro Bayo', 'Sihuen', 'Sihuen Cinag'])})
+    ids = ids_acm(dimension, pd.Series(['Ea. Cerro Bayo', 'Cerro Negro', 'Sihuen Otro', None]))
+    id_cerro_bayo = dimension['por_valor']['Cerro Bayo']
+    # 'cerro negro' es una segunda extensión de 'cerro' y 'sihuen otro' de 'sihuen': ninguna se une
+    assert list(ids) == [id_cerro_bayo, -1, -1, -1]
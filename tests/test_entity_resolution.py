@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from utils.entity_resolution import pares_similares, resolver_nombres, resolver_personas
+
+
+def test_orden_de_palabras_tildes_y_tipeo():
+    nombres = pd.Series(['Octavio Roa', 'Roa Octavio', 'José Pérez', 'JOSE PEREZ', 'Jose Peres', 'María Gómez', None])
+    ids, tabla = resolver_nombres(nombres)
+    assert ids[0] == ids[1]
+    assert ids[2] == ids[3] == ids[4]
+    assert len({ids[0], ids[2], ids[5]}) == 3
+    assert ids[6] == -1
+    assert list(tabla['registros']) == [3, 1, 2]
+    assert tabla.loc[ids[0], 'variantes'] == ['Octavio Roa', 'Roa Octavio']
+
+
+def test_documentos_distintos_separan_nombres_parecidos():
+    nombres = pd.Series(['Juan Gomez', 'Juan Gómez', 'Juan Gomes', 'Ana Diaz', 'Ana Diaz'])
+    documentos = pd.Series(['20.123.456', '20123456', '30111222', None, 'AB-12'])
+    ids, _ = resolver_personas(nombres, documentos)
+    # Mismo documento normalizado => misma persona; el nombre parecido con otro documento queda aparte
+    assert ids[0] == ids[1] != ids[2]
+    # Sin documento se une por nombre al único documento de ese grupo
+    assert ids[3] == ids[4]
+
+
+def test_entradas_vacias():
+    vacios = pd.Series([None, None])
+    for ids, tabla in (resolver_nombres(pd.Series([None, ' '])), resolver_personas(vacios, vacios),
+                       resolver_personas(pd.Series([], dtype=object), pd.Series([], dtype=object))):
+        assert (ids == -1).all()
+        assert tabla.empty
+
+
+def test_verificacion_coincide_con_jaccard_exacto():
+    rng = np.random.default_rng(0)
+    palabras = ['Ana', 'Juan', 'Pedro', 'Gomez', 'Gomes', 'Perez', 'Diaz', 'Rios', 'Roa', 'Sosa']
+    claves = sorted({' '.join(sorted(rng.choice(palabras, 3))) for _ in range(300)})
+    trigramas = [{f"  {c} "[k:k + 3] for k in range(len(c) + 1)} for c in claves]
+    esperados = {(i, j) for i in range(len(claves)) for j in range(i + 1, len(claves))
+                 if len(trigramas[i] & trigramas[j]) >= 0.6 * len(trigramas[i] | trigramas[j])}
+    # El bloqueo y el descarte por estimación solo pueden perder pares; la verificación exacta no agrega de más
+    encontrados = set(pares_similares(claves, max_bloque=len(claves)))
+    assert encontrados <= esperados
+    assert len(encontrados) >= 0.9 * len(esperados)
@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from utils import export
+
+
+def test_exportacion_en_disco_se_reutiliza_y_respeta_el_limite(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'DIRECTORIO_CACHE_EXPORTACIONES', str(tmp_path))
+    primero = pd.DataFrame({'a': range(1000)})
+    segundo = pd.DataFrame({'a': range(1000, 2000)})
+
+    with export.exportar_a_disco(primero, 'csv', export.clave_exportacion(primero)) as archivo:
+        contenido = archivo.read()
+    assert contenido == export.to_csv(primero)
+    ruta_primero = archivo.name
+    # Con el mismo contenido no se regenera: se devuelve el mismo archivo
+    with export.exportar_a_disco(primero.copy(), 'csv', export.clave_exportacion(primero.copy())) as archivo:
+        assert archivo.name == ruta_primero
+
+    # Si el total supera el límite se borra el usado menos recientemente
+    monkeypatch.setattr(export, 'TAMANO_MAXIMO_CACHE_EXPORTACIONES', len(contenido) + 1)
+    with export.exportar_a_disco(segundo, 'csv', export.clave_exportacion(segundo)) as archivo:
+        assert archivo.read() == export.to_csv(segundo)
+    assert os.listdir(tmp_path) == [os.path.basename(archivo.name)]
+
+
+def test_clave_por_version_no_recorre_el_dataframe(monkeypatch):
+    df = pd.DataFrame({'a': range(10)})
+    monkeypatch.setattr(export, 'hash_dataframe', _no_hashear)
+    assert export.clave_exportacion(df, ('hash', 'guias_traslado')) == \
+        export.clave_exportacion(df.head(1), ('hash', 'guias_traslado'))
+    assert export.clave_exportacion(df, ('hash', 'guias_traslado')) != \
+        export.clave_exportacion(df, ('otro', 'guias_traslado'))
+
+
+def _no_hashear(df):
+    raise AssertionError("hash_dataframe no debería llamarse con 'version'")
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.filter_index import construir_indice_fechas, orden_por_fecha, ventana_fechas
+
+
+@pytest.mark.parametrize('elegidas', [300, 900])
+def test_orden_por_fecha_de_posiciones_filtradas(elegidas):
+    rng = np.random.default_rng(0)
+    fechas = pd.Series(pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 30, 1000), unit='D'))
+    fechas[rng.choice(1000, 50, replace=False)] = pd.NaT
+    indice = construir_indice_fechas(fechas)
+    posiciones = np.sort(rng.choice(1000, elegidas, replace=False))
+
+    orden, fechas_en_orden = orden_por_fecha(indice, posiciones)
+    # Mismo resultado que recorrer el orden completo quedándose con las filas elegidas
+    conjunto = set(posiciones)
+    esperado = [p for p in indice['orden'] if p in conjunto]
+    assert list(orden) == esperado
+    assert np.array_equal(fechas_en_orden, fechas.to_numpy()[orden], equal_nan=True)
+
+    ventana = ventana_fechas(orden, fechas_en_orden, '2024-01-10', '2024-01-12')
+    en_ventana = fechas.iloc[posiciones].between('2024-01-10', '2024-01-12').to_numpy()
+    assert sorted(ventana) == sorted(posiciones[en_ventana])
@@ -0,0 +1,11 @@
+from utils.geocoding import consultar_store, guardar_resultado
+
+
+def test_nombres_con_la_misma_clave_reciben_el_resultado(tmp_path):
+    db_path = str(tmp_path / 'geocoding.sqlite3')
+    guardar_resultado('monte maiz cordoba, Argentina', (-33.2, -62.6, 'Argentina'), 'prueba', 'ok', db_path)
+
+    nombres = ['monte maiz  cordoba, Argentina', 'monte maiz cordoba, Argentina', 'la plata, Argentina']
+    resultados = consultar_store(nombres, db_path=db_path)
+
+    assert resultados == {nombre: (-33.2, -62.6, 'Argentina') for nombre in nombres[:2]}
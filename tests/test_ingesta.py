@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from utils import ingesta
+
+pytest.importorskip('pyarrow')
+
+
+def _snapshot(ruta, ids, envios):
+    pd.DataFrame({ingesta.COLUMNA_ID: ids, ingesta.COLUMNA_ID_ENVIO: envios,
+                  'País': 'Argentina'}).to_csv(ruta, index=False)
+    return str(ruta)
+
+
+def test_corte_antes_de_registrar_ids_no_duplica_filas(tmp_path, monkeypatch):
+    store = str(tmp_path / 'store')
+    primero = _snapshot(tmp_path / 's1.csv', ['a', 'b'], [1, 2])
+    ingesta.ingestar_snapshot(primero, store)
+
+    # La ingesta se corta después de escribir la parte y el manifiesto, antes de registrar los IDs
+    def cortar(*args):
+        raise KeyboardInterrupt
+
+    segundo = _snapshot(tmp_path / 's2.csv', ['a', 'b', 'c', 'd'], [1, 2, 3, 4])
+    monkeypatch.setattr(ingesta, '_registrar_ids', cortar)
+    with pytest.raises(KeyboardInterrupt):
+        ingesta.ingestar_snapshot(segundo, store)
+    monkeypatch.undo()
+
+    # Sin marca de agua (ID de envío) solo el índice evita volver a anexar 'c' y 'd'
+    tercero = _snapshot(tmp_path / 's3.csv', ['a', 'b', 'c', 'd', 'e'], [None] * 5)
+    resumen = ingesta.ingestar_snapshot(tercero, store)
+    assert resumen['filas_nuevas'] == 1
+    assert sorted(ingesta.leer_store(store)[ingesta.COLUMNA_ID]) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_ids_de_una_parte_que_no_llego_al_manifiesto_se_descartan(tmp_path, monkeypatch):
+    store = str(tmp_path / 'store')
+    primero = _snapshot(tmp_path / 's1.csv', ['a'], [1])
+    ingesta.ingestar_snapshot(primero, store)
+
+    # IDs registrados de una parte huérfana (escrita sin llegar al manifiesto)
+    conn = ingesta._conectar_indice(store)
+    ingesta._registrar_ids(conn, ['b', 'c'], 'parte-00002.parquet')
+    conn.close()
+
+    segundo = _snapshot(tmp_path / 's2.csv', ['a', 'b', 'c'], [1, 2, 3])
+    resumen = ingesta.ingestar_snapshot(segundo, store)
+    assert resumen['filas_nuevas'] == 2
+    assert sorted(ingesta.leer_store(store)[ingesta.COLUMNA_ID]) == ['a', 'b', 'c']
+
+
+def test_filas_sin_id_se_cuentan_sobre_el_snapshot_completo(tmp_path):
+    store = str(tmp_path / 'store')
+    snapshot = _snapshot(tmp_path / 's.csv', ['a', None, 'b', None], [1, 2, 3, 4])
+    assert ingesta.ingestar_snapshot(snapshot, store)['filas_sin_id'] == 2
+    # Al reingestar, la marca de agua descarta todas las filas pero las sin ID siguen contándose
+    assert ingesta.ingestar_snapshot(snapshot, store)['filas_sin_id'] == 2
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from utils.limites import CAPAS, RESOLUCIONES, asignar_features, construir_capa, disponible, ruta_capa
+
+
+def _capa(capa, resolucion='media'):
+    return construir_capa(ruta_capa(capa), CAPAS[capa]['propiedades'], *RESOLUCIONES[resolucion])
+
+
+def _puntos(geojson):
+    total = 0
+    for feature in geojson['features']:
+        geometria = feature['geometry']
+        poligonos = [geometria['coordinates']] if geometria['type'] == 'Polygon' else geometria['coordinates']
+        total += sum(len(anillo) for poligono in poligonos for anillo in poligono)
+    return total
+
+
+def test_limites_incluidos():
+    assert disponible('paises') and disponible('provincias')
+
+
+def test_paises_por_nombre_en_espanol_e_ingles():
+    capa = _capa('paises')
+    claves = capa['claves']
+    for nombre, id_feature in [('alemania', 'alemania'), ('germany', 'alemania'), ('estados unidos', 'estados unidos'),
+                               ('brazil', 'brasil'), ('republica checa', 'chequia'), ('sudafrica', 'sudafrica')]:
+        assert claves[nombre] == id_feature
+    assert {f['properties']['nombre'] for f in capa['geojson']['features']} >= {'Argentina', 'España', 'Canadá'}
+
+
+def test_provincias_con_nombres_del_ign_y_alias():
+    capa = _capa('provincias')
+    assert len(capa['geojson']['features']) == 24
+    assert capa['claves']['caba'] == 'ciudad autonoma de buenos aires'
+    assert capa['claves']['tierra del fuego'] == 'tierra del fuego antartida e islas del atlantico sur'
+
+
+@pytest.mark.parametrize('capa', list(CAPAS))
+def test_resoluciones_mas_bajas_tienen_menos_puntos(capa):
+    puntos = [_puntos(_capa(capa, resolucion)['geojson']) for resolucion in ('alta', 'media', 'baja')]
+    assert puntos[0] > puntos[1] > puntos[2] > 0
+
+
+def test_asignar_provincias_en_texto_libre():
+    ubicaciones = pd.Series(['Junin De Los Andes, Neuquen', 'América,Buenos Aires', 'Tandil-Bs As', 'CABA',
+                             'Río Gallegos - Santa Cruz', 'Ruta 49 Km 17', None])
+    provincias = asignar_features(ubicaciones, _capa('provincias'))
+    assert list(provincias) == ['neuquen', 'buenos aires', 'buenos aires', 'ciudad autonoma de buenos aires',
+                                'santa cruz', None, None]
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from utils import sql_engine
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not sql_engine.disponible(), reason="DuckDB no está instalado")
+
+
+@pytest.fixture
+def cursor(monkeypatch):
+    # Las vistas usan las rutas relativas de los archivos de datos, como la app
+    monkeypatch.chdir(RAIZ)
+    cursor = sql_engine.conexion()
+    yield cursor
+    cursor.close()
+
+
+def test_las_vistas_leen_los_archivos_de_datos(cursor):
+    assert cursor.execute('SELECT COUNT(*) FROM "guias_traslado"').fetchone()[0] > 0
+
+
+@pytest.mark.parametrize('consulta', [
+    "SELECT content FROM read_text('/etc/hostname')",
+    "SELECT * FROM read_csv('/etc/passwd', header=false)",
+    "SELECT * FROM glob('/etc/*')",
+    f"SELECT * FROM read_text('{os.path.join(RAIZ, 'requirements.txt')}')",
+])
+def test_no_se_pueden_leer_otros_archivos(cursor, consulta):
+    assert sql_engine.es_consulta_de_lectura(consulta)
+    with pytest.raises(sql_engine.duckdb.Error):
+        cursor.execute(consulta).fetchall()
+
+
+def test_la_configuracion_queda_bloqueada(cursor):
+    with pytest.raises(sql_engine.duckdb.Error):
+        cursor.execute("SET enable_external_access = true")
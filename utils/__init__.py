@@ -0,0 +1 @@
+"""Funciones compartidas por las páginas del tablero (carga de datos, caché, etc.)."""
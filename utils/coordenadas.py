@@ -0,0 +1,217 @@
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Coordenadas de texto libre: "-39.12, -71.45", "-39,12 -71,45", "39°7'12\" S 71°27' O",
+# "39° 7.2' Sur, 71° 27' Oeste", "S 40 09 00 W 71 21 00"... Cada coordenada es un número
+# (grados, con decimales con punto o coma) seguido opcionalmente de minutos, segundos y el
+# hemisferio, o el hemisferio primero y después grados, minutos y segundos (con o sin marcas).
+_NUMERO = r'\d+(?:[.,]\d+)?'
+_GRADOS = r'(?:°|º|˚|grados?)'
+_MINUTOS = r"(?:'|’|′|min)"
+_SEGUNDOS = r'(?:"|”|″|\'\'|seg)'
+_HEMISFERIO = r'norte|sur|este|oeste|[NSEOW]'
+PATRON_COORDENADA = re.compile(
+    rf"\b(?P<hemisferio_inicial>{_HEMISFERIO})\s*(?P<grados_inicial>{_NUMERO})\s*{_GRADOS}?\s*"
+    rf"(?:(?P<minutos_inicial>{_NUMERO})\s*{_MINUTOS}?\s*)?"
+    rf"(?:(?P<segundos_inicial>{_NUMERO})\s*{_SEGUNDOS}?)?"
+    rf"|(?P<signo>[-−–])?\s*(?P<grados>{_NUMERO})\s*{_GRADOS}?\s*"
+    rf"(?:(?P<minutos>{_NUMERO})\s*{_MINUTOS}\s*)?"
+    rf"(?:(?P<segundos>{_NUMERO})\s*{_SEGUNDOS}\s*)?"
+    rf"(?:(?P<hemisferio>{_HEMISFERIO})\b)?",
+    re.IGNORECASE)
+# Dos números decimales con punto, separados por coma, punto y coma o espacios
+PATRON_DECIMAL = r'^\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*$'
+
+# Radio medio de la Tierra y kilómetros por grado de latitud
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = np.pi * RADIO_TIERRA_KM / 180
+# Lado de las celdas de la grilla espacial
+CELDA_KM = 10
+
+
+def _a_numero(serie):
+    return pd.to_numeric(serie.str.replace(',', '.', regex=False), errors='coerce')
+
+
+def _ordenar_ejes(primera, segunda, eje_lat_primera=False, eje_lon_primera=False, eje_lat_segunda=False,
+                  eje_lon_segunda=False):
+    """
+    (latitud, longitud) a partir de las dos coordenadas en el orden del texto: el hemisferio
+    indica el eje si está; si no, la primera es la latitud salvo que esté fuera de rango y la
+    segunda no. Los pares fuera de rango quedan en NaN.
+    """
+    invertir = (eje_lon_primera | eje_lat_segunda) | \
+        (~(eje_lat_primera | eje_lon_segunda) & (primera.abs() > 90) & (segunda.abs() <= 90))
+    latitud = primera.where(~invertir, segunda)
+    longitud = segunda.where(~invertir, primera)
+    fuera_de_rango = ~((latitud.abs() <= 90) & (longitud.abs() <= 180))
+    return latitud.mask(fuera_de_rango), longitud.mask(fuera_de_rango)
+
+
+def _parsear_complejos(textos):
+    """
+    Coordenadas con grados/minutos/segundos, hemisferios o decimales con coma (ver
+    PATRON_COORDENADA). Si hay un hemisferio después de la segunda coordenada, los números
+    no se separaron bien ("40 09 00 S 71 21 00 W", sin marcas de minutos) y el par queda en NaN.
+    """
+    partes = textos.str.extractall(PATRON_COORDENADA)
+    for campo in ('grados', 'minutos', 'segundos', 'hemisferio'):
+        partes[campo] = partes[campo].where(partes[campo].notna(), partes[f'{campo}_inicial'])
+    numero_coincidencia = partes.index.get_level_values('match')
+    mal_separados = partes.index.get_level_values(0)[(numero_coincidencia >= 2) & partes['hemisferio'].notna()]
+    partes = partes[numero_coincidencia < 2]
+    minutos = _a_numero(partes['minutos']).fillna(0)
+    segundos = _a_numero(partes['segundos']).fillna(0)
+    grados = _a_numero(partes['grados']) + minutos / 60 + segundos / 3600
+    grados[(minutos >= 60) | (segundos >= 60)] = np.nan
+    hemisferio = partes['hemisferio'].str[0].str.upper()
+    negativo = partes['signo'].notna() | hemisferio.isin(['S', 'O', 'W'])
+    grados = grados.where(~negativo, -grados).unstack().reindex(columns=[0, 1])
+    grados.loc[grados.index.isin(mal_separados)] = np.nan
+    eje_lat = hemisferio.isin(['N', 'S']).unstack(fill_value=False).reindex(columns=[0, 1], fill_value=False)
+    eje_lon = hemisferio.isin(['E', 'O', 'W']).unstack(fill_value=False).reindex(columns=[0, 1], fill_value=False)
+    return _ordenar_ejes(grados[0], grados[1], eje_lat[0], eje_lon[0], eje_lat[1], eje_lon[1])
+
+
+def parsear_coordenadas(serie):
+    """
+    Latitud y longitud (float, grados decimales) de cada valor de 'serie', en un DataFrame con
+    columnas 'Latitud' y 'Longitud' y el mismo índice. Se usan las dos primeras coordenadas del
+    texto: el hemisferio (S/O/W o signo negativo) define el signo y, si está, a qué eje
+    corresponde cada una; sin hemisferio la primera es la latitud (salvo que esté fuera de
+    rango y la segunda no). Los valores que no se pueden interpretar quedan en NaN.
+    Solo se analizan los valores distintos, todos juntos con str.extract/str.extractall.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    textos = pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str)
+    # Vía rápida para el formato más común ("-39.12, -71.45"): una sola coincidencia por valor
+    simples = textos.str.extract(PATRON_DECIMAL).astype(float)
+    es_simple = simples.notna().all(axis=1)
+    latitud, longitud = _ordenar_ejes(simples[0][es_simple], simples[1][es_simple])
+    complejos = textos[~es_simple]
+    if len(complejos):
+        lat_complejos, lon_complejos = _parsear_complejos(complejos)
+        latitud, longitud = pd.concat([latitud, lat_complejos]), pd.concat([longitud, lon_complejos])
+
+    # Un valor extra al final: los nulos (código -1) quedan en NaN
+    lat_valor = np.append(latitud.reindex(range(len(uniques))).to_numpy(dtype=float), np.nan)
+    lon_valor = np.append(longitud.reindex(range(len(uniques))).to_numpy(dtype=float), np.nan)
+    return pd.DataFrame({'Latitud': lat_valor[codes], 'Longitud': lon_valor[codes]}, index=serie.index)
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """Distancia de gran círculo (haversine) en km; acepta escalares o arreglos."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def construir_grilla(latitudes, longitudes, posiciones=None, celda_km=CELDA_KM):
+    """
+    Grilla espacial de celdas de celda_km x celda_km (en grados de latitud) sobre los puntos
+    con coordenadas válidas (solo los de 'posiciones', si se indican). Los puntos quedan
+    ordenados por celda y cada celda ocupada apunta a su tramo ('celdas', 'inicios'), así una
+    consulta solo recorre las celdas que tocan el radio buscado.
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    posiciones = np.arange(len(latitudes)) if posiciones is None else np.asarray(posiciones, dtype=np.int64)
+    posiciones = posiciones[~(np.isnan(latitudes[posiciones]) | np.isnan(longitudes[posiciones]))]
+    tam = celda_km / KM_POR_GRADO
+    filas = np.floor(latitudes[posiciones] / tam).astype(np.int64)
+    # Las columnas se cuentan desde -180 para que sean no negativas (celda = fila * ancho + columna)
+    columnas = np.floor((longitudes[posiciones] + 180) / tam).astype(np.int64)
+    ancho = int(np.ceil(360 / tam)) + 1
+    celda = filas * ancho + columnas
+    orden = np.argsort(celda, kind='stable')
+    celdas, inicios = np.unique(celda[orden], return_index=True)
+    return {
+        'latitudes': latitudes,
+        'longitudes': longitudes,
+        'tam': tam,
+        'ancho': ancho,
+        'celdas': celdas,
+        'inicios': np.append(inicios, len(orden)),
+        'posiciones': posiciones[orden],
+    }
+
+
+def cerca_de(grilla, latitud, longitud, radio_km):
+    """
+    Posiciones de los puntos a menos de radio_km de (latitud, longitud) y su distancia en km,
+    ordenadas de la más cercana a la más lejana. Solo se miden los puntos de las celdas que
+    cubre el radio.
+    """
+    tam, ancho = grilla['tam'], grilla['ancho']
+    dlat = radio_km / KM_POR_GRADO
+    coseno = np.cos(np.radians(latitud))
+    # Cerca de los polos o del antimeridiano se recorren todas las columnas de la grilla
+    dlon = 360.0 if coseno < 1e-6 else dlat / coseno
+    fila_celda, columna_celda = np.divmod(grilla['celdas'], ancho)
+    en_rango = ((fila_celda >= np.floor((latitud - dlat) / tam)) & (fila_celda <= np.floor((latitud + dlat) / tam)))
+    if -180 <= longitud - dlon and longitud + dlon <= 180:
+        en_rango &= ((columna_celda >= np.floor((longitud - dlon + 180) / tam))
+                     & (columna_celda <= np.floor((longitud + dlon + 180) / tam)))
+    indices = np.flatnonzero(en_rango)
+    if len(indices) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    # Concatena los tramos de las celdas en rango sin recorrerlas en Python
+    inicios = grilla['inicios'][indices]
+    largos = grilla['inicios'][indices + 1] - inicios
+    desplazamiento = np.repeat(inicios - (np.cumsum(largos) - largos), largos)
+    candidatos = grilla['posiciones'][desplazamiento + np.arange(largos.sum())]
+    distancias = distancia_km(latitud, longitud, grilla['latitudes'][candidatos], grilla['longitudes'][candidatos])
+    dentro = distancias <= radio_km
+    orden = np.argsort(distancias[dentro], kind='stable')
+    return candidatos[dentro][orden], distancias[dentro][orden]
+
+
+def mas_cercano(grilla, latitud, longitud, excluir=None):
+    """
+    (posición, distancia en km) del punto más cercano a (latitud, longitud), salteando la
+    posición 'excluir'; (None, None) si no hay otro punto. El radio de búsqueda empieza en una
+    celda y se duplica hasta encontrar alguno.
+    """
+    excluido = excluir is not None and bool(np.any(grilla['posiciones'] == excluir))
+    if len(grilla['posiciones']) - excluido <= 0:
+        return None, None
+    radio = grilla['tam'] * KM_POR_GRADO
+    while True:
+        posiciones, distancias = cerca_de(grilla, latitud, longitud, radio)
+        otros = posiciones != excluir
+        if otros.any():
+            return int(posiciones[otros][0]), float(distancias[otros][0])
+        radio *= 2
+
+
+def mas_cercanos(grilla, posiciones):
+    """
+    Para cada posición de 'posiciones' (con coordenadas en los arreglos de la grilla), el punto
+    de la grilla más cercano que no sea ella misma: (posiciones, distancias en km), con -1 y
+    NaN donde no hay ninguno.
+    """
+    cercanos = np.full(len(posiciones), -1, dtype=np.int64)
+    distancias = np.full(len(posiciones), np.nan)
+    for i, posicion in enumerate(posiciones):
+        cercano, distancia = mas_cercano(grilla, grilla['latitudes'][posicion], grilla['longitudes'][posicion],
+                                         excluir=posicion)
+        if cercano is not None:
+            cercanos[i], distancias[i] = cercano, distancia
+    return cercanos, distancias
+
+
+@st.cache_resource(max_entries=4)
+def indice_coordenadas(_serie, version):
+    """
+    parsear_coordenadas de `_serie` y la grilla espacial de sus puntos, una vez por versión de
+    datos y compartido entre sesiones. `_serie` no se hashea: `version` identifica los datos.
+    Devuelve {'coordenadas': DataFrame, 'grilla': ...}; las posiciones son las de `_serie`.
+    """
+    coordenadas = parsear_coordenadas(_serie)
+    return {
+        'coordenadas': coordenadas,
+        'grilla': construir_grilla(coordenadas['Latitud'], coordenadas['Longitud']),
+    }
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils.ingesta import leer_store, ruta_manifiesto
+from utils.schemas import RUTA_ESQUEMAS, aplicar_esquema, leer_csv_tipado, obtener_esquema
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque para calcular el hash del contenido sin leer todo el archivo en memoria
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+@st.cache_resource
+def _estado_cache():
+    """
+    Estado compartido entre todas las sesiones del servidor:
+    - 'firmas': ruta -> (mtime_ns, tamaño, hash) para no re-hashear archivos sin cambios.
+    - 'aciertos' / 'fallos': contadores por ruta.
+    """
+    return {'lock': threading.Lock(), 'firmas': {}, 'aciertos': {}, 'fallos': {}}
+
+
+def hash_archivo(ruta_archivo):
+    """Calcula el hash (blake2b) del contenido de un archivo."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def version_archivo(ruta_archivo):
+    """
+    Devuelve el hash del contenido del archivo.
+    Solo se vuelve a calcular cuando cambia el mtime o el tamaño del archivo.
+    """
+    stat = os.stat(ruta_archivo)
+    firma = (stat.st_mtime_ns, stat.st_size)
+    estado = _estado_cache()
+    with estado['lock']:
+        guardada = estado['firmas'].get(ruta_archivo)
+    if guardada is not None and guardada[:2] == firma:
+        return guardada[2]
+    contenido_hash = hash_archivo(ruta_archivo)
+    with estado['lock']:
+        estado['firmas'][ruta_archivo] = firma + (contenido_hash,)
+    return contenido_hash
+
+
+@st.cache_data(show_spinner="Leyendo archivo CSV...", max_entries=16)
+def _leer_csv(ruta_archivo, version):
+    # Solo se ejecuta en un fallo de caché: 'version' = (hash del contenido, esquema, hash de esquemas).
+    contenido_hash, esquema, _ = version
+    _registrar_fallo(ruta_archivo)
+    logger.info("Caché de datos: fallo para '%s' (hash %s), parseando CSV.", ruta_archivo, contenido_hash)
+    if esquema is None:
+        return pd.read_csv(ruta_archivo)
+    return leer_csv_tipado(ruta_archivo, obtener_esquema(esquema))
+
+
+def _registrar_fallo(ruta):
+    estado = _estado_cache()
+    with estado['lock']:
+        estado['fallos'][ruta] = estado['fallos'].get(ruta, 0) + 1
+
+
+def _leer_cacheado(lector, ruta, version):
+    """Llama al lector cacheado y cuenta un acierto si no hubo que volver a leer."""
+    estado = _estado_cache()
+    with estado['lock']:
+        fallos_previos = estado['fallos'].get(ruta, 0)
+    df = lector(ruta, version)
+    with estado['lock']:
+        if estado['fallos'].get(ruta, 0) == fallos_previos:
+            estado['aciertos'][ruta] = estado['aciertos'].get(ruta, 0) + 1
+            logger.debug("Caché de datos: acierto para '%s'.", ruta)
+    return df
+
+
+def _version_esquema(esquema):
+    """Parte de la clave de caché que depende del esquema (nombre y contenido de config/esquemas.toml)."""
+    return (esquema, version_archivo(RUTA_ESQUEMAS) if esquema is not None else None)
+
+
+def version_datos(ruta_archivo, esquema=None):
+    """
+    Versión de los datos que devuelve cargar_datos(ruta_archivo, esquema): hash del contenido,
+    nombre del esquema y hash de config/esquemas.toml. Sirve de clave para cachear resultados
+    derivados del DataFrame.
+    """
+    return (version_archivo(ruta_archivo),) + _version_esquema(esquema)
+
+
+def cargar_datos(ruta_archivo, esquema=None):
+    """
+    Carga datos desde un archivo CSV.
+    Con 'esquema' (nombre de un dataset de config/esquemas.toml) se leen solo las
+    columnas declaradas, con sus tipos compactos y las fechas ya parseadas.
+    El DataFrame parseado se comparte entre sesiones y solo se vuelve a leer
+    cuando cambia el contenido del archivo (mtime/tamaño y hash) o el esquema.
+    """
+    try:
+        return _leer_cacheado(_leer_csv, ruta_archivo, version_datos(ruta_archivo, esquema))
+    except FileNotFoundError:
+        st.error(
+            f"Error: El archivo '{ruta_archivo}' no fue encontrado. Asegúrate de que la ruta y el nombre sean correctos.")
+        return None
+    except Exception as e:
+        st.error(f"Ocurrió un error al cargar el CSV: {e}. Por favor, verifica el formato del archivo.")
+        return None
+
+
+@st.cache_data(show_spinner="Leyendo store consolidado...", max_entries=4)
+def _leer_store(ruta_store, version):
+    version_manifiesto, esquema, _ = version
+    _registrar_fallo(ruta_store)
+    logger.info("Caché de datos: fallo para el store '%s' (manifiesto %s).", ruta_store, version_manifiesto)
+    df = leer_store(ruta_store)
+    if df is None or esquema is None:
+        return df
+    return aplicar_esquema(df, obtener_esquema(esquema))
+
+
+def existe_store(ruta_store):
+    """Indica si hay un store consolidado (ver utils/ingesta.py) en 'ruta_store'."""
+    return os.path.exists(ruta_manifiesto(ruta_store))
+
+
+def cargar_store(ruta_store, esquema=None):
+    """
+    Carga el store consolidado de permisos (con el esquema indicado, como cargar_datos).
+    Se cachea por el hash del manifiesto, que solo cambia cuando una ingesta agrega filas.
+    """
+    try:
+        version = (version_archivo(ruta_manifiesto(ruta_store)),) + _version_esquema(esquema)
+        df = _leer_cacheado(_leer_store, ruta_store, version)
+        if df is None:
+            st.error(f"El store '{ruta_store}' no tiene datos. Ejecuta primero la ingesta de un snapshot.")
+        return df
+    except Exception as e:
+        st.error(f"Ocurrió un error al cargar el store '{ruta_store}': {e}.")
+        return None
+
+
+def estadisticas_cache(ruta_archivo=None):
+    """
+    Devuelve los aciertos y fallos de la caché de datos.
+    Si se indica 'ruta_archivo' devuelve solo los de ese archivo.
+    """
+    estado = _estado_cache()
+    with estado['lock']:
+        aciertos = dict(estado['aciertos'])
+        fallos = dict(estado['fallos'])
+    if ruta_archivo is not None:
+        return {'aciertos': aciertos.get(ruta_archivo, 0), 'fallos': fallos.get(ruta_archivo, 0)}
+    return {'aciertos': sum(aciertos.values()), 'fallos': sum(fallos.values())}
+
+
+def mostrar_estadisticas_cache(ruta_archivo):
+    """Muestra en la barra lateral los aciertos/fallos de la caché para el archivo indicado."""
+    stats = estadisticas_cache(ruta_archivo)
+    st.sidebar.caption(
+        f"Caché de datos ({os.path.basename(ruta_archivo)}): "
+        f"{stats['aciertos']} aciertos / {stats['fallos']} lecturas")
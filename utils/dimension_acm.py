@@ -0,0 +1,220 @@
+"""
+Dimensión canónica de ACMs (Áreas de Caza Mayor) compartida por los tres datasets. Cada
+formulario escribe el nombre a su manera ("Ea. Lago Machonico", "Lago Machónico", "Estancia
+Casa de Lata (Criadero)", "Donap SRl"...), así que se arma una clave normalizada por valor
+distinto y un índice valor -> id que se calcula una vez por versión de los datos. Los
+cruces entre datasets son hash joins contra ese índice: cada columna se factoriza, solo sus
+valores distintos se buscan en el índice y las filas se expanden con los códigos.
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.multi_hot import entradas
+from utils.text import normalize_series
+
+# Palabras que describen el tipo de establecimiento, la modalidad o la forma societaria y no
+# distinguen un ACM de otro ("Estancia Huechahue" = "Huechahue", "Calcatre S.A." = "Calcatre")
+PALABRAS_GENERICAS = r'estancias?|ea|es|establecimiento|acm|criadero|libre|safaris|sa y f|sa|srl'
+# Artículos al principio del nombre ("La Belisle" = "Estancia Belisle")
+ARTICULOS = r'el|la|los|las|del'
+ARTICULOS_INICIALES = rf'(?:(?:{ARTICULOS})\s+)+'
+
+# Nombre de las fuentes en la tabla de la dimensión
+FUENTE_PERMISOS = 'Permisos'
+FUENTE_GUIAS = 'Guías de traslado'
+FUENTE_ESTABLECIMIENTOS = 'Establecimientos'
+
+# Estado de cada especie en el cruce solicitadas/trasladadas
+SOLICITADA_Y_TRASLADADA = 'Solicitada y trasladada'
+SOLICITADA_SIN_TRASLADOS = 'Solicitada sin traslados'
+TRASLADADA_SIN_SOLICITUD = 'Trasladada sin solicitud'
+
+
+def clave_acm(serie):
+    """
+    Clave de comparación de cada valor de `serie`: normalize_series, signos como espacios,
+    sin PALABRAS_GENERICAS, letras sueltas ni artículos iniciales. Si solo queda un artículo
+    ("La Estancia") se usa el nombre completo. Los nulos dan "".
+    Solo se procesan los valores distintos.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    normalizados = (normalize_series(pd.Series(np.asarray(uniques, dtype=object), dtype=object))
+                    .str.replace(r'[^a-z0-9]+', ' ', regex=True))
+    claves = (normalizados
+              .str.replace(rf'\b(?:{PALABRAS_GENERICAS})\b', ' ', regex=True)
+              .str.replace(r'\b[a-z]\b', ' ', regex=True)
+              .str.replace(r'\s+', ' ', regex=True).str.strip()
+              .str.replace(rf'^{ARTICULOS_INICIALES}', '', regex=True))
+    solo_articulo = claves.str.fullmatch(ARTICULOS)
+    claves = claves.where(~solo_articulo, normalizados.str.replace(r'\s+', ' ', regex=True).str.strip())
+    claves = np.append(claves.to_numpy(dtype=object), "")
+    return pd.Series(claves[codes], index=serie.index, name=serie.name, dtype=object)
+
+
+def _unir_prefijos(claves):
+    """
+    Clave -> clave canónica: una clave cuyo comienzo (en palabras completas) es otra clave
+    se une a la más corta cuando no hay ambigüedad: el prefijo tiene más de una palabra o es
+    la única clave que lo extiende ("sihuen cinag" -> "sihuen"). Un prefijo de una palabra
+    con varias extensiones no absorbe ninguna ("cerro bayo" y "cerro negro" quedan aparte).
+    """
+    existentes = set(claves)
+    extensiones = Counter(clave.split()[0] for clave in existentes if len(clave.split()) > 1)
+    canonica = {}
+    for clave in sorted(existentes, key=lambda c: (len(c.split()), c)):
+        palabras = clave.split()
+        canonica[clave] = next((canonica[prefijo] for prefijo in
+                                (' '.join(palabras[:k]) for k in range(1, len(palabras)))
+                                if prefijo in existentes and (' ' in prefijo or extensiones[prefijo] == 1)),
+                               clave)
+    return canonica
+
+
+def construir_dimension(fuentes):
+    """
+    Dimensión de ACMs a partir de {fuente: serie de nombres de ACM}.
+
+    Devuelve un dict con:
+    - 'tabla': DataFrame id/nombre (la variante más frecuente)/clave/variantes y la
+      cantidad de registros de cada fuente, ordenado por clave (el id es la posición);
+    - 'por_valor': Series valor original (sin espacios extremos) -> id;
+    - 'por_clave': Series clave (la canónica y la de cada variante) -> id, para valores que
+      no estaban al construirla.
+    """
+    registros = []
+    for fuente, serie in fuentes.items():
+        # Se cuenta por valor crudo (las categorías sin filas no cuentan) y solo los valores distintos se limpian
+        conteo = serie.value_counts()
+        conteo = conteo.groupby(conteo.index.astype(str).str.strip()).sum()
+        conteo = conteo[(conteo.index != '') & (conteo > 0)]
+        registros.append(pd.DataFrame({'fuente': fuente, 'valor': conteo.index, 'registros': conteo.to_numpy()}))
+    detalle = pd.concat(registros, ignore_index=True)
+    detalle['clave'] = clave_acm(detalle['valor'])
+    detalle = detalle[detalle['clave'] != '']
+    detalle['clave_variante'] = detalle['clave']
+    canonica = _unir_prefijos(detalle['clave'].unique())
+    detalle['clave'] = detalle['clave'].map(canonica)
+
+    # Nombre de cada ACM: la variante con más registros entre todas las fuentes
+    por_variante = detalle.groupby(['clave', 'valor'], sort=False)['registros'].sum().reset_index()
+    nombres = (por_variante.sort_values(['clave', 'registros', 'valor'], ascending=[True, False, True])
+               .drop_duplicates('clave').set_index('clave')['valor'])
+    tabla = nombres.rename('nombre').reset_index().sort_values('clave')
+    tabla.insert(0, 'id', np.arange(len(tabla)))
+    por_clave = pd.Series(tabla['id'].to_numpy(), index=pd.Index(tabla['clave']))
+
+    detalle['id'] = por_clave.loc[detalle['clave']].to_numpy()
+    variantes = detalle.drop_duplicates(['id', 'valor']).sort_values(['id', 'valor']).groupby('id')['valor']
+    tabla['variantes'] = variantes.agg(list).reindex(tabla['id']).to_numpy()
+    conteos_fuente = detalle.pivot_table(index='id', columns='fuente', values='registros', aggfunc='sum',
+                                         fill_value=0)
+    for fuente in fuentes:
+        columna = conteos_fuente[fuente] if fuente in conteos_fuente else pd.Series(dtype=np.int64)
+        tabla[fuente] = columna.reindex(tabla['id'], fill_value=0).to_numpy(dtype=np.int64)
+
+    por_valor = detalle.drop_duplicates('valor').set_index('valor')['id']
+    # Las claves de las variantes también van al índice: ids_acm une los valores nuevos contra
+    # todas las claves, con las mismas extensiones que vio la construcción
+    por_clave = pd.concat([por_clave, detalle.drop_duplicates('clave_variante').set_index('clave_variante')['id']])
+    por_clave = por_clave[~por_clave.index.duplicated()]
+    return {'tabla': tabla.reset_index(drop=True), 'por_valor': por_valor, 'por_clave': por_clave}
+
+
+@st.cache_resource(show_spinner="Armando la dimensión de ACMs...", max_entries=4)
+def dimension_acm(_fuentes, version):
+    """
+    construir_dimension de `_fuentes`, una vez por versión de datos y compartida entre sesiones.
+    `_fuentes` no se hashea: `version` (las versiones de las tres fuentes) identifica los datos.
+    """
+    return construir_dimension(_fuentes)
+
+
+def ids_acm(dimension, serie):
+    """
+    Id de ACM de cada fila de `serie` (-1 si está vacía o no es un ACM de la dimensión).
+    Los valores distintos se buscan en el índice de valores; los que no están, por su clave.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    valores = pd.Index(pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str).str.strip())
+    posiciones = dimension['por_valor'].index.get_indexer(valores)
+    ids = np.where(posiciones >= 0, dimension['por_valor'].to_numpy()[posiciones], -1)
+    faltantes = np.flatnonzero(posiciones < 0)
+    if len(faltantes):
+        claves = clave_acm(pd.Series(valores[faltantes], dtype=object))
+        claves = claves.map(_unir_prefijos(list(dimension['por_clave'].index) + list(claves.unique())))
+        por_clave = dimension['por_clave'].index.get_indexer(claves)
+        ids[faltantes] = np.where(por_clave >= 0, dimension['por_clave'].to_numpy()[np.maximum(por_clave, 0)], -1)
+    # Un valor extra al final: los nulos (código -1) no tienen ACM
+    return np.append(ids, -1)[codes]
+
+
+def registros_por_acm(dimension, serie, nombre='Registros'):
+    """Cantidad de filas de `serie` por id de ACM (una columna `nombre` indexada por id)."""
+    ids = ids_acm(dimension, serie)
+    cantidades = np.bincount(ids[ids >= 0], minlength=len(dimension['tabla']))
+    return pd.Series(cantidades, index=pd.RangeIndex(len(cantidades), name='id'), name=nombre)
+
+
+def cruce_registros(dimension, series):
+    """
+    Tabla ACM x fuente con la cantidad de registros de cada serie de {columna: serie}: las
+    series se unen a la dimensión por id y quedan solo los ACMs con algún registro.
+    """
+    tabla = dimension['tabla'][['id', 'nombre']]
+    for columna, serie in series.items():
+        tabla = tabla.join(registros_por_acm(dimension, serie, columna), on='id')
+    return tabla[tabla[list(series)].sum(axis=1) > 0].reset_index(drop=True)
+
+
+def clave_especie(serie):
+    """
+    Clave de una especie: sin el nombre científico entre paréntesis, normalizada, sin guiones
+    ni el "europeo" final ("Jabalí (Sus scrofa)" = "Jabalí Europeo", "Oveja multi-cuernos" =
+    "Oveja multicuernos").
+    """
+    sin_cientifico = serie.astype(str).str.replace(r'\(.*?\)', ' ', regex=True)
+    return (normalize_series(sin_cientifico)
+            .str.replace('-', '', regex=False)
+            .str.replace(r'\s+europeo\s*$', '', regex=True)
+            .str.replace(r'\s+', ' ', regex=True).str.strip())
+
+
+def especies_por_acm(dimension, serie_acm, indice_especies):
+    """
+    Pares (id de ACM, especie) marcados en el índice multi-hot `indice_especies` (ver
+    utils/multi_hot.py), con la cantidad de filas de cada par. Columnas id/clave_especie/
+    especie (nombre sin el científico)/filas.
+    """
+    ids = ids_acm(dimension, serie_acm)
+    filas, opciones = entradas(indice_especies)
+    claves = clave_especie(pd.Series(indice_especies['opciones'], dtype=object))
+    nombres = pd.Series(indice_especies['opciones'], dtype=object).str.replace(r'\(.*?\)', '', regex=True).str.strip()
+    pares = pd.DataFrame({'id': ids[filas], 'clave_especie': claves.to_numpy()[opciones],
+                          'especie': nombres.to_numpy()[opciones]})
+    pares = pares[(pares['id'] >= 0) & (pares['clave_especie'] != '')]
+    return (pares.groupby(['id', 'clave_especie'], sort=False)
+            .agg(especie=('especie', 'first'), filas=('especie', 'size')).reset_index())
+
+
+def cruce_especies(dimension, solicitadas, trasladadas):
+    """
+    Especies solicitadas (establecimientos) contra especies trasladadas (guías) por ACM: outer
+    join de los dos especies_por_acm por (id, especie). Columnas ACM/Especie/Solicitada
+    (filas de la inscripción que la marcan)/Guías de traslado/Estado.
+    """
+    cruce = solicitadas.merge(trasladadas, on=['id', 'clave_especie'], how='outer',
+                              suffixes=('_solicitada', '_trasladada'))
+    # Un solo nombre por especie, el de las guías si está ("Jabalí" y no "Jabalí Europeo")
+    nombres = pd.concat([trasladadas, solicitadas]).drop_duplicates('clave_especie')
+    cruce['Especie'] = cruce['clave_especie'].map(nombres.set_index('clave_especie')['especie'])
+    cruce['Solicitada'] = cruce['filas_solicitada'].fillna(0).astype(np.int64)
+    cruce['Guías de traslado'] = cruce['filas_trasladada'].fillna(0).astype(np.int64)
+    cruce['Estado'] = np.select(
+        [(cruce['Solicitada'] > 0) & (cruce['Guías de traslado'] > 0), cruce['Solicitada'] > 0],
+        [SOLICITADA_Y_TRASLADADA, SOLICITADA_SIN_TRASLADOS], TRASLADADA_SIN_SOLICITUD)
+    cruce = cruce.join(dimension['tabla'].set_index('id')['nombre'].rename('ACM'), on='id')
+    return (cruce.sort_values(['ACM', 'Guías de traslado', 'Especie'], ascending=[True, False, True])
+            [['ACM', 'Especie', 'Solicitada', 'Guías de traslado', 'Estado']].reset_index(drop=True))
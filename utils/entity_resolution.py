@@ -0,0 +1,291 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.text import normalize_series
+
+# Similitud de Jaccard mínima (sobre trigramas de caracteres) para unir dos nombres
+UMBRAL_SIMILITUD = 0.6
+# Bloqueo MinHash-LSH: 10 bandas de 3 valores -> candidato con prob. ~1/2 a Jaccard 0.46
+BANDAS_LSH = 10
+FILAS_POR_BANDA = 3
+# Los bloques más grandes que esto se descartan (nombres repetidos muchas veces ya colapsan en la clave)
+MAX_BLOQUE = 500
+# Los candidatos con similitud estimada (MinHash) por debajo de umbral - margen no se verifican
+MARGEN_ESTIMACION = 0.2
+# Celdas (claves x trigramas) de la matriz de pertenencia que se arma por lote al verificar (16 MB)
+MAX_CELDAS_VERIFICACION = 1 << 24
+
+_MEZCLA = np.array([0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F, 0x165667B1, 0xD3A2646C], dtype=np.int64)
+
+
+def clave_tokens(serie):
+    """
+    Clave de comparación por valor: texto normalizado con las palabras ordenadas,
+    para que "Roa Octavio" y "Octavio Roa" coincidan. Los nulos dan "".
+    """
+    normalizados = normalize_series(serie)
+    codes, uniques = pd.factorize(normalizados)
+    claves = np.array([' '.join(sorted(valor.split())) for valor in uniques], dtype=object)
+    return pd.Series(claves[codes], index=serie.index, name=serie.name, dtype=object)
+
+
+def _trigramas(claves):
+    """
+    Trigramas de caracteres de cada clave en formato CSR: (offsets, ids de trigrama).
+    Se extraen columna a columna con operaciones vectorizadas de pandas.
+    """
+    textos = pd.Series([f"  {c} " for c in claves], dtype=object)
+    largos = textos.str.len().to_numpy()
+    filas, trigramas = [], []
+    for inicio in range(int(largos.max(initial=0)) - 2):
+        validas = np.flatnonzero(largos - 2 > inicio)
+        filas.append(validas)
+        trigramas.append(textos.iloc[validas].str.slice(inicio, inicio + 3).to_numpy(dtype=object))
+    if not filas:
+        return np.zeros(len(claves) + 1, dtype=np.int64), np.empty(0, dtype=np.int64)
+    filas = np.concatenate(filas)
+    ids, _ = pd.factorize(np.concatenate(trigramas))
+    # Conjunto (sin repetidos) de trigramas por clave, ordenado por clave
+    pares = np.unique(filas.astype(np.int64) * (ids.max() + 1) + ids)
+    filas, ids = np.divmod(pares, ids.max() + 1)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(filas, minlength=len(claves)))])
+    return offsets, ids
+
+
+def _firmas_minhash(offsets, ids, n_hashes, seed=0):
+    """Firma MinHash (n_hashes mínimos) de cada conjunto de trigramas."""
+    rng = np.random.default_rng(seed)
+    primo = np.int64((1 << 31) - 1)
+    a = rng.integers(1, primo, size=n_hashes, dtype=np.int64)
+    b = rng.integers(0, primo, size=n_hashes, dtype=np.int64)
+    vocabulario = np.arange(ids.max(initial=0) + 1, dtype=np.int64)
+    hashes = (a[:, None] * vocabulario[None, :] + b[:, None]) % primo  # (n_hashes, vocabulario)
+    # Los valores son < 2**31: uint32 alcanza y reduce a la mitad la memoria de las firmas
+    return np.minimum.reduceat(hashes[:, ids], offsets[:-1], axis=1).T.astype(np.uint32)  # (claves, n_hashes)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.padre = np.arange(n)
+
+    def buscar(self, i):
+        raiz = i
+        while self.padre[raiz] != raiz:
+            raiz = self.padre[raiz]
+        while self.padre[i] != raiz:
+            self.padre[i], i = raiz, self.padre[i]
+        return raiz
+
+    def unir(self, i, j):
+        ri, rj = self.buscar(i), self.buscar(j)
+        if ri != rj:
+            self.padre[max(ri, rj)] = min(ri, rj)
+
+    def raices(self):
+        return np.array([self.buscar(i) for i in range(len(self.padre))], dtype=np.int64)
+
+
+def _pares_en_bloques(grupo, max_bloque):
+    """
+    Todos los pares (i < j) de elementos con el mismo valor en `grupo`, codificados
+    como i * n + j. Se generan por tamaño de bloque con triu_indices, sin recorrer
+    los bloques uno a uno.
+    """
+    n = len(grupo)
+    orden = np.argsort(grupo, kind='stable')
+    inicios = np.flatnonzero(np.r_[True, np.diff(grupo[orden]) != 0])
+    tamanos = np.diff(np.r_[inicios, n])
+    pares = [np.empty(0, dtype=np.int64)]
+    for tamano in np.unique(tamanos[(tamanos > 1) & (tamanos <= max_bloque)]):
+        bloques = inicios[tamanos == tamano]
+        fi, fj = np.triu_indices(tamano, k=1)
+        i = orden[bloques[:, None] + fi[None, :]].ravel().astype(np.int64)
+        j = orden[bloques[:, None] + fj[None, :]].ravel().astype(np.int64)
+        pares.append(np.minimum(i, j) * n + np.maximum(i, j))
+    return np.concatenate(pares)
+
+
+def pares_similares(claves, umbral=UMBRAL_SIMILITUD, bandas=BANDAS_LSH, filas_banda=FILAS_POR_BANDA,
+                    max_bloque=MAX_BLOQUE):
+    """
+    Pares (i, j) de claves distintas con Jaccard de trigramas >= umbral.
+
+    Bloqueo por trigramas con MinHash-LSH: la firma de cada clave se parte en
+    `bandas` bandas de `filas_banda` valores y solo se comparan las claves que
+    coinciden en alguna banda completa (la probabilidad de ser candidato crece
+    con la similitud y ronda 1/2 en (1/bandas)^(1/filas_banda)). Así se evita
+    comparar todos contra todos. Los candidatos se verifican con el Jaccard exacto.
+    """
+    n = len(claves)
+    if n < 2:
+        return []
+    offsets, ids = _trigramas(claves)
+    firmas = _firmas_minhash(offsets, ids, bandas * filas_banda)
+
+    candidatos = []
+    for banda in range(bandas):
+        # Clave de la banda: combinación de sus valores en un entero (las colisiones se descartan al verificar)
+        bloque = firmas[:, banda * filas_banda:(banda + 1) * filas_banda]
+        grupo = (bloque.astype(np.int64) * _MEZCLA[:filas_banda]).sum(axis=1)
+        candidatos.append(_pares_en_bloques(grupo, max_bloque))
+    candidatos = np.unique(np.concatenate(candidatos))
+
+    # Descarte vectorizado con la similitud estimada por la firma completa; solo los que
+    # quedan cerca del umbral se verifican con el Jaccard exacto.
+    primeros, segundos = np.divmod(candidatos, n)
+    coincidencias = np.zeros(len(candidatos), dtype=np.int16)
+    for columna in np.asfortranarray(firmas).T:
+        coincidencias += columna[primeros] == columna[segundos]
+    cerca = coincidencias >= (umbral - MARGEN_ESTIMACION) * firmas.shape[1]
+    primeros, segundos = primeros[cerca], segundos[cerca]
+
+    largos = np.diff(offsets)
+    comunes = _trigramas_comunes(offsets, ids, primeros, segundos)
+    similares = comunes >= umbral * (largos[primeros] + largos[segundos] - comunes)
+    return list(zip(primeros[similares].tolist(), segundos[similares].tolist()))
+
+
+def _expandir(offsets, ids, filas):
+    """Trigramas de cada fila de `filas` (CSR): (índice en `filas`, id de trigrama)."""
+    cantidad = np.diff(offsets)[filas]
+    indices = np.repeat(np.arange(len(filas)), cantidad)
+    posiciones = np.arange(cantidad.sum()) + np.repeat(offsets[filas] - (np.cumsum(cantidad) - cantidad), cantidad)
+    return indices, ids[posiciones]
+
+
+def _trigramas_comunes(offsets, ids, primeros, segundos, max_celdas=MAX_CELDAS_VERIFICACION):
+    """
+    Cantidad de trigramas en común de cada par (primeros[k], segundos[k]); `primeros` ordenado.
+
+    Por lote de claves `primeros` se arma una matriz booleana clave x trigrama y se
+    consultan en ella los trigramas de cada `segundos`. El lote se elige para que la
+    matriz no supere `max_celdas` celdas.
+    """
+    vocabulario = ids.max(initial=0) + 1
+    filas = np.unique(primeros)
+    por_lote = max(1, max_celdas // vocabulario)
+    comunes = np.zeros(len(primeros), dtype=np.int64)
+    for inicio in range(0, len(filas), por_lote):
+        filas_lote = filas[inicio:inicio + por_lote]
+        desde, hasta = np.searchsorted(primeros, [filas_lote[0], filas_lote[-1] + 1])
+        pertenencia = np.zeros((len(filas_lote), vocabulario), dtype=bool)
+        pertenencia[_expandir(offsets, ids, filas_lote)] = True
+        locales = np.searchsorted(filas_lote, primeros[desde:hasta])
+        pares, trigramas = _expandir(offsets, ids, segundos[desde:hasta])
+        comunes[desde:hasta] = np.bincount(pares, weights=pertenencia[locales[pares], trigramas],
+                                           minlength=hasta - desde)
+    return comunes
+
+
+def _canonicos(serie, codigos_grupo):
+    """Por grupo, el valor original (sin espacios extremos) más frecuente."""
+    originales = serie.astype(object).where(serie.notna(), None)
+    tabla = pd.DataFrame({'grupo': codigos_grupo, 'valor': originales.str.strip()})
+    tabla = tabla[tabla['grupo'] >= 0].dropna(subset=['valor'])
+    frecuentes = (tabla.groupby(['grupo', 'valor'], sort=False).size()
+                  .reset_index(name='n').sort_values(['grupo', 'n', 'valor'], ascending=[True, False, True]))
+    return frecuentes.drop_duplicates('grupo').set_index('grupo')['valor']
+
+
+def _numerar(raices_por_fila, serie):
+    """
+    Convierte las raíces en IDs canónicos 0..k-1 ordenados por nombre canónico,
+    para que el ID no dependa del orden de las filas. Devuelve (ids, tabla).
+    """
+    grupos, inversos = np.unique(raices_por_fila, return_inverse=True)
+    inversos = np.where(raices_por_fila < 0, -1, inversos)
+    if grupos.size and grupos[0] < 0:
+        inversos = np.where(inversos >= 0, inversos - 1, -1)
+    nombres = _canonicos(serie, inversos)
+    orden = nombres.sort_values(kind='stable').index.to_numpy()
+    nuevo_id = np.full(len(grupos) + 1, -1)
+    nuevo_id[orden] = np.arange(len(orden))
+    ids = nuevo_id[inversos]
+    tabla = pd.DataFrame({'id': np.arange(len(orden)), 'nombre': nombres.loc[orden].to_numpy()})
+    return ids, tabla
+
+
+def resolver_nombres(serie, umbral=UMBRAL_SIMILITUD):
+    """
+    Agrupa variantes de un mismo nombre (orden de palabras, tildes, mayúsculas
+    y errores de tipeo menores).
+
+    Devuelve (ids, tabla):
+    - ids: arreglo con el ID canónico de cada fila (-1 para vacíos).
+    - tabla: DataFrame id/nombre canónico/variantes/registros.
+    Todo el trabajo se hace sobre los valores distintos, no sobre las filas.
+    """
+    claves = clave_tokens(serie)
+    codes, uniques = pd.factorize(claves)
+    uf = _UnionFind(len(uniques))
+    for i, j in pares_similares(list(uniques), umbral):
+        uf.unir(i, j)
+    raices = uf.raices()
+    raices_por_fila = np.where(claves.to_numpy() == "", -1, raices[codes])
+    ids, tabla = _numerar(raices_por_fila, serie)
+    return ids, _completar_tabla(tabla, ids, serie)
+
+
+def _normalizar_documento(serie):
+    """Solo letras y dígitos, en minúsculas (quita puntos, guiones y espacios del DNI/pasaporte)."""
+    return normalize_series(serie).str.replace(r'[^a-z0-9]', '', regex=True)
+
+
+def resolver_personas(nombres, documentos, umbral=UMBRAL_SIMILITUD):
+    """
+    Agrupa registros de una misma persona:
+    - mismo documento normalizado => misma persona;
+    - nombres similares (ver resolver_nombres) => misma persona solo si a alguno
+      de los dos le falta el documento o los documentos coinciden; dos nombres
+      parecidos con documentos distintos se consideran personas distintas.
+    Devuelve (ids, tabla) como resolver_nombres.
+    """
+    ids_nombre, _ = resolver_nombres(nombres, umbral)
+    docs = _normalizar_documento(documentos).to_numpy(dtype=object)
+    tiene_doc = docs != ""
+
+    # Registro -> entidad: primero por documento, después por nombre para los que no tienen
+    claves_doc, _ = pd.factorize(pd.Series(np.where(tiene_doc, docs, None), dtype=object), use_na_sentinel=True)
+    n_doc = claves_doc.max(initial=-1) + 1
+    uf = _UnionFind(n_doc + ids_nombre.max(initial=-1) + 1)
+    nodo = np.where(tiene_doc, claves_doc, np.where(ids_nombre >= 0, n_doc + ids_nombre, -1))
+
+    # Un documento se une al grupo de nombre solo si ese grupo tiene un único documento distinto
+    con_ambos = tiene_doc & (ids_nombre >= 0)
+    docs_por_nombre = (pd.DataFrame({'nombre': ids_nombre[con_ambos], 'doc': claves_doc[con_ambos]})
+                       .drop_duplicates().groupby('nombre')['doc'])
+    for id_nombre, docs_grupo in docs_por_nombre:
+        if docs_grupo.size == 1:
+            uf.unir(docs_grupo.iloc[0], n_doc + id_nombre)
+
+    # El -1 agregado al final hace que las filas sin nodo (nodo == -1) queden en -1, aun sin nodos
+    raices_por_fila = np.r_[uf.raices(), -1][nodo]
+    ids, tabla = _numerar(raices_por_fila, nombres)
+    return ids, _completar_tabla(tabla, ids, nombres)
+
+
+def _completar_tabla(tabla, ids, serie):
+    """Agrega a la tabla de entidades las variantes originales y la cantidad de registros."""
+    validos = ids >= 0
+    detalle = pd.DataFrame({'id': ids[validos], 'valor': serie.astype(object).to_numpy()[validos]})
+    detalle['valor'] = detalle['valor'].astype(str).str.strip()
+    registros = np.bincount(detalle['id'].to_numpy(), minlength=len(tabla))
+    # Variantes distintas por entidad, ordenadas, sin un groupby por grupo
+    detalle = detalle.drop_duplicates().sort_values(['id', 'valor'])
+    cortes = np.flatnonzero(np.diff(detalle['id'].to_numpy())) + 1
+    tabla['variantes'] = [list(v) for v in np.split(detalle['valor'].to_numpy(), cortes)] if len(detalle) else []
+    tabla['registros'] = registros
+    return tabla
+
+
+@st.cache_data(show_spinner="Agrupando nombres similares...", max_entries=8)
+def entidades_guias(_serie, version):
+    """resolver_nombres cacheado por versión de datos (`_serie` no se hashea)."""
+    return resolver_nombres(_serie)
+
+
+@st.cache_data(show_spinner="Agrupando cazadores...", max_entries=8)
+def entidades_personas(_nombres, _documentos, version):
+    """resolver_personas cacheado por versión de datos."""
+    return resolver_personas(_nombres, _documentos)
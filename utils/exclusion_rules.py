@@ -0,0 +1,118 @@
+import time
+import tomllib
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from utils.text import normalize_series
+
+TIPOS_REGLA = ('nulo', 'rango_fechas', 'valores', 'vacio')
+NORMALIZACIONES = ('minusculas', 'texto')
+
+
+def cargar_reglas(ruta_config):
+    """
+    Lee las reglas de exclusión desde un archivo TOML (lista `[[regla]]`)
+    y valida que cada una tenga los campos que su tipo necesita.
+    """
+    with open(ruta_config, 'rb') as f:
+        reglas = tomllib.load(f).get('regla', [])
+    for regla in reglas:
+        nombre = regla.get('nombre', '?')
+        if regla.get('tipo') not in TIPOS_REGLA:
+            raise ValueError(f"Regla '{nombre}': tipo '{regla.get('tipo')}' no soportado ({', '.join(TIPOS_REGLA)}).")
+        if 'columna' not in regla:
+            raise ValueError(f"Regla '{nombre}': falta 'columna'.")
+        if regla['tipo'] == 'rango_fechas' and not ('desde' in regla and 'hasta' in regla):
+            raise ValueError(f"Regla '{nombre}': 'rango_fechas' necesita 'desde' y 'hasta'.")
+        if regla['tipo'] == 'valores' and 'valores' not in regla:
+            raise ValueError(f"Regla '{nombre}': 'valores' necesita la lista 'valores'.")
+        if regla['tipo'] in ('valores', 'vacio') and regla.get('normalizacion', 'minusculas') not in NORMALIZACIONES:
+            raise ValueError(f"Regla '{nombre}': normalización '{regla.get('normalizacion')}' no soportada.")
+    return reglas
+
+
+def _normalizar(serie, normalizacion):
+    """Normaliza solo los valores distintos; devuelve (códigos, valores normalizados)."""
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    if normalizacion == 'texto':
+        normalizados = normalize_series(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        valor_nulo = ""
+    else:
+        normalizados = pd.Series(uniques, dtype=object).astype(str).str.lower().str.strip().to_numpy(dtype=object)
+        valor_nulo = "nan"  # igual que astype(str) sobre NaN
+    return codes, np.append(normalizados, valor_nulo)
+
+
+def _mascara_regla(df, regla, normalizadas):
+    """Devuelve la máscara booleana (numpy) de las filas que la regla excluye."""
+    serie = df[regla['columna']]
+    tipo = regla['tipo']
+    if tipo == 'nulo':
+        return serie.isna().to_numpy()
+    if tipo == 'rango_fechas':
+        valores = serie.to_numpy(dtype='datetime64[ns]')
+        desde = np.datetime64(pd.Timestamp(regla['desde']))
+        hasta = np.datetime64(pd.Timestamp(regla['hasta']))
+        return (valores >= desde) & (valores <= hasta)
+
+    codes, normalizados = _normalizar(serie, regla.get('normalizacion', 'minusculas'))
+    if regla.get('columna_normalizada'):
+        normalizadas[regla['columna_normalizada']] = (codes, normalizados)
+    if tipo == 'valores':
+        excluir_unicos = np.isin(normalizados, list(regla['valores']))
+    else:
+        excluir_unicos = normalizados == ""
+    return excluir_unicos[codes]
+
+
+def aplicar_reglas(df, reglas, medir_memoria=True):
+    """
+    Evalúa todas las reglas sobre `df`, las combina en una sola máscara y filtra
+    el DataFrame una única vez (sin copias intermedias por regla).
+
+    Devuelve (df_filtrado, reporte, omitidas):
+    - reporte: DataFrame con filas excluidas, tiempo y memoria pico por regla.
+    - omitidas: reglas cuya columna no existe en `df`.
+    """
+    excluir = np.zeros(len(df), dtype=bool)
+    normalizadas = {}
+    filas_reporte = []
+    omitidas = []
+
+    for regla in reglas:
+        if regla['columna'] not in df.columns:
+            omitidas.append(regla)
+            continue
+        if medir_memoria:
+            ya_activo = tracemalloc.is_tracing()
+            if not ya_activo:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        mascara = _mascara_regla(df, regla, normalizadas)
+        np.logical_or(excluir, mascara, out=excluir)
+        duracion = time.perf_counter() - inicio
+        memoria_pico = None
+        if medir_memoria:
+            memoria_pico = tracemalloc.get_traced_memory()[1] - memoria_inicial
+            if not ya_activo:
+                tracemalloc.stop()
+        filas_reporte.append({
+            'Regla': regla.get('nombre', regla['columna']),
+            'Columna': regla['columna'],
+            'Filas excluidas': int(mascara.sum()),
+            'Tiempo (ms)': round(duracion * 1000, 2),
+            'Memoria pico (KB)': round(memoria_pico / 1024, 1) if memoria_pico is not None else None,
+        })
+
+    posiciones = np.flatnonzero(~excluir)
+    df_filtrado = df.take(posiciones)
+    for columna, (codes, normalizados) in normalizadas.items():
+        df_filtrado[columna] = normalizados[codes[posiciones]]
+
+    reporte = pd.DataFrame(filas_reporte, columns=['Regla', 'Columna', 'Filas excluidas', 'Tiempo (ms)',
+                                                   'Memoria pico (KB)'])
+    return df_filtrado, reporte, omitidas
@@ -0,0 +1,240 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+
+
+# --- Función para crear botón de descarga a Excel ---
+def to_excel(df):
+    """
+    Convierte un DataFrame a formato Excel (BytesIO) para descarga.
+    """
+    output = BytesIO()
+    # Asegúrate de que xlsxwriter está instalado y en requirements.txt
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    df.to_excel(writer, index=False, sheet_name='Sheet1')
+    writer.close()
+    processed_data = output.getvalue()
+    return processed_data
+
+
+def to_csv(df):
+    """Convierte un DataFrame a CSV (UTF-8) para descarga."""
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def to_parquet(df):
+    """Convierte un DataFrame a Parquet (requiere pyarrow) para descarga."""
+    output = BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+# --- Exportación en streaming (memoria constante) ---
+# Filas por bloque al recorrer el DataFrame
+TAMANO_BLOQUE_STREAMING = 50_000
+# Límite de filas de una hoja de Excel (sin contar el encabezado)
+FILAS_MAXIMAS_HOJA_EXCEL = 1_048_575
+
+
+def _bloques(df, tamano_bloque):
+    for inicio in range(0, len(df), tamano_bloque):
+        yield df.iloc[inicio:inicio + tamano_bloque]
+
+
+def _escribir_excel_streaming(df, archivo, tamano_bloque):
+    """
+    Escribe el DataFrame fila a fila con el modo 'constant_memory' de xlsxwriter:
+    cada fila se vuelca a disco al escribirse, así la memoria no crece con el tamaño.
+    Si se supera el límite de filas de Excel se continúa en una hoja nueva.
+    """
+    workbook = xlsxwriter.Workbook(archivo, {'constant_memory': True, 'default_date_format': 'dd/mm/yyyy'})
+    encabezado = [str(col) for col in df.columns]
+    hoja, fila = None, FILAS_MAXIMAS_HOJA_EXCEL + 1
+    for bloque in _bloques(df, tamano_bloque):
+        # NaN/NaT -> celda vacía (xlsxwriter no acepta NaN)
+        bloque = bloque.astype(object).where(bloque.notna(), None)
+        for valores in bloque.itertuples(index=False, name=None):
+            if fila > FILAS_MAXIMAS_HOJA_EXCEL:
+                hoja = workbook.add_worksheet(f'Sheet{len(workbook.worksheets()) + 1}')
+                hoja.write_row(0, 0, encabezado)
+                fila = 1
+            hoja.write_row(fila, 0, valores)
+            fila += 1
+    if hoja is None:
+        workbook.add_worksheet('Sheet1').write_row(0, 0, encabezado)
+    workbook.close()
+
+
+def _escribir_csv_streaming(df, archivo, tamano_bloque):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+    df.head(0).to_csv(texto, index=False)
+    for bloque in _bloques(df, tamano_bloque):
+        bloque.to_csv(texto, index=False, header=False)
+    texto.flush()
+    texto.detach()  # no cerrar el archivo subyacente
+
+
+def _escribir_parquet_streaming(df, archivo, tamano_bloque):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # El esquema se infiere del primer bloque; columnas sin valores se exportan como texto
+    schema = pa.Schema.from_pandas(df.head(tamano_bloque), preserve_index=False)
+    for i, campo in enumerate(schema):
+        if pa.types.is_null(campo.type):
+            schema = schema.set(i, campo.with_type(pa.string()))
+    with pq.ParquetWriter(archivo, schema) as writer:
+        for bloque in _bloques(df, tamano_bloque):
+            writer.write_table(pa.Table.from_pandas(bloque, schema=schema, preserve_index=False))
+
+
+_ESCRITORES_STREAMING = {
+    'xlsx': _escribir_excel_streaming,
+    'csv': _escribir_csv_streaming,
+    'parquet': _escribir_parquet_streaming,
+}
+
+
+def _escribir_streaming(df, formato, archivo, tamano_bloque=TAMANO_BLOQUE_STREAMING):
+    """Escribe el DataFrame por bloques en `archivo` (binario, abierto para escritura)."""
+    _ESCRITORES_STREAMING[formato](df, archivo, tamano_bloque)
+
+
+# formato -> (función de conversión, extensión, mime)
+FORMATOS_EXPORTACION = {
+    'xlsx': (to_excel, 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': (to_csv, 'csv', 'text/csv'),
+    'parquet': (to_parquet, 'parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def hash_dataframe(df):
+    """Hash del contenido (valores, índice, columnas y tipos) de un DataFrame."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode('utf-8'))
+    return h.hexdigest()
+
+
+# Las exportaciones en streaming se cachean en disco y no en st.cache_data (que guardaría
+# los bytes completos en memoria): se conservan las usadas más recientemente hasta este total
+DIRECTORIO_CACHE_EXPORTACIONES = os.path.join(tempfile.gettempdir(), 'app_streamlit_fruit_exportaciones')
+TAMANO_MAXIMO_CACHE_EXPORTACIONES = 512 * 1024 * 1024
+_candado_cache_exportaciones = threading.Lock()
+
+
+def clave_exportacion(df, version=None):
+    """
+    Clave de caché de una exportación: el hash de `version` (p. ej. version_datos del archivo
+    del que sale el DataFrame) si se indica, así no se recorre el DataFrame en cada rerun;
+    si no, el hash de su contenido.
+    """
+    if version is None:
+        return hash_dataframe(df)
+    return hashlib.blake2b(repr(version).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _recortar_cache_exportaciones(conservar):
+    """Borra los archivos usados menos recientemente hasta que el total entra en el límite."""
+    archivos = []
+    for entrada in os.scandir(DIRECTORIO_CACHE_EXPORTACIONES):
+        if entrada.is_file() and not entrada.name.endswith('.parcial') and entrada.path != conservar:
+            estado = entrada.stat()
+            archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+    total = sum(tamano for _, tamano, _ in archivos) + os.path.getsize(conservar)
+    for _, tamano, ruta in sorted(archivos):
+        if total <= TAMANO_MAXIMO_CACHE_EXPORTACIONES:
+            break
+        os.remove(ruta)
+        total -= tamano
+
+
+def exportar_a_disco(df, formato, clave):
+    """
+    Exporta el DataFrame en streaming a un archivo de la caché en disco (ver clave_exportacion)
+    y lo devuelve abierto para lectura. Si ya estaba, no se regenera.
+    """
+    os.makedirs(DIRECTORIO_CACHE_EXPORTACIONES, exist_ok=True)
+    ruta = os.path.join(DIRECTORIO_CACHE_EXPORTACIONES, f'{clave}.{formato}')
+    with _candado_cache_exportaciones:
+        if os.path.exists(ruta):
+            os.utime(ruta)
+            return open(ruta, 'rb')
+    # Se escribe a un archivo parcial y se renombra: otra sesión nunca lee un archivo a medias
+    with tempfile.NamedTemporaryFile(dir=DIRECTORIO_CACHE_EXPORTACIONES, suffix='.parcial',
+                                     delete=False) as parcial:
+        try:
+            _escribir_streaming(df, formato, parcial)
+        except BaseException:
+            parcial.close()
+            os.remove(parcial.name)
+            raise
+    with _candado_cache_exportaciones:
+        os.replace(parcial.name, ruta)
+        # Abierto antes de recortar: en Linux el archivo sigue legible aunque luego se borre
+        archivo = open(ruta, 'rb')
+        _recortar_cache_exportaciones(conservar=ruta)
+    return archivo
+
+
+@st.cache_data(show_spinner="Generando archivo de exportación...", max_entries=64)
+def _exportar_cacheado(_df, clave, formato):
+    # '_df' no se hashea: la clave de la caché es la de clave_exportacion + el formato
+    conversor = FORMATOS_EXPORTACION[formato][0]
+    return conversor(_df)
+
+
+def exportar_dataframe(df, formato='xlsx', streaming=False, version=None):
+    """
+    Devuelve el DataFrame en el formato pedido, cacheado por clave_exportacion: bytes
+    en memoria o, con streaming=True, un archivo abierto de la caché en disco.
+    """
+    clave = clave_exportacion(df, version)
+    if streaming:
+        with st.spinner("Generando archivo de exportación..."):
+            return exportar_a_disco(df, formato, clave)
+    return _exportar_cacheado(df, clave, formato)
+
+
+def boton_exportar(df, label, file_name, key, streaming=False, version=None):
+    """
+    Botón de exportación bajo demanda.
+    El archivo solo se genera cuando el usuario pide la exportación (y se cachea por
+    clave_exportacion: 'version' o el hash del DataFrame), así el render de la página no
+    paga el costo de cada botón. 'file_name' es el nombre del archivo sin extensión.
+    Con streaming=True el archivo se construye por bloques en la caché en disco; usarlo
+    (con 'version') para los datasets completos. Al entregarlo, st.download_button lee el
+    archivo entero y el MediaFileManager de Streamlit guarda esos bytes en memoria mientras
+    el botón siga visible.
+    """
+    clave_estado = f"exportar_{key}"
+    if not st.session_state.get(clave_estado):
+        if not st.button(label, key=f"{clave_estado}_preparar"):
+            return
+        st.session_state[clave_estado] = True
+
+    formato = st.radio("Formato", list(FORMATOS_EXPORTACION), horizontal=True, key=f"{clave_estado}_formato")
+    _, extension, mime = FORMATOS_EXPORTACION[formato]
+    try:
+        datos = exportar_dataframe(df, formato, streaming=streaming, version=version)
+    except Exception as e:
+        st.error(f"No se pudo generar la exportación en formato {formato}: {e}")
+        return
+    try:
+        st.download_button(
+            label=f"{label} (.{extension})",
+            data=datos,
+            file_name=f'{file_name}.{extension}',
+            mime=mime,
+            key=f"{clave_estado}_descargar"
+        )
+    finally:
+        if streaming:
+            datos.close()
@@ -0,0 +1,98 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+import streamlit as st
+
+from utils.export import hash_dataframe
+from utils.instrumentacion import registrar_grafico
+
+logger = logging.getLogger(__name__)
+
+# Tipos de gráfico soportados (nombre -> función de plotly express)
+FUNCIONES = {
+    'bar': px.bar,
+    'pie': px.pie,
+    'line': px.line,
+    'scatter': px.scatter,
+    'scatter_mapbox': px.scatter_mapbox,
+    'choropleth_mapbox': px.choropleth_mapbox,
+    'imshow': px.imshow,
+}
+# Por encima de estos puntos las líneas y dispersiones se dibujan con WebGL
+UMBRAL_WEBGL = 1000
+# Las líneas de una sola serie con más puntos se reducen (ver reducir_serie)
+MAX_PUNTOS_LINEA = 2000
+# Cantidad máxima de intervalos de un histograma agrupado en el servidor
+MAX_BINS = 50
+# Payloads más grandes se avisan en el log (tardan en llegar con conexiones lentas)
+UMBRAL_PAYLOAD_KB = 500
+
+
+def reducir_serie(df, y, max_puntos=MAX_PUNTOS_LINEA):
+    """
+    Submuestreo min-max de una serie ya ordenada por x: la parte en max_puntos/2 tramos
+    consecutivos y conserva el mínimo y el máximo de cada uno, así los picos siguen visibles.
+    """
+    df = df[df[y].notna()]
+    if len(df) <= max_puntos:
+        return df
+    tramos = np.arange(len(df)) * (max_puntos // 2) // len(df)
+    grupos = pd.Series(df[y].to_numpy()).groupby(tramos)
+    posiciones = np.union1d(grupos.idxmin().to_numpy(), grupos.idxmax().to_numpy())
+    return df.iloc[posiciones]
+
+
+def histograma_agrupado(valores, max_bins=MAX_BINS):
+    """
+    Histograma calculado en el servidor: un DataFrame con una fila por intervalo
+    ('Desde', 'Hasta', 'Centro', 'Cantidad') en lugar de mandar cada valor al navegador.
+    Los valores no numéricos se descartan.
+    """
+    valores = pd.to_numeric(pd.Series(valores), errors='coerce').dropna().to_numpy(dtype=float)
+    if valores.size == 0:
+        return pd.DataFrame({'Desde': [], 'Hasta': [], 'Centro': [], 'Cantidad': []})
+    bordes = np.histogram_bin_edges(valores, bins='auto')
+    if len(bordes) - 1 > max_bins:
+        bordes = np.histogram_bin_edges(valores, bins=max_bins)
+    cantidades, bordes = np.histogram(valores, bins=bordes)
+    return pd.DataFrame({'Desde': bordes[:-1], 'Hasta': bordes[1:], 'Centro': (bordes[:-1] + bordes[1:]) / 2,
+                         'Cantidad': cantidades})
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _figura_cacheada(tipo, _datos, datos_hash, clave_parametros, _parametros, _ajustes):
+    # '_datos', '_parametros' y '_ajustes' no se hashean: la clave es el hash del contenido
+    # y el repr de los parámetros. La figura se comparte entre sesiones, por eso todos los
+    # update_* se aplican acá y las páginas no la modifican después.
+    parametros = dict(_parametros)
+    if tipo in ('line', 'scatter'):
+        if tipo == 'line' and len(_datos) > MAX_PUNTOS_LINEA and 'color' not in parametros:
+            _datos = reducir_serie(_datos, parametros['y'])
+        if len(_datos) > UMBRAL_WEBGL:
+            parametros.setdefault('render_mode', 'webgl')
+    fig = FUNCIONES[tipo](_datos, **parametros)
+    for metodo, argumentos in _ajustes.items():
+        getattr(fig, metodo)(**argumentos)
+    return fig, len(pio.to_json(fig, validate=False))
+
+
+def grafico(tipo, datos, key, ajustes=None, **parametros):
+    """
+    Muestra un gráfico de plotly express ('tipo' es una clave de FUNCIONES) construido a partir
+    de 'datos' ya agregados. La figura se memoiza por el hash de 'datos' y los parámetros, así
+    los reruns no la vuelven a armar. 'ajustes' son los update_* a aplicar, en orden:
+    {'update_xaxes': {'tickangle': 45}, ...}. El tamaño del JSON enviado se registra en la
+    instrumentación (panel de depuración y log).
+    """
+    inicio = time.perf_counter()
+    ajustes = ajustes or {}
+    fig, bytes_json = _figura_cacheada(tipo, datos, hash_dataframe(datos), repr((parametros, ajustes)),
+                                       parametros, ajustes)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+    if bytes_json > UMBRAL_PAYLOAD_KB * 1024:
+        logger.warning("El gráfico '%s' envía %.0f KB al navegador.", key, bytes_json / 1024)
+    registrar_grafico(key, bytes_json, len(datos), (time.perf_counter() - inicio) * 1000)
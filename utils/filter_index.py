@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+def construir_indice_columna(serie):
+    """
+    Índice invertido de una columna: para cada valor, las posiciones (ordenadas) de sus filas.
+    Se guarda como un único arreglo 'orden' agrupado por valor más 'offsets' (formato CSR),
+    construido con un solo argsort. Los nulos no se indexan (no se pueden seleccionar).
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    # argsort estable: dentro de cada valor las posiciones quedan en orden creciente
+    orden = np.argsort(codes, kind='stable')
+    orden = orden[np.count_nonzero(codes < 0):]  # los nulos (-1) quedan al principio
+    conteos = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(conteos)])
+    return {
+        'valores': {valor: i for i, valor in enumerate(uniques)},
+        'orden': orden.astype(np.int64 if len(serie) > np.iinfo(np.int32).max else np.int32),
+        'offsets': offsets,
+    }
+
+
+def construir_indice_fechas(fechas):
+    """
+    Fechas ordenadas + posición original de cada una, para cortar rangos con searchsorted,
+    y 'rango': la posición de cada fila dentro de ese orden (la permutación inversa).
+    """
+    valores = fechas.to_numpy(dtype='datetime64[ns]')
+    orden = np.argsort(valores, kind='stable')
+    rango = np.empty_like(orden)
+    rango[orden] = np.arange(len(orden))
+    return {'orden': orden, 'fechas_ordenadas': valores[orden], 'rango': rango}
+
+
+@st.cache_resource(max_entries=4)
+def indices_filtros(_df, columnas, columna_fecha, version):
+    """
+    Índices de todas las columnas filtrables de `_df`, construidos una vez por versión de datos
+    y compartidos entre sesiones. `_df` no se hashea: `version` identifica los datos.
+    """
+    indices = {col: construir_indice_columna(_df[col]) for col in columnas if col in _df.columns}
+    indice_fechas = None
+    if columna_fecha in _df.columns:
+        indice_fechas = construir_indice_fechas(_df[columna_fecha])
+    return {'columnas': indices, 'fechas': indice_fechas, 'filas': len(_df)}
+
+
+def opciones(indices, columna):
+    """Valores seleccionables de una columna, ordenados alfabéticamente."""
+    return sorted(indices['columnas'][columna]['valores'], key=str)
+
+
+def posiciones_valores(indice, valores):
+    """Unión de las posiciones de los valores elegidos (ordenada)."""
+    partes = []
+    for valor in valores:
+        i = indice['valores'].get(valor)
+        if i is not None:
+            partes.append(indice['orden'][indice['offsets'][i]:indice['offsets'][i + 1]])
+    if not partes:
+        return np.empty(0, dtype=indice['orden'].dtype)
+    if len(partes) == 1:
+        return partes[0]
+    return np.sort(np.concatenate(partes))
+
+
+def limites_rango(fechas_ordenadas, desde, hasta):
+    """(inicio, fin) del tramo de `fechas_ordenadas` con fecha en [desde, hasta] (ambos inclusive, por día)."""
+    inicio = np.searchsorted(fechas_ordenadas, np.datetime64(pd.Timestamp(desde)), side='left')
+    fin = np.searchsorted(fechas_ordenadas, np.datetime64(pd.Timestamp(hasta) + pd.Timedelta(days=1)), side='left')
+    return int(inicio), int(fin)
+
+
+# Con más de esta fracción de las filas elegidas, orden_por_fecha usa una máscara en lugar de ordenar
+FRACCION_MASCARA_FECHAS = 0.5
+
+
+def orden_por_fecha(indice_fechas, posiciones=None):
+    """
+    (posiciones, fechas) en orden de fecha: todas las filas o solo las de `posiciones`
+    (p. ej. el resultado de filtrar). Sobre este orden cualquier ventana de fechas es un
+    tramo contiguo que se corta con ventana_fechas, sin volver a recorrer las filas.
+    """
+    if posiciones is None:
+        return indice_fechas['orden'], indice_fechas['fechas_ordenadas']
+    if len(posiciones) > FRACCION_MASCARA_FECHAS * len(indice_fechas['orden']):
+        # Casi todas las filas: una pasada lineal con máscara es más barata que ordenar
+        dentro = np.zeros(len(indice_fechas['orden']), dtype=bool)
+        dentro[indice_fechas['rango'][posiciones]] = True
+        rangos = np.flatnonzero(dentro)
+    else:
+        # Ordenar los rangos de las filas elegidas da el mismo orden (empates incluidos) que
+        # recorrer 'orden' completo, pero cuesta O(k log k) con k = len(posiciones)
+        rangos = np.sort(indice_fechas['rango'][posiciones])
+    return indice_fechas['orden'][rangos], indice_fechas['fechas_ordenadas'][rangos]
+
+
+def ventana_fechas(orden, fechas_ordenadas, desde, hasta):
+    """Posiciones de `orden` (ver orden_por_fecha) con fecha en [desde, hasta]: dos searchsorted y un corte."""
+    inicio, fin = limites_rango(fechas_ordenadas, desde, hasta)
+    return orden[inicio:fin]
+
+
+# Períodos predefinidos del selector de fechas, relativos a la última fecha de los datos
+PERIODO_TODO = "Todo el período"
+PERIODO_PERSONALIZADO = "Personalizado"
+PERIODOS_FECHAS = [PERIODO_TODO, "Últimos 30 días", "Últimos 90 días", "Año en curso",
+                   "Enero a junio del último año", PERIODO_PERSONALIZADO]
+
+
+def rango_periodo(periodo, fecha_min, fecha_max):
+    """(desde, hasta) de un período de PERIODOS_FECHAS, recortado a [fecha_min, fecha_max]; None si es personalizado."""
+    rangos = {
+        PERIODO_TODO: (fecha_min, fecha_max),
+        "Últimos 30 días": (fecha_max - pd.Timedelta(days=29), fecha_max),
+        "Últimos 90 días": (fecha_max - pd.Timedelta(days=89), fecha_max),
+        "Año en curso": (fecha_max.replace(month=1, day=1), fecha_max),
+        "Enero a junio del último año": (fecha_max.replace(month=1, day=1), fecha_max.replace(month=6, day=30)),
+    }
+    if periodo not in rangos:
+        return None
+    desde, hasta = max(rangos[periodo][0], fecha_min), min(rangos[periodo][1], fecha_max)
+    # Un período que cae entero antes del comienzo de los datos queda en su primer día
+    return desde, max(hasta, desde)
+
+
+def filtrar(indices, selecciones):
+    """
+    Combina los filtros activos intersectando índices (sin recorrer el DataFrame).
+    `selecciones`: {columna: [valores]}; las listas vacías no filtran. El rango de fechas
+    no pasa por acá: se corta sobre el resultado con orden_por_fecha + ventana_fechas.
+    Devuelve las posiciones de las filas que cumplen todo, o None si no hay filtros activos.
+    """
+    conjuntos = [posiciones_valores(indices['columnas'][col], valores)
+                 for col, valores in selecciones.items() if valores and col in indices['columnas']]
+    if not conjuntos:
+        return None
+    # Intersectar empezando por el conjunto más chico
+    conjuntos.sort(key=len)
+    resultado = conjuntos[0]
+    for conjunto in conjuntos[1:]:
+        if resultado.size == 0:
+            break
+        resultado = np.intersect1d(resultado, conjunto, assume_unique=True)
+    return resultado
@@ -0,0 +1,191 @@
+"""
+Geocodificación de ciudades en segundo plano: un worker con su propio event loop de asyncio
+(en un hilo daemon) resuelve las ubicaciones que faltan en el store persistente (ver
+utils/geocoding.py) con varias consultas en vuelo y un intervalo mínimo entre el inicio de
+cada una. La página no espera: encola lo que falta y el mapa (un fragmento que se vuelve a
+ejecutar solo) se completa a medida que llegan los resultados.
+
+El servicio es configurable con variables de entorno, así se puede apuntar a un Nominatim
+propio o a un servidor local de prueba (ver benchmarks/bench_geocodificacion.py):
+- GEOCODER_URL: endpoint de búsqueda compatible con Nominatim (vacío: no consultar en línea);
+- GEOCODER_INTERVALO: segundos mínimos entre el inicio de dos consultas (Nominatim público: 1/s);
+- GEOCODER_CONCURRENCIA: consultas simultáneas como máximo.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from utils.figuras import grafico
+from utils.geocoding import NO_ENCONTRADO, clave_ubicacion, consultar_store, guardar_resultado
+
+logger = logging.getLogger(__name__)
+
+GEOCODER_URL = os.environ.get('GEOCODER_URL', 'https://nominatim.openstreetmap.org/search')
+GEOCODER_INTERVALO = float(os.environ.get('GEOCODER_INTERVALO', '1.1'))
+GEOCODER_CONCURRENCIA = int(os.environ.get('GEOCODER_CONCURRENCIA', '4'))
+USER_AGENT = 'streamlit_caza_app_v2'
+TIMEOUT_SEGUNDOS = 10
+
+# Cada cuántos segundos se vuelve a dibujar el mapa mientras quedan ubicaciones pendientes
+INTERVALO_REFRESCO = 2
+
+
+class Geocodificador:
+    """
+    Worker de geocodificación. encolar() se puede llamar desde cualquier hilo (las sesiones de
+    Streamlit); las consultas corren en el event loop del worker y cada resultado (incluidos
+    los fallos, con su TTL) se guarda en el store, de donde lo leen las páginas.
+    """
+
+    def __init__(self, url=None, intervalo=None, concurrencia=None, db_path=None):
+        # Sin argumentos se usa la configuración del entorno (GEOCODER_*)
+        self.url = GEOCODER_URL if url is None else url
+        self.intervalo = GEOCODER_INTERVALO if intervalo is None else intervalo
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pendientes = set()  # Claves encoladas o en curso
+        self._conteo = {'resueltas': 0, 'no_encontradas': 0, 'errores': 0}
+        self._loop = asyncio.new_event_loop()
+        self._semaforo = asyncio.Semaphore(GEOCODER_CONCURRENCIA if concurrencia is None else concurrencia)
+        self._proximo_inicio = 0.0
+        threading.Thread(target=self._loop.run_forever, name='geocodificador', daemon=True).start()
+
+    def encolar(self, nombres):
+        """Encola las ubicaciones que no están ya pendientes. Devuelve cuántas se agregaron."""
+        if not self.url:
+            return 0
+        nuevas = {}
+        with self._lock:
+            for nombre in nombres:
+                clave = clave_ubicacion(nombre)
+                if clave and clave not in self._pendientes and clave not in nuevas:
+                    nuevas[clave] = nombre
+            self._pendientes.update(nuevas)
+        for clave, nombre in nuevas.items():
+            asyncio.run_coroutine_threadsafe(self._resolver(clave, nombre), self._loop)
+        return len(nuevas)
+
+    def pendientes(self):
+        with self._lock:
+            return len(self._pendientes)
+
+    def estado(self):
+        """{'pendientes', 'resueltas', 'no_encontradas', 'errores'} desde que arrancó el worker."""
+        with self._lock:
+            return {'pendientes': len(self._pendientes), **self._conteo}
+
+    async def _esperar_turno(self):
+        # El loop corre en un solo hilo: reservar el turno no necesita lock
+        ahora = self._loop.time()
+        inicio = max(ahora, self._proximo_inicio)
+        self._proximo_inicio = inicio + self.intervalo
+        await asyncio.sleep(inicio - ahora)
+
+    async def _resolver(self, clave, nombre):
+        try:
+            async with self._semaforo:
+                await self._esperar_turno()
+                try:
+                    resultado, estado = await asyncio.to_thread(self._consultar, nombre)
+                except Exception as e:
+                    logger.warning("Error de geocodificación para '%s': %s", nombre, e)
+                    resultado, estado = NO_ENCONTRADO, 'error'
+            await asyncio.to_thread(guardar_resultado, nombre, resultado, 'nominatim', estado, self.db_path)
+            contador = {'ok': 'resueltas', 'no_encontrado': 'no_encontradas'}.get(estado, 'errores')
+            with self._lock:
+                self._conteo[contador] += 1
+        finally:
+            with self._lock:
+                self._pendientes.discard(clave)
+
+    def _consultar(self, nombre):
+        """Consulta bloqueante al endpoint (corre en un hilo del pool del loop)."""
+        parametros = urllib.parse.urlencode(
+            {'q': nombre, 'format': 'jsonv2', 'addressdetails': 1, 'limit': 1, 'accept-language': 'es'})
+        pedido = urllib.request.Request(f"{self.url}?{parametros}", headers={'User-Agent': USER_AGENT})
+        with urllib.request.urlopen(pedido, timeout=TIMEOUT_SEGUNDOS) as respuesta:
+            lugares = json.load(respuesta)
+        if not lugares:
+            return NO_ENCONTRADO, 'no_encontrado'
+        lugar = lugares[0]
+        pais = lugar.get('address', {}).get('country', 'Desconocido')
+        return (float(lugar['lat']), float(lugar['lon']), pais), 'ok'
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_geocodificador():
+    """El worker del proceso, compartido por todas las sesiones."""
+    return Geocodificador()
+
+
+def texto_ubicacion(ciudad, pais):
+    """Texto que se geocodifica para una ciudad normalizada y su país ("junin de los andes, Argentina")."""
+    return f"{ciudad}, {pais}" if isinstance(pais, str) and pais and pais != 'Nan' else ciudad
+
+
+def _dibujar_mapa(conteos, en_linea, esperando, key, parametros):
+    resultados = consultar_store(conteos['Ubicación'], db_path=obtener_geocodificador().db_path)
+    faltan = int((~conteos['Ubicación'].isin(list(resultados))).sum())
+    coordenadas = pd.DataFrame(
+        [(nombre, lat, lon, pais) for nombre, (lat, lon, pais) in resultados.items() if lat is not None],
+        columns=['Ubicación', 'Latitud', 'Longitud', 'País_Geocodificado']).astype({'Ubicación': object})
+    datos = conteos.astype({'Ubicación': object}).merge(coordenadas, on='Ubicación')
+    if faltan and esperando:
+        st.caption(f"⏳ Geocodificando {faltan} de {len(conteos)} ubicaciones; el mapa se completa solo...")
+    elif faltan:
+        st.caption(f"{faltan} de {len(conteos)} ubicaciones todavía no están en el store local.")
+    if datos.empty:
+        if not esperando:
+            st.warning(
+                "No se pudieron obtener coordenadas geográficas para generar el mapa. Esto puede deberse a "
+                "problemas de conexión a internet o a nombres de ubicaciones no reconocidos.")
+    else:
+        # scatter_mapbox ya se dibuja con WebGL
+        grafico('scatter_mapbox', datos, key=key,
+                lat='Latitud',
+                lon='Longitud',
+                size='Cantidad',
+                color='Cantidad',
+                color_continuous_scale=px.colors.sequential.Reds,
+                mapbox_style='open-street-map' if en_linea else 'white-bg',
+                **parametros)
+    sin_coordenadas = len(conteos) - faltan - len(datos)
+    if sin_coordenadas:
+        st.caption(f"{sin_coordenadas} ubicaciones sin coordenadas (no encontradas o error del servicio).")
+    if not faltan and st.session_state.get(f"{key}_esperando"):
+        # Terminó la geocodificación: una corrida completa deja de refrescar el fragmento
+        st.session_state[f"{key}_esperando"] = False
+        st.rerun()
+
+
+def mapa_ubicaciones(conteos, key, en_linea=True, **parametros):
+    """
+    Mapa de burbujas de 'conteos' (columnas 'Ubicación', el texto que se geocodifica, y
+    'Cantidad'; las demás quedan disponibles para hover_data, junto con 'País_Geocodificado').
+    Las coordenadas se leen del store en una sola consulta. Con 'en_linea' las ubicaciones que
+    faltan se encolan en el geocodificador y el mapa (un fragmento) se vuelve a dibujar cada
+    INTERVALO_REFRESCO segundos hasta tenerlas todas, sin volver a ejecutar la página; sin
+    'en_linea' se muestra solo lo que ya está en el store, sin teselas ni consultas.
+    """
+    if conteos.empty:
+        st.session_state[f"{key}_esperando"] = False
+        st.info("No hay ubicaciones para mostrar en el mapa con los filtros actuales.")
+        return
+    geocodificador = obtener_geocodificador()
+    esperando = False
+    if en_linea:
+        resueltas = consultar_store(conteos['Ubicación'], db_path=geocodificador.db_path)
+        faltantes = [nombre for nombre in conteos['Ubicación'] if nombre not in resueltas]
+        geocodificador.encolar(faltantes)
+        esperando = bool(faltantes) and bool(geocodificador.url)
+    st.session_state[f"{key}_esperando"] = esperando
+    dibujar = st.experimental_fragment(run_every=INTERVALO_REFRESCO if esperando else None)(_dibujar_mapa)
+    dibujar(conteos, en_linea, esperando, key, parametros)
@@ -0,0 +1,221 @@
+import csv
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+from geopy.geocoders import Nominatim
+
+from utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Gazetteer incluido en el repo con centroides de países y provincias argentinas
+GAZETTEER_PATH = os.path.join(_BASE_DIR, 'data', 'gazetteer_centroides.csv')
+# Base SQLite persistente (sobrevive a reinicios y se comparte entre procesos)
+GEOCODE_DB_PATH = os.environ.get('GEOCODE_DB_PATH', os.path.join(_BASE_DIR, '.cache', 'geocoding.sqlite3'))
+
+# Tiempo de vida de los resultados fallidos antes de reintentar
+TTL_NO_ENCONTRADO = 7 * 24 * 3600  # Nominatim respondió pero no encontró la ubicación
+TTL_ERROR_SERVICIO = 15 * 60  # Timeout o error del servicio: reintentar pronto
+
+# Nominatim permite 1 request por segundo; solo se espera antes de una llamada real a la red
+_INTERVALO_MINIMO_RED = 1.1
+
+NO_ENCONTRADO = (None, None, 'Desconocido')
+
+# Initialize geolocator (use a unique user_agent if deploying for production)
+geolocator = Nominatim(user_agent="streamlit_caza_app_v2")
+
+_lock_red = threading.Lock()
+_ultima_llamada_red = 0.0
+_lock_init = threading.Lock()
+_db_inicializada = set()
+
+
+def clave_ubicacion(location_name):
+    """Clave normalizada usada en el store (minúsculas, sin acentos ni espacios repetidos)."""
+    return ' '.join(normalize_text(location_name).split())
+
+
+def _conectar(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def _hash_gazetteer(gazetteer_path):
+    with open(gazetteer_path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _sembrar_gazetteer(conn, gazetteer_path):
+    """Carga el gazetteer en el store si cambió desde la última vez que se sembró."""
+    if not os.path.exists(gazetteer_path):
+        logger.warning("Gazetteer '%s' no encontrado; el store no se pre-carga.", gazetteer_path)
+        return
+    version = _hash_gazetteer(gazetteer_path)
+    fila = conn.execute("SELECT valor FROM meta WHERE clave = 'gazetteer'").fetchone()
+    if fila is not None and fila[0] == version:
+        return
+    ahora = time.time()
+    with open(gazetteer_path, encoding='utf-8', newline='') as f:
+        filas = [
+            (clave_ubicacion(r['nombre']), r['nombre'], float(r['latitud']), float(r['longitud']), r['pais'],
+             'gazetteer', 'ok', ahora)
+            for r in csv.DictReader(f)
+        ]
+    # El gazetteer tiene prioridad sobre resultados previos (incluidos los fallidos)
+    conn.executemany(
+        "INSERT OR REPLACE INTO geocodes (clave, nombre, latitud, longitud, pais, fuente, estado, actualizado) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+    conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('gazetteer', ?)", (version,))
+    logger.info("Store de geocodificación sembrado con %d entradas del gazetteer.", len(filas))
+
+
+def inicializar_store(db_path=None, gazetteer_path=GAZETTEER_PATH):
+    """Crea las tablas del store (si no existen) y lo siembra con el gazetteer."""
+    db_path = db_path or GEOCODE_DB_PATH
+    with _lock_init:
+        if db_path in _db_inicializada:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with _conectar(db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes ("
+                "clave TEXT PRIMARY KEY, nombre TEXT, latitud REAL, longitud REAL, pais TEXT, "
+                "fuente TEXT, estado TEXT, actualizado REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+            _sembrar_gazetteer(conn, gazetteer_path)
+        conn.close()
+        _db_inicializada.add(db_path)
+
+
+def _leer(db_path, clave):
+    conn = _conectar(db_path)
+    try:
+        return conn.execute(
+            "SELECT latitud, longitud, pais, estado, actualizado FROM geocodes WHERE clave = ?", (clave,)).fetchone()
+    finally:
+        conn.close()
+
+
+def _vigente(fila):
+    """Resultado de una fila del store, o None si es un fallo cuyo TTL ya expiró (hay que reintentar)."""
+    lat, lon, pais, estado, actualizado = fila
+    if estado == 'ok':
+        return (lat, lon, pais)
+    ttl = TTL_NO_ENCONTRADO if estado == 'no_encontrado' else TTL_ERROR_SERVICIO
+    if time.time() - actualizado < ttl:
+        return NO_ENCONTRADO
+    return None
+
+
+def consultar_store(location_names, db_path=None):
+    """
+    Busca varias ubicaciones en el store con una sola consulta. Devuelve {nombre: resultado}
+    solo para las que tienen un resultado vigente ((lat, lon, país) o NO_ENCONTRADO si el
+    último intento falló y su TTL no expiró); las demás hay que geocodificarlas.
+    """
+    db_path = db_path or GEOCODE_DB_PATH
+    inicializar_store(db_path)
+    # Varios nombres pueden compartir la clave ("monte maiz  cordoba" y "monte maiz cordoba"):
+    # todos reciben el resultado de esa clave
+    claves = {}
+    for nombre in location_names:
+        claves.setdefault(clave_ubicacion(nombre), []).append(nombre)
+    claves.pop('', None)
+    filas = {}
+    conn = _conectar(db_path)
+    try:
+        lista = list(claves)
+        # SQLite limita la cantidad de parámetros por consulta
+        for inicio in range(0, len(lista), 500):
+            tramo = lista[inicio:inicio + 500]
+            filas.update((fila[0], fila[1:]) for fila in conn.execute(
+                f"SELECT clave, latitud, longitud, pais, estado, actualizado FROM geocodes "
+                f"WHERE clave IN ({','.join('?' * len(tramo))})", tramo))
+    finally:
+        conn.close()
+    resultados = {}
+    for clave, fila in filas.items():
+        resultado = _vigente(fila)
+        if resultado is not None:
+            resultados.update((nombre, resultado) for nombre in claves[clave])
+    return resultados
+
+
+def guardar_resultado(location_name, result, fuente, estado, db_path=None):
+    """Guarda en el store el resultado de una geocodificación ('ok', 'no_encontrado' o 'error')."""
+    db_path = db_path or GEOCODE_DB_PATH
+    inicializar_store(db_path)
+    _guardar(db_path, clave_ubicacion(location_name), location_name, result, fuente, estado)
+
+
+def _guardar(db_path, clave, location_name, result, fuente, estado):
+    conn = _conectar(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocodes (clave, nombre, latitud, longitud, pais, fuente, estado, actualizado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave, location_name, result[0], result[1], result[2], fuente, estado, time.time()))
+    finally:
+        conn.close()
+
+
+def _geocodificar_en_red(location_name):
+    """Llama a Nominatim respetando su límite de 1 request por segundo."""
+    global _ultima_llamada_red
+    with _lock_red:
+        espera = _INTERVALO_MINIMO_RED - (time.monotonic() - _ultima_llamada_red)
+        if espera > 0:
+            time.sleep(espera)
+        try:
+            return geolocator.geocode(location_name, addressdetails=True, language='es')
+        finally:
+            _ultima_llamada_red = time.monotonic()
+
+
+def get_lat_lon_country(location_name, permitir_red=True, db_path=None):
+    """
+    Geocodes a location name and returns (latitude, longitude, country).
+    Busca primero en el store persistente (pre-sembrado con el gazetteer); solo
+    consulta Nominatim si la ubicación no está o si su fallo previo ya expiró.
+    """
+    db_path = db_path or GEOCODE_DB_PATH
+    inicializar_store(db_path)
+    clave = clave_ubicacion(location_name)
+    if not clave:
+        return NO_ENCONTRADO
+
+    fila = _leer(db_path, clave)
+    if fila is not None and _vigente(fila) is not None:
+        return _vigente(fila)
+
+    if not permitir_red:
+        return NO_ENCONTRADO
+
+    try:
+        location = _geocodificar_en_red(location_name)
+    except (GeocoderTimedOut, GeocoderServiceError) as e:
+        logger.warning("Error de geocodificación para '%s': %s", location_name, e)
+        _guardar(db_path, clave, location_name, NO_ENCONTRADO, 'nominatim', 'error')
+        return NO_ENCONTRADO
+    except Exception as e:
+        logger.warning("Error inesperado al geocodificar '%s': %s", location_name, e)
+        _guardar(db_path, clave, location_name, NO_ENCONTRADO, 'nominatim', 'error')
+        return NO_ENCONTRADO
+
+    if location:
+        country = location.raw.get('address', {}).get('country', 'Desconocido')
+        result = (location.latitude, location.longitude, country)
+        _guardar(db_path, clave, location_name, result, 'nominatim', 'ok')
+        return result
+    _guardar(db_path, clave, location_name, NO_ENCONTRADO, 'nominatim', 'no_encontrado')
+    return NO_ENCONTRADO
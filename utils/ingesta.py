@@ -0,0 +1,187 @@
+"""
+Ingesta incremental (solo-anexar) de snapshots de permisos de caza.
+
+Cada snapshot (p. ej. 'permiso-de-caza-2025-2025-06-30.csv') es una exportación
+completa del formulario. Solo se anexan al store consolidado las filas cuyo
+'ID único' no se haya visto antes; cada ingesta escribe un archivo Parquet nuevo
+y nunca reescribe el historial.
+
+Uso (desde la raíz del repo):
+    python -m utils.ingesta permiso-de-caza-2025-2025-06-30.csv [--store store/permisos]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+COLUMNA_ID = 'ID único'
+COLUMNA_ID_ENVIO = 'ID de envío'
+
+STORE_PERMISOS = 'store/permisos'
+_MANIFIESTO = '_manifiesto.json'
+_INDICE_IDS = '_ids.sqlite3'
+
+
+def ruta_manifiesto(ruta_store=STORE_PERMISOS):
+    return os.path.join(ruta_store, _MANIFIESTO)
+
+
+def leer_manifiesto(ruta_store=STORE_PERMISOS):
+    """Devuelve el manifiesto del store (partes, marca de agua y total de filas)."""
+    ruta = ruta_manifiesto(ruta_store)
+    if not os.path.exists(ruta):
+        return {'partes': [], 'marca_agua_id_envio': None, 'filas': 0}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_manifiesto(ruta_store, manifiesto):
+    # Escritura atómica: los lectores nunca ven un manifiesto a medio escribir
+    ruta = ruta_manifiesto(ruta_store)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def _conectar_indice(ruta_store):
+    conn = sqlite3.connect(os.path.join(ruta_store, _INDICE_IDS), timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS ids (id TEXT PRIMARY KEY, parte TEXT)")
+    # Partes cuyos IDs ya están registrados (se escribe en la misma transacción que los IDs)
+    conn.execute("CREATE TABLE IF NOT EXISTS partes (parte TEXT PRIMARY KEY)")
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO partes SELECT DISTINCT parte FROM ids "
+                     "WHERE NOT EXISTS (SELECT 1 FROM partes)")
+    return conn
+
+
+def _registrar_ids(conn, ids, parte):
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO ids (id, parte) VALUES (?, ?)", ((i, parte) for i in ids))
+        conn.execute("INSERT OR IGNORE INTO partes (parte) VALUES (?)", (parte,))
+
+
+def _reconciliar_indice(conn, ruta_store, manifiesto):
+    """
+    Deja el índice de IDs igual a las partes del manifiesto: borra los IDs de partes que el
+    manifiesto no lista y carga los de partes listadas que no están en el índice (una ingesta
+    que se cortó entre escribir el manifiesto y registrar sus IDs).
+    """
+    partes = {p['archivo'] for p in manifiesto['partes']}
+    registradas = {r[0] for r in conn.execute("SELECT parte FROM partes")}
+    with conn:
+        for parte in registradas - partes:
+            conn.execute("DELETE FROM ids WHERE parte = ?", (parte,))
+            conn.execute("DELETE FROM partes WHERE parte = ?", (parte,))
+    for parte in partes - registradas:
+        ids = pd.read_parquet(os.path.join(ruta_store, parte), columns=[COLUMNA_ID])[COLUMNA_ID]
+        _registrar_ids(conn, ids, parte)
+
+
+def _ids_existentes(conn, ids):
+    """Consulta en el índice solo los IDs candidatos (costo proporcional a los candidatos)."""
+    existentes = set()
+    ids = list(ids)
+    for inicio in range(0, len(ids), 500):
+        lote = ids[inicio:inicio + 500]
+        marcadores = ','.join('?' * len(lote))
+        existentes.update(r[0] for r in conn.execute(f"SELECT id FROM ids WHERE id IN ({marcadores})", lote))
+    return existentes
+
+
+def ingestar_snapshot(ruta_snapshot, ruta_store=STORE_PERMISOS):
+    """
+    Anexa al store las filas nuevas del snapshot y devuelve un resumen de la ingesta.
+
+    - Si el snapshot trae 'ID de envío', las filas con envío <= marca de agua se
+      descartan sin consultar el índice (ya fueron procesadas en ingestas previas).
+    - El resto se deduplica contra el índice de 'ID único' (SQLite).
+    - Las filas sin 'ID único' no se pueden deduplicar y se omiten.
+
+    Orden de escritura: la parte, el manifiesto y recién después los IDs en el índice. Si la
+    ingesta se corta, el índice se reconcilia con el manifiesto al comienzo de la siguiente.
+    """
+    inicio = time.perf_counter()
+    os.makedirs(ruta_store, exist_ok=True)
+    manifiesto = leer_manifiesto(ruta_store)
+
+    # Todo como texto: el esquema de las partes se mantiene estable entre snapshots
+    snapshot = pd.read_csv(ruta_snapshot, dtype=str, encoding='utf-8-sig')
+    if COLUMNA_ID not in snapshot.columns:
+        raise ValueError(f"El snapshot '{ruta_snapshot}' no tiene la columna '{COLUMNA_ID}'.")
+    filas_snapshot = len(snapshot)
+    filas_sin_id = int(snapshot[COLUMNA_ID].isna().sum())
+
+    marca_agua = manifiesto.get('marca_agua_id_envio')
+    if COLUMNA_ID_ENVIO in snapshot.columns:
+        id_envio = pd.to_numeric(snapshot[COLUMNA_ID_ENVIO], errors='coerce')
+        if marca_agua is not None:
+            snapshot = snapshot[~(id_envio <= marca_agua)]
+            id_envio = id_envio.loc[snapshot.index]
+
+    candidatos = snapshot[snapshot[COLUMNA_ID].notna()].drop_duplicates(subset=[COLUMNA_ID], keep='first')
+
+    conn = _conectar_indice(ruta_store)
+    try:
+        _reconciliar_indice(conn, ruta_store, manifiesto)
+        existentes = _ids_existentes(conn, candidatos[COLUMNA_ID])
+        nuevas = candidatos[~candidatos[COLUMNA_ID].isin(existentes)].reset_index(drop=True)
+
+        nombre_parte = None
+        if not nuevas.empty:
+            nombre_parte = f"parte-{len(manifiesto['partes']) + 1:05d}.parquet"
+            nuevas.to_parquet(os.path.join(ruta_store, nombre_parte), index=False)
+            manifiesto['partes'].append({
+                'archivo': nombre_parte,
+                'filas': len(nuevas),
+                'origen': os.path.basename(ruta_snapshot),
+                'ingestado': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            })
+            manifiesto['filas'] = manifiesto.get('filas', 0) + len(nuevas)
+
+        if COLUMNA_ID_ENVIO in snapshot.columns and id_envio.notna().any():
+            maximo = int(id_envio.max())
+            manifiesto['marca_agua_id_envio'] = max(maximo, marca_agua) if marca_agua is not None else maximo
+        _escribir_manifiesto(ruta_store, manifiesto)
+        if nombre_parte is not None:
+            _registrar_ids(conn, nuevas[COLUMNA_ID], nombre_parte)
+    finally:
+        conn.close()
+
+    return {
+        'snapshot': ruta_snapshot,
+        'filas_snapshot': filas_snapshot,
+        'filas_candidatas': len(candidatos),
+        'filas_nuevas': len(nuevas),
+        'filas_sin_id': filas_sin_id,
+        'parte': nombre_parte,
+        'marca_agua_id_envio': manifiesto.get('marca_agua_id_envio'),
+        'filas_store': manifiesto.get('filas', 0),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+def leer_store(ruta_store=STORE_PERMISOS):
+    """Lee todas las partes del store como un único DataFrame (None si el store está vacío)."""
+    manifiesto = leer_manifiesto(ruta_store)
+    if not manifiesto['partes']:
+        return None
+    partes = [pd.read_parquet(os.path.join(ruta_store, p['archivo'])) for p in manifiesto['partes']]
+    return pd.concat(partes, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('snapshots', nargs='+', help="Archivos CSV de snapshot, en orden cronológico.")
+    parser.add_argument('--store', default=STORE_PERMISOS, help=f"Directorio del store (por defecto '{STORE_PERMISOS}').")
+    args = parser.parse_args()
+    for ruta in args.snapshots:
+        resumen = ingestar_snapshot(ruta, args.store)
+        print(json.dumps(resumen, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
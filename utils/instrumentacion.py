@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Con DEBUG_SECCIONES=1 (o ?debug=1 en la URL) se muestra el panel en la barra lateral
+VARIABLE_PANEL = 'DEBUG_SECCIONES'
+# Si está definida, cada tramo se agrega como una línea JSON a este archivo
+VARIABLE_LOG_JSON = 'SECCIONES_LOG_JSON'
+
+_CLAVE_ESTADO = '_instrumentacion'
+_lock_log = threading.Lock()
+
+try:
+    _TAMANO_PAGINA = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _TAMANO_PAGINA = None
+
+
+def _memoria_rss():
+    """Memoria residente del proceso en bytes (Linux, /proc); None si no está disponible."""
+    if _TAMANO_PAGINA is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _TAMANO_PAGINA
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _estado():
+    return st.session_state.setdefault(_CLAVE_ESTADO, {'pagina': None, 'tramos': [], 'graficos': [], 'abierto': None})
+
+
+def _abrir(nombre, filas, nivel):
+    return {'seccion': nombre, 'nivel': nivel, 'filas': filas, 'ts': time.time(), 'inicio': time.perf_counter(),
+            'rss_inicio': _memoria_rss()}
+
+
+def _cerrar(tramo):
+    rss_fin = _memoria_rss()
+    delta = rss_fin - tramo['rss_inicio'] if rss_fin is not None and tramo['rss_inicio'] is not None else None
+    return {
+        'seccion': tramo['seccion'],
+        'nivel': tramo['nivel'],
+        'ts': round(tramo['ts'], 3),
+        'ms': round((time.perf_counter() - tramo['inicio']) * 1000, 2),
+        'filas': tramo['filas'],
+        'memoria_kb': round(delta / 1024, 1) if delta is not None else None,
+    }
+
+
+def iniciar_medicion(pagina):
+    """Empieza la medición de una corrida de la página (descarta la de la corrida anterior)."""
+    st.session_state[_CLAVE_ESTADO] = {'pagina': pagina, 'tramos': [], 'graficos': [], 'abierto': None}
+
+
+def seccion(nombre, filas=None):
+    """
+    Marca el comienzo de una sección de la página: cierra la sección anterior (si hay)
+    y empieza a medir la nueva hasta la próxima llamada o finalizar_medicion().
+    `filas` son las filas que procesa la sección.
+    """
+    estado = _estado()
+    if estado['abierto'] is not None:
+        estado['tramos'].append(_cerrar(estado['abierto']))
+    estado['abierto'] = _abrir(nombre, filas, nivel=0)
+
+
+@contextmanager
+def span(nombre, filas=None):
+    """
+    Mide un bloque puntual (anidado dentro de una sección), p. ej. el bucle de geocodificación.
+    El dict que devuelve permite informar las filas al final: `with span('x') as s: s['filas'] = n`.
+    """
+    tramo = _abrir(nombre, filas, nivel=1)
+    try:
+        yield tramo
+    finally:
+        _estado()['tramos'].append(_cerrar(tramo))
+
+
+def registrar_grafico(nombre, bytes_json, puntos, ms):
+    """Anota un gráfico de la corrida: tamaño del JSON enviado, filas graficadas y tiempo de armado + envío."""
+    _estado()['graficos'].append({'grafico': nombre, 'kb': round(bytes_json / 1024, 1), 'puntos': puntos,
+                                  'ms': round(ms, 2)})
+
+
+def panel_habilitado():
+    if os.environ.get(VARIABLE_PANEL) == '1':
+        return True
+    try:
+        return st.query_params.get('debug') == '1'
+    except Exception:
+        return False
+
+
+def _id_sesion():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _emitir_log(pagina, tramos, graficos):
+    sesion = _id_sesion()
+    eventos = [('seccion', t) for t in tramos] + [('grafico', g) for g in graficos]
+    lineas = [json.dumps({'evento': evento, 'pagina': pagina, 'sesion': sesion, **datos}, ensure_ascii=False)
+              for evento, datos in eventos]
+    for linea in lineas:
+        logger.info(linea)
+    ruta = os.environ.get(VARIABLE_LOG_JSON)
+    if ruta:
+        with _lock_log, open(ruta, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lineas) + '\n')
+
+
+def finalizar_medicion():
+    """
+    Cierra la sección abierta, escribe los tramos en el log JSON y, si está habilitado,
+    muestra el panel de depuración en la barra lateral (con el tamaño de cada gráfico).
+    Devuelve los tramos medidos.
+    """
+    estado = _estado()
+    if estado['abierto'] is not None:
+        estado['tramos'].append(_cerrar(estado['abierto']))
+        estado['abierto'] = None
+    tramos = estado['tramos']
+    graficos = estado.get('graficos', [])
+    _emitir_log(estado['pagina'], tramos, graficos)
+    if panel_habilitado() and tramos:
+        with st.sidebar.expander("🛠️ Depuración: tiempos por sección", expanded=False):
+            tabla = pd.DataFrame(tramos).drop(columns='ts').rename(columns={
+                'seccion': 'Sección', 'nivel': 'Nivel', 'ms': 'Tiempo (ms)', 'filas': 'Filas',
+                'memoria_kb': 'Δ memoria (KB)'})
+            st.dataframe(tabla, hide_index=True)
+            total = sum(t['ms'] for t in tramos if t['nivel'] == 0)
+            st.caption(f"Total: {total:.0f} ms (nivel 1 = bloques dentro de una sección). "
+                       f"La memoria es la RSS del proceso (incluye lo que hagan otras sesiones en paralelo).")
+            if graficos:
+                st.dataframe(pd.DataFrame(graficos).rename(columns={
+                    'grafico': 'Gráfico', 'kb': 'JSON (KB)', 'puntos': 'Filas graficadas', 'ms': 'Tiempo (ms)'}),
+                    hide_index=True)
+                st.caption(f"Total enviado en gráficos: {sum(g['kb'] for g in graficos):.0f} KB.")
+    return tramos
@@ -0,0 +1,266 @@
+import csv
+import json
+import logging
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import version_archivo
+from utils.figuras import grafico
+from utils.geocoding import GAZETTEER_PATH, clave_ubicacion
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# GeoJSON de límites incluidos con la app en data/limites/: países de Natural Earth 1:110m
+# admin 0 (con NAME_ES) y provincias argentinas (con 'nombre', el nombre oficial del IGN). El
+# mapa coroplético no descarga nada en tiempo de ejecución. Sin estos archivos la página usa
+# solo el mapa en línea.
+LIMITES_DIR = os.environ.get('LIMITES_DIR', os.path.join(_BASE_DIR, 'data', 'limites'))
+# Geometrías ya simplificadas y serializadas (una por capa, resolución y versión del archivo)
+LIMITES_CACHE_DIR = os.path.join(_BASE_DIR, '.cache', 'limites')
+
+# Capa -> archivo, propiedades con el nombre de cada feature (la primera presente es el nombre
+# que se muestra; todas sirven de alias para el join) y vista inicial del mapa
+CAPAS = {
+    'paises': {
+        'archivo': 'paises.geojson',
+        'propiedades': ('NAME_ES', 'nombre', 'NAME', 'ADMIN', 'name'),
+        'centro': {'lat': 15, 'lon': 0},
+        'zoom': 0.6,
+    },
+    'provincias': {
+        'archivo': 'provincias_argentina.geojson',
+        'propiedades': ('nombre', 'nam', 'NAME_1', 'name'),
+        'centro': {'lat': -40, 'lon': -64},
+        'zoom': 2.6,
+    },
+}
+# Resolución -> (tolerancia de Douglas-Peucker en grados, decimales que se conservan)
+RESOLUCIONES = {
+    'baja': (0.25, 2),
+    'media': (0.05, 2),
+    'alta': (0.01, 3),
+}
+# Nombres usados en los datos que no coinciden con el de la geometría (claves normalizadas)
+ALIAS = {
+    'republica checa': 'chequia',
+    'bs as': 'buenos aires',
+    'caba': 'ciudad autonoma de buenos aires',
+    'capital federal': 'ciudad autonoma de buenos aires',
+    'tierra del fuego': 'tierra del fuego antartida e islas del atlantico sur',
+}
+# Formato de la caché en disco: cambiarlo invalida las geometrías ya serializadas
+_VERSION_FORMATO = 1
+
+
+class Geometria(dict):
+    """
+    FeatureCollection (un dict, como lo espera plotly) con un repr corto: grafico() arma la
+    clave de la figura con el repr de los parámetros y no debe serializar toda la geometría.
+    """
+
+    def __init__(self, datos, clave):
+        super().__init__(datos)
+        self.clave = clave
+
+    def __repr__(self):
+        return f"Geometria({self.clave!r})"
+
+
+def ruta_capa(capa):
+    return os.path.join(LIMITES_DIR, CAPAS[capa]['archivo'])
+
+
+def disponible(capa):
+    """Indica si el GeoJSON de la capa está en data/limites/."""
+    return os.path.exists(ruta_capa(capa))
+
+
+def simplificar_anillo(puntos, tolerancia):
+    """
+    Douglas-Peucker sobre un anillo (arreglo n x 2, cerrado): conserva los puntos que se alejan
+    más de 'tolerancia' del segmento que los saltea. Iterativo (con pila) y con las distancias
+    de cada tramo calculadas de una vez con numpy.
+    """
+    n = len(puntos)
+    if n <= 4:
+        return puntos
+    conservar = np.zeros(n, dtype=bool)
+    conservar[0] = conservar[-1] = True
+    # Un anillo cerrado empieza y termina en el mismo punto: se parte en el punto más lejano
+    lejano = int(np.argmax(np.hypot(*(puntos - puntos[0]).T)))
+    conservar[lejano] = True
+    pila = [(0, lejano), (lejano, n - 1)]
+    while pila:
+        inicio, fin = pila.pop()
+        if fin - inicio < 2:
+            continue
+        a, b = puntos[inicio], puntos[fin]
+        tramo = puntos[inicio + 1:fin]
+        dx, dy = b - a
+        largo = np.hypot(dx, dy)
+        if largo == 0:
+            distancias = np.hypot(*(tramo - a).T)
+        else:
+            distancias = np.abs(dx * (tramo[:, 1] - a[1]) - dy * (tramo[:, 0] - a[0])) / largo
+        i = int(np.argmax(distancias))
+        if distancias[i] > tolerancia:
+            medio = inicio + 1 + i
+            conservar[medio] = True
+            pila.append((inicio, medio))
+            pila.append((medio, fin))
+    return puntos[conservar]
+
+
+def simplificar_geometria(geometria, tolerancia, decimales):
+    """
+    Simplifica un Polygon o MultiPolygon de GeoJSON y redondea las coordenadas. Los anillos que
+    quedan con menos de 4 puntos se descartan (islas chicas a baja resolución); devuelve None
+    si no queda ningún polígono.
+    """
+    if geometria['type'] == 'Polygon':
+        poligonos = [geometria['coordinates']]
+    elif geometria['type'] == 'MultiPolygon':
+        poligonos = geometria['coordinates']
+    else:
+        return None
+    resultado = []
+    for poligono in poligonos:
+        anillos = []
+        for anillo in poligono:
+            puntos = np.round(simplificar_anillo(np.asarray(anillo, dtype=float), tolerancia), decimales)
+            # El redondeo puede dejar puntos consecutivos repetidos
+            puntos = puntos[np.concatenate([[True], np.any(np.diff(puntos, axis=0) != 0, axis=1)])]
+            if len(puntos) >= 4:
+                anillos.append(puntos.tolist())
+            elif not anillos:
+                break  # Sin anillo exterior el polígono se descarta entero
+        if anillos:
+            resultado.append(anillos)
+    if not resultado:
+        return None
+    if len(resultado) == 1:
+        return {'type': 'Polygon', 'coordinates': resultado[0]}
+    return {'type': 'MultiPolygon', 'coordinates': resultado}
+
+
+def _alias_gazetteer():
+    """Nombres alternativos de países del gazetteer ('Brazil' -> 'Brasil'), como claves normalizadas."""
+    alias = {}
+    if os.path.exists(GAZETTEER_PATH):
+        with open(GAZETTEER_PATH, encoding='utf-8') as f:
+            for fila in csv.DictReader(f):
+                if fila['tipo'] == 'pais':
+                    alias[clave_ubicacion(fila['nombre'])] = clave_ubicacion(fila['pais'])
+    return alias
+
+
+def construir_capa(ruta, propiedades, tolerancia, decimales):
+    """
+    Lee un GeoJSON de límites y devuelve:
+    - 'geojson': FeatureCollection simplificada; cada feature tiene como 'id' la clave
+      normalizada de su nombre y 'properties' = {'nombre': ...};
+    - 'claves': clave normalizada de cada nombre o alias -> id de la feature.
+    """
+    with open(ruta, encoding='utf-8') as f:
+        origen = json.load(f)
+    features, claves = [], {}
+    for feature in origen.get('features', []):
+        nombres = [feature['properties'][p] for p in propiedades if feature.get('properties', {}).get(p)]
+        if not nombres or not feature.get('geometry'):
+            continue
+        geometria = simplificar_geometria(feature['geometry'], tolerancia, decimales)
+        if geometria is None:
+            continue
+        id_feature = clave_ubicacion(nombres[0])
+        features.append({'type': 'Feature', 'id': id_feature, 'properties': {'nombre': nombres[0]},
+                         'geometry': geometria})
+        for nombre in nombres:
+            claves.setdefault(clave_ubicacion(nombre), id_feature)
+    for alias, destino in {**_alias_gazetteer(), **ALIAS}.items():
+        if destino in claves:
+            claves.setdefault(alias, claves[destino])
+    return {'geojson': {'type': 'FeatureCollection', 'features': features}, 'claves': claves}
+
+
+@st.cache_resource(show_spinner="Preparando límites...", max_entries=8)
+def capa_simplificada(capa, resolucion, version):
+    """
+    construir_capa para la capa y resolución indicadas, una vez por proceso. El resultado se
+    guarda en .cache/limites/ como JSON compacto: los demás procesos (y los reinicios) lo leen
+    sin volver a simplificar. `version` es el hash del GeoJSON de origen.
+    """
+    ruta_cache = os.path.join(LIMITES_CACHE_DIR, f"{capa}_{resolucion}_{version}_v{_VERSION_FORMATO}.json")
+    if os.path.exists(ruta_cache):
+        with open(ruta_cache, encoding='utf-8') as f:
+            datos = json.load(f)
+    else:
+        tolerancia, decimales = RESOLUCIONES[resolucion]
+        datos = construir_capa(ruta_capa(capa), CAPAS[capa]['propiedades'], tolerancia, decimales)
+        os.makedirs(LIMITES_CACHE_DIR, exist_ok=True)
+        temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, ruta_cache)
+        logger.info("Límites '%s' (%s) simplificados: %d features.", capa, resolucion,
+                    len(datos['geojson']['features']))
+    datos['version'] = version
+    return datos
+
+
+def cargar_capa(capa, resolucion='media'):
+    """Capa simplificada (ver capa_simplificada), cacheada por el hash del GeoJSON de origen."""
+    return capa_simplificada(capa, resolucion, version_archivo(ruta_capa(capa)))
+
+
+def asignar_features(serie, datos_capa):
+    """
+    Id de feature de cada valor de 'serie' (texto libre: "Junin De Los Andes, Neuquen"): el último
+    nombre o alias de la capa que aparece como palabras completas en el texto normalizado; None si
+    no aparece ninguno. Se busca una sola vez por valor distinto.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    claves = sorted(datos_capa['claves'], key=len, reverse=True)
+    patron = r'\b(?:' + '|'.join(re.escape(c) for c in claves) + r')\b'
+    # Los separadores cuentan como espacios ("América,Buenos Aires", "Tandil-Bs As")
+    textos = pd.Series([clave_ubicacion(re.sub(r'[,;/()-]', ' ', str(v))) for v in uniques], dtype=object)
+    encontrados = textos.str.findall(patron).map(lambda m: datos_capa['claves'][m[-1]] if m else None)
+    ids = np.append(encontrados.to_numpy(dtype=object), None)
+    return pd.Series(ids[codes], index=serie.index, dtype=object)
+
+
+def mapa_coropletico(conteos, columna, capa, resolucion, key, **parametros):
+    """
+    Mapa coroplético de 'conteos' (columnas 'columna' y 'Cantidad') sobre la capa de límites,
+    sin mapa base (mapbox_style 'white-bg'): no pide teselas ni geocodifica. Solo se envían las
+    features con datos. Los nombres sin geometría se listan debajo del mapa.
+    """
+    datos_capa = cargar_capa(capa, resolucion)
+    ids = conteos[columna].astype(object).map(lambda nombre: datos_capa['claves'].get(clave_ubicacion(nombre)))
+    sin_geometria = conteos.loc[ids.isna(), columna].tolist()
+    unidos = conteos.assign(id=ids).dropna(subset=['id']).groupby('id', as_index=False)['Cantidad'].sum()
+    features = [f for f in datos_capa['geojson']['features'] if f['id'] in set(unidos['id'])]
+    unidos['Nombre'] = unidos['id'].map({f['id']: f['properties']['nombre'] for f in features})
+    geojson = Geometria({'type': 'FeatureCollection', 'features': features},
+                        (capa, resolucion, datos_capa['version'], tuple(unidos['id'])))
+    if unidos.empty:
+        st.warning("Ninguna ubicación coincide con los límites disponibles.")
+    else:
+        grafico('choropleth_mapbox', unidos, key=key,
+                geojson=geojson,
+                locations='id',
+                color='Cantidad',
+                hover_name='Nombre',
+                hover_data={'id': False, 'Cantidad': True},
+                color_continuous_scale='Reds',
+                mapbox_style='white-bg',
+                center=CAPAS[capa]['centro'],
+                zoom=CAPAS[capa]['zoom'],
+                **parametros)
+    if sin_geometria:
+        st.caption(f"Sin límite para: {', '.join(map(str, sin_geometria))}.")
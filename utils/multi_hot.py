@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Separador de las opciones marcadas en las columnas de casillas de los formularios
+SEPARADOR = ', '
+
+
+def construir_multi_hot(serie, separador=SEPARADOR):
+    """
+    Codificación multi-hot dispersa de una columna de casillas ("A, B, C"): para cada fila,
+    los ids de las opciones marcadas, en formato CSR ('offsets', 'ids'), y los nombres de las
+    opciones ('opciones', normalizados con .str.title().str.strip()). Solo se separan los
+    valores distintos; las filas se expanden con los códigos. Los nulos no marcan nada y una
+    opción repetida en la misma fila cuenta una vez.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    partes = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.split(separador).explode()
+    partes = partes.str.title().str.strip()
+    partes = partes[partes != '']
+    ids_opcion, opciones = pd.factorize(partes)
+    n_opciones = max(len(opciones), 1)
+    # Conjunto de opciones de cada valor distinto (sin repetidos), agrupado por valor
+    pares = np.unique(partes.index.to_numpy(dtype=np.int64) * n_opciones + ids_opcion)
+    valor, opcion = np.divmod(pares, n_opciones)
+    # Un valor extra vacío al final: los nulos (código -1) no marcan ninguna opción
+    largo_valor = np.append(np.bincount(valor, minlength=len(uniques)), 0)
+    offsets_valor = np.concatenate([[0], np.cumsum(largo_valor)])
+
+    largos = largo_valor[codes]
+    offsets = np.concatenate([[0], np.cumsum(largos)])
+    fila_de_entrada = np.repeat(np.arange(len(codes)), largos)
+    posicion = offsets_valor[codes[fila_de_entrada]] + np.arange(offsets[-1]) - offsets[fila_de_entrada]
+    return {
+        'opciones': np.asarray(opciones, dtype=object),
+        'offsets': offsets,
+        'ids': opcion[posicion],
+        'filas': len(codes),
+    }
+
+
+@st.cache_resource(max_entries=8)
+def indice_multi_hot(_serie, version):
+    """
+    construir_multi_hot de `_serie`, una vez por versión de datos y compartido entre sesiones.
+    `_serie` no se hashea: `version` identifica los datos (y la columna).
+    """
+    return construir_multi_hot(_serie)
+
+
+def entradas(indice, filas=None):
+    """(fila, id de opción) de cada casilla marcada, opcionalmente solo de las filas indicadas."""
+    fila_de_entrada = np.repeat(np.arange(indice['filas']), np.diff(indice['offsets']))
+    if filas is None:
+        return fila_de_entrada, indice['ids']
+    dentro = np.zeros(indice['filas'], dtype=bool)
+    dentro[np.asarray(filas)] = True
+    mascara = dentro[fila_de_entrada]
+    return fila_de_entrada[mascara], indice['ids'][mascara]
+
+
+def conteos(indice, filas=None):
+    """
+    Cantidad de filas que marcan cada opción (solo de las posiciones 'filas', si se indican).
+    Las opciones quedan en el orden de su primera aparición, como value_counts(sort=False).
+    """
+    _, ids = entradas(indice, filas)
+    primeras, primera_posicion = np.unique(ids, return_index=True)
+    orden = primeras[np.argsort(primera_posicion, kind='stable')]
+    cantidades = np.bincount(ids, minlength=len(indice['opciones']))
+    return pd.Series(cantidades[orden], index=pd.Index(indice['opciones'][orden]), name='count')
+
+
+def coocurrencia(indice, filas=None):
+    """
+    Matriz opciones x opciones con la cantidad de filas que marcan ambas (la diagonal es el
+    conteo de cada opción). Los pares se generan por fila a partir del CSR, sin recorrer texto.
+    """
+    filas_entrada, ids = entradas(indice, filas)
+    n = len(indice['opciones'])
+    # Cada casilla se combina con todas las de su fila: se repite tantas veces como casillas tiene la fila
+    _, inicio_fila, largo_fila = np.unique(filas_entrada, return_index=True, return_counts=True)
+    largo_por_entrada = np.repeat(largo_fila, largo_fila)
+    inicio_por_entrada = np.repeat(inicio_fila, largo_fila)
+    izquierda = np.repeat(np.arange(len(ids)), largo_por_entrada)
+    desplazamiento = np.arange(len(izquierda)) - np.repeat(np.cumsum(largo_por_entrada) - largo_por_entrada,
+                                                           largo_por_entrada)
+    derecha = np.repeat(inicio_por_entrada, largo_por_entrada) + desplazamiento
+    matriz = np.bincount(ids[izquierda] * n + ids[derecha], minlength=n * n).reshape(n, n)
+    return pd.DataFrame(matriz, index=indice['opciones'], columns=indice['opciones'])
+
+
+def filas_con(indice, opciones):
+    """Posiciones (ordenadas) de las filas que marcan todas las 'opciones' indicadas."""
+    ids_buscados = np.flatnonzero(np.isin(indice['opciones'], list(opciones)))
+    if len(ids_buscados) < len(set(opciones)):
+        return np.empty(0, dtype=np.int64)
+    filas_entrada, ids = entradas(indice, None)
+    aciertos = np.bincount(filas_entrada[np.isin(ids, ids_buscados)], minlength=indice['filas'])
+    return np.flatnonzero(aciertos == len(ids_buscados))
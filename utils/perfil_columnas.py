@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.figuras import histograma_agrupado
+
+# Una columna es numérica si más de esta fracción de sus valores se puede convertir a número
+UMBRAL_NUMERICO = 0.8
+# Columnas de otros tipos con menos valores distintos también se tratan como categóricas
+MAX_VALORES_CATEGORICA = 50
+
+TIPO_NUMERICA = 'numerica'
+TIPO_CATEGORICA = 'categorica'
+
+
+def _por_categorias(serie, funcion, valor_nulo):
+    """
+    Aplica 'funcion' a una columna. Si es 'category' la aplica solo a las categorías y
+    expande el resultado con los códigos (los nulos, código -1, toman 'valor_nulo').
+    Las columnas 'string' pasan a 'object' con NaN en los nulos, como si se hubieran leído
+    sin esquema (con pd.NA, astype(str) daría '<NA>' en lugar de 'nan').
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        valores = np.append(funcion(pd.Series(serie.cat.categories)).to_numpy(dtype=object), valor_nulo)
+        return pd.Series(valores[serie.cat.codes.to_numpy()], index=serie.index)
+    if isinstance(serie.dtype, pd.StringDtype):
+        serie = serie.astype(object).where(serie.notna(), np.nan)
+    return funcion(serie)
+
+
+def texto_normalizado(serie):
+    """Igual que serie.astype(str).str.title().str.strip() (los nulos quedan como 'Nan')."""
+    return _por_categorias(serie, lambda s: s.astype(str).str.title().str.strip(), 'Nan')
+
+
+def _numeros(serie):
+    return pd.to_numeric(_por_categorias(serie, lambda s: pd.to_numeric(s, errors='coerce'), np.nan),
+                         errors='coerce')
+
+
+def perfilar_columna(serie):
+    """
+    Clasifica una columna y calcula lo que necesita su gráfico:
+    - 'numerica': más del 80% convertible a número -> histograma agrupado (ver histograma_agrupado);
+    - 'categorica': texto/categoría o menos de 50 valores distintos -> conteo del texto normalizado;
+    - None: ninguna de las dos (no se grafica).
+    """
+    perfil = {'columna': serie.name, 'tipo': None, 'filas': len(serie), 'no_nulos': int(serie.count())}
+    if len(serie):
+        numeros = _numeros(serie)
+        if numeros.count() / len(serie) > UMBRAL_NUMERICO:
+            perfil['tipo'] = TIPO_NUMERICA
+            perfil['histograma'] = histograma_agrupado(numeros)
+            return perfil
+    if serie.dtype in ('object', 'category', 'string') or serie.nunique() < MAX_VALORES_CATEGORICA:
+        conteo = texto_normalizado(serie).value_counts().reset_index(name='Cantidad')
+        conteo.columns = [serie.name, 'Cantidad']
+        perfil['tipo'] = TIPO_CATEGORICA
+        perfil['conteo'] = conteo.sort_values(by='Cantidad', ascending=False)
+    return perfil
+
+
+def perfilar(df, columnas):
+    """Perfil de cada columna (ver perfilar_columna), calculadas en paralelo. No modifica 'df'."""
+    if not columnas:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(columnas), os.cpu_count() or 1)) as ejecutor:
+        return dict(zip(columnas, ejecutor.map(lambda c: perfilar_columna(df[c]), columnas)))
+
+
+@st.cache_data(show_spinner="Analizando columnas...", max_entries=8)
+def perfiles_columnas(_df, version):
+    # '_df' no se hashea: la clave es la versión de los datos (hash del archivo y esquema, ver
+    # data_loader.version_datos). Se perfilan todas las columnas, así la página y el
+    # precalentamiento (utils/precalentamiento.py) comparten la entrada y cada uno usa las que necesita.
+    return perfilar(_df, list(_df.columns))
@@ -0,0 +1,110 @@
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import cargar_datos, cargar_store, existe_store, version_archivo
+from utils.entity_resolution import entidades_guias, entidades_personas
+from utils.exclusion_rules import aplicar_reglas, cargar_reglas
+from utils.ingesta import STORE_PERMISOS, leer_manifiesto, ruta_manifiesto
+
+# Carga y pre-procesamiento del maestro de permisos, compartidos por la página principal y el
+# precalentamiento de cachés (utils/precalentamiento.py): ambos llaman a las mismas funciones
+# cacheadas con las mismas claves.
+
+ARCHIVO_PERMISOS = 'mis_datos_maestros_final_v1.csv'
+RUTA_REGLAS_EXCLUSION = 'config/reglas_exclusion.toml'
+
+# --- NOMBRES DE COLUMNA REALES DEL CSV ---
+COLUMNA_ACM = 'ACM-(Área de caza mayor)'
+COLUMNA_GUIA = 'Responsable Guía de Caza'
+COLUMNA_CIUDAD_ESTADO_PROVINCIA = 'Ciudad, Estado o Provincia'
+COLUMNA_CATEGORIA = 'Categoria '
+COLUMNA_FECHA_EMISION = 'Fecha '
+COLUMNA_PAIS = 'País'
+COLUMNA_TIPO_CAZA = 'Tipo de caza'
+COLUMNA_NOMBRE_CAZADOR = 'Nombre y Apellido'
+COLUMNA_DOCUMENTO = 'DNI o Pasaporte'
+
+# Columnas con filtro en la barra lateral (columna -> etiqueta)
+COLUMNAS_FILTRO = {
+    COLUMNA_ACM: 'ACM',
+    COLUMNA_CATEGORIA: 'Categoría',
+    COLUMNA_PAIS: 'País',
+    COLUMNA_TIPO_CAZA: 'Tipo de caza',
+    'Guia_Canonico': 'Guía',
+}
+
+# Mapeo de números de mes a nombres en español
+# (Si el locale no funciona, esto asegura los nombres en español)
+NOMBRES_MESES_ES = {
+    1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio",
+    7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
+}
+
+# Países y ciudades que se geocodifican para los mapas de la sección 3
+MAX_PAISES_MAPA = 20
+MAX_CIUDADES_MAPA = 100
+
+
+def cargar_permisos(nombre_csv=ARCHIVO_PERMISOS):
+    """
+    Carga los permisos desde el store consolidado (ver utils/ingesta.py) si existe, si no
+    desde el CSV maestro. Devuelve (df, origen_datos, version_datos, partes_store);
+    df es None si no se pudo cargar.
+    """
+    if existe_store(STORE_PERMISOS):
+        df = cargar_store(STORE_PERMISOS, esquema='permisos')
+        partes = [p['archivo'] for p in leer_manifiesto(STORE_PERMISOS)['partes']]
+        return df, STORE_PERMISOS, version_archivo(ruta_manifiesto(STORE_PERMISOS)), partes
+    df = cargar_datos(nombre_csv, esquema='permisos')
+    return df, nombre_csv, version_archivo(nombre_csv) if df is not None else None, None
+
+
+def preprocesar_permisos(df, reglas):
+    """
+    Filtrado global antes de cualquier análisis: fecha parseada, reglas de exclusión
+    (fechas erróneas, ACMs, guías y ciudades vacías, ver config/reglas_exclusion.toml),
+    país normalizado y columnas de mes/año derivadas de la fecha.
+    Devuelve (df, reporte_exclusiones, reglas_omitidas) como aplicar_reglas.
+    """
+    # El esquema 'permisos' (config/esquemas.toml) ya parsea la fecha al leer
+    if not pd.api.types.is_datetime64_any_dtype(df[COLUMNA_FECHA_EMISION]):
+        df[COLUMNA_FECHA_EMISION] = pd.to_datetime(df[COLUMNA_FECHA_EMISION], format='%d/%m/%Y', errors='coerce')
+
+    df, reporte, omitidas = aplicar_reglas(df, reglas)
+    if COLUMNA_PAIS in df.columns:
+        # No excluir vacíos aquí a menos que sea deseado, ya que el mapeo los corrige.
+        df['Pais_Normalizado'] = df[COLUMNA_PAIS].astype(str).str.title()
+    if not df.empty:
+        # Las columnas derivadas se crean después del filtrado global
+        df['Mes_Numero'] = df[COLUMNA_FECHA_EMISION].dt.month
+        df['Anio'] = df[COLUMNA_FECHA_EMISION].dt.year
+        df['Mes_Nombre'] = df['Mes_Numero'].map(NOMBRES_MESES_ES)
+        df['Mes_Anio_Display'] = df['Mes_Nombre'] + ' - ' + df['Anio'].astype(str)
+    return df, reporte, omitidas
+
+
+@st.cache_data(show_spinner="Aplicando reglas de exclusión...", max_entries=4)
+def permisos_preprocesados(_df, version):
+    """
+    preprocesar_permisos cacheado por versión de datos y de reglas (`_df` no se hashea):
+    los reruns y las demás sesiones reciben una copia del resultado sin volver a evaluar las reglas.
+    """
+    return preprocesar_permisos(_df.copy(), cargar_reglas(RUTA_REGLAS_EXCLUSION))
+
+
+def agregar_entidades(df, version):
+    """
+    Resolución de entidades (guías y cazadores): agrupa variantes de un mismo nombre
+    ("Roa Octavio" / "Octavio Roa", tildes, errores de tipeo) y agrega a `df` las columnas
+    'Guia_ID', 'Guia_Canonico' y 'Cazador_ID'. Devuelve (guias, cazadores), las tablas de
+    entidades (None si falta la columna).
+    """
+    guias = cazadores = None
+    if COLUMNA_GUIA in df.columns:
+        ids_guias, guias = entidades_guias(df[COLUMNA_GUIA], version)
+        df['Guia_ID'] = ids_guias
+        df['Guia_Canonico'] = pd.Categorical.from_codes(ids_guias, categories=guias['nombre'])
+    if COLUMNA_NOMBRE_CAZADOR in df.columns and COLUMNA_DOCUMENTO in df.columns:
+        ids_cazadores, cazadores = entidades_personas(df[COLUMNA_NOMBRE_CAZADOR], df[COLUMNA_DOCUMENTO], version)
+        df['Cazador_ID'] = ids_cazadores
+    return guias, cazadores
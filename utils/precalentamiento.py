@@ -0,0 +1,214 @@
+"""
+Precalentamiento de las cachés compartidas: carga y pre-procesa los tres datasets (y los
+límites del mapa sin conexión) en paralelo al iniciar el proceso, así el primer visitante de
+cada página después de un deploy encuentra las cachés llenas.
+
+Streamlit no tiene un hook de inicio del servidor: el precalentamiento arranca en un hilo de
+fondo con la primera corrida de cualquier página (iniciar_precalentamiento está cacheada con
+st.cache_resource, así se lanza una sola vez por proceso). Las páginas llaman a las mismas
+funciones cacheadas con las mismas claves; si una entrada todavía se está calculando, la
+página espera a ese cálculo en lugar de repetirlo.
+
+st.cache_data y st.cache_resource no leen ni escriben sin un ScriptRunContext, así que los
+hilos del precalentamiento usan una copia del contexto de la corrida que lo lanzó, con sus
+propios cursores y sin envío de mensajes: los spinners de las funciones cacheadas no llegan
+a la página de ese visitante.
+
+También se puede correr como script (sin servidor las cachés de Streamlit no se llenan) para
+validar los datos y llenar el store persistente de geocodificación antes de abrir el servidor
+(con el geocodificador configurado por GEOCODER_*; ver utils/geocodificador.py):
+    python -m utils.precalentamiento
+"""
+import collections
+import dataclasses
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.coordenadas import indice_coordenadas
+from utils.data_loader import cargar_datos, version_archivo, version_datos
+from utils.filter_index import indices_filtros
+from utils.geocodificador import obtener_geocodificador
+from utils.geocoding import consultar_store
+from utils.limites import CAPAS, cargar_capa, disponible
+from utils.multi_hot import indice_multi_hot
+from utils.perfil_columnas import perfiles_columnas
+from utils.permisos import (COLUMNA_FECHA_EMISION, COLUMNA_PAIS, COLUMNAS_FILTRO, MAX_PAISES_MAPA,
+                            RUTA_REGLAS_EXCLUSION, agregar_entidades, cargar_permisos, permisos_preprocesados)
+from utils.rollup import COLUMNA_CANTIDAD, contar_por, cubo_permisos
+from utils.schemas import obtener_esquema
+
+logger = logging.getLogger(__name__)
+
+# Con PRECALENTAR_CACHES=0 no se lanza el precalentamiento (cada página calienta lo suyo)
+VARIABLE_DESACTIVAR = 'PRECALENTAR_CACHES'
+
+# Los mismos archivos que leen las páginas
+ARCHIVO_GUIAS_TRASLADO = 'guia_traslado_2.csv'
+ARCHIVO_ESTABLECIMIENTOS = 'planilla-de-inscripción-de-establecimiento-particulares-2025-07-01.csv'
+
+PENDIENTE = 'pendiente'
+AVISO_PENDIENTE = "⏳ Precalentando cachés"
+EN_CURSO = 'en curso'
+LISTO = 'listo'
+ERROR = 'error'
+
+
+def _precalentar_permisos():
+    """Carga, reglas de exclusión, cubo, entidades, índices de filtros y países del mapa."""
+    df, origen, version, partes = cargar_permisos()
+    if df is None:
+        raise RuntimeError(f"No se pudieron cargar los permisos desde '{origen}'.")
+    version_reglas = version_archivo(RUTA_REGLAS_EXCLUSION)
+    if COLUMNA_FECHA_EMISION in df.columns:
+        df, _, _ = permisos_preprocesados(df, (version, version_reglas))
+    cubo = cubo_permisos(df, origen, version, version_reglas, partes)
+    agregar_entidades(df, (version, version_reglas))
+    indices_filtros(df, list(COLUMNAS_FILTRO), COLUMNA_FECHA_EMISION, (version, version_reglas))
+    if COLUMNA_PAIS in cubo.columns:
+        # Los países del mapa que faltan en el store se encolan en el geocodificador de las páginas
+        # (servicio y ritmo de GEOCODER_*): el precalentamiento no espera a la red
+        paises = contar_por(cubo, [COLUMNA_PAIS]).sort_values(by=COLUMNA_CANTIDAD, ascending=False)
+        paises = [str(pais) for pais in paises.head(MAX_PAISES_MAPA)[COLUMNA_PAIS]]
+        geocodificador = obtener_geocodificador()
+        resueltos = consultar_store(paises, db_path=geocodificador.db_path)
+        geocodificador.encolar([pais for pais in paises if pais not in resueltos])
+
+
+def _precalentar_planilla(archivo, esquema, perfiles=False):
+    """
+    Carga con el esquema, índices multi-hot de las casillas, índice de coordenadas (si la
+    columna está en el archivo) y (opcional) perfiles de columnas.
+    """
+    df = cargar_datos(archivo, esquema=esquema)
+    if df is None:
+        raise RuntimeError(f"No se pudo cargar '{archivo}'.")
+    version = version_datos(archivo, esquema)
+    for columna in obtener_esquema(esquema).get('casillas', []):
+        if columna in df.columns:
+            indice_multi_hot(df[columna], version + (columna,))
+    columna_coordenadas = obtener_esquema(esquema).get('coordenadas')
+    if columna_coordenadas in df.columns:
+        indice_coordenadas(df[columna_coordenadas], version + (columna_coordenadas,))
+    if perfiles:
+        perfiles_columnas(df, version)
+
+
+def _precalentar_limites():
+    """Geometrías simplificadas de las capas de límites disponibles, en la resolución por defecto."""
+    for capa in CAPAS:
+        if disponible(capa):
+            cargar_capa(capa)
+
+
+# Nombre -> función de cada tarea (corren en paralelo)
+TAREAS = {
+    'permisos': _precalentar_permisos,
+    'guias_traslado': lambda: _precalentar_planilla(ARCHIVO_GUIAS_TRASLADO, 'guias_traslado'),
+    'establecimientos': lambda: _precalentar_planilla(ARCHIVO_ESTABLECIMIENTOS, 'establecimientos', perfiles=True),
+    'limites': _precalentar_limites,
+}
+
+
+def _contexto_silencioso(ctx):
+    """Copia de `ctx` con cursores y widgets propios que descarta los mensajes al navegador."""
+    return dataclasses.replace(
+        ctx, _enqueue=lambda msg: None, cursors={}, widget_ids_this_run=set(), widget_user_keys_this_run=set(),
+        form_ids_this_run=set(), tracked_commands=[], tracked_commands_counter=collections.Counter())
+
+
+def _nuevo_estado():
+    return {
+        'lock': threading.Lock(),
+        'inicio': time.time(),
+        'tareas': {nombre: {'estado': PENDIENTE, 'segundos': None, 'error': None} for nombre in TAREAS},
+    }
+
+
+def _correr_tarea(estado, nombre, ctx):
+    if ctx is not None:
+        add_script_run_ctx(ctx=ctx)
+    with estado['lock']:
+        estado['tareas'][nombre]['estado'] = EN_CURSO
+    inicio = time.perf_counter()
+    try:
+        TAREAS[nombre]()
+        resultado, error = LISTO, None
+    except Exception as e:
+        logger.exception("Precalentamiento: falló la tarea '%s'.", nombre)
+        resultado, error = ERROR, str(e)
+    segundos = round(time.perf_counter() - inicio, 2)
+    with estado['lock']:
+        estado['tareas'][nombre].update(estado=resultado, segundos=segundos, error=error)
+    logger.info("Precalentamiento: '%s' %s en %.2f s.", nombre, resultado, segundos)
+
+
+def precalentar(estado=None, ctx=None):
+    """
+    Corre todas las tareas en un pool de hilos (las cachés son del proceso, así que no sirve
+    un pool de procesos; la lectura de CSV y las operaciones de pandas/numpy sueltan el GIL
+    buena parte del tiempo), con `ctx` como ScriptRunContext de cada hilo.
+    Devuelve el estado con el resultado y la duración de cada tarea.
+    """
+    estado = estado or _nuevo_estado()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(TAREAS), thread_name_prefix='precalentamiento') as ejecutor:
+        list(ejecutor.map(lambda nombre: _correr_tarea(estado, nombre, ctx), TAREAS))
+    logger.info("Precalentamiento terminado en %.2f s.", time.perf_counter() - inicio)
+    return estado
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_precalentamiento():
+    """
+    Lanza precalentar() en un hilo de fondo, una sola vez por proceso, y devuelve su estado
+    (compartido entre sesiones; ver precalentamiento_listo). Con PRECALENTAR_CACHES=0 no hace nada.
+    """
+    estado = _nuevo_estado()
+    if os.environ.get(VARIABLE_DESACTIVAR) == '0':
+        for tarea in estado['tareas'].values():
+            tarea['estado'] = LISTO
+        return estado
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        ctx = _contexto_silencioso(ctx)
+    threading.Thread(target=precalentar, args=(estado, ctx), name='precalentamiento', daemon=True).start()
+    return estado
+
+
+def resumen(estado):
+    """Copia de {tarea: {'estado', 'segundos', 'error'}}, tomada bajo el lock."""
+    with estado['lock']:
+        return {nombre: dict(tarea) for nombre, tarea in estado['tareas'].items()}
+
+
+def precalentamiento_listo(estado):
+    """True cuando todas las tareas terminaron (bien o con error)."""
+    return all(t['estado'] in (LISTO, ERROR) for t in resumen(estado).values())
+
+
+def mostrar_precalentamiento(estado):
+    """Muestra en la barra lateral las tareas que faltan y las que fallaron (nada si todo está listo)."""
+    tareas = resumen(estado)
+    pendientes = [nombre for nombre, t in tareas.items() if t['estado'] in (PENDIENTE, EN_CURSO)]
+    if pendientes:
+        st.sidebar.caption(f"{AVISO_PENDIENTE}: {', '.join(pendientes)}...")
+    for nombre, tarea in tareas.items():
+        if tarea['estado'] == ERROR:
+            st.sidebar.caption(f"⚠️ Precalentamiento de '{nombre}' falló: {tarea['error']}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    for nombre, tarea in resumen(precalentar()).items():
+        print(f"{nombre:>18}: {tarea['estado']:<8} {tarea['segundos']} s {tarea['error'] or ''}")
+    # Como script se espera a que el geocodificador guarde en el store lo que quedó encolado
+    geocodificador = obtener_geocodificador()
+    while geocodificador.pendientes():
+        time.sleep(0.5)
+    print(f"{'geocodificación':>18}: {geocodificador.estado()}")
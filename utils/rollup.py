@@ -0,0 +1,101 @@
+import logging
+import threading
+
+import pandas as pd
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+COLUMNA_CANTIDAD = 'Cantidad'
+COLUMNA_SEMANA = 'Semana_Del_Mes'
+
+# Dimensiones del cubo (las que no estén en el DataFrame se omiten)
+DIMENSIONES_PERMISOS = ['Anio', 'Mes_Numero', COLUMNA_SEMANA, 'ACM-(Área de caza mayor)', 'Categoria ', 'País',
+                        'Tipo de caza']
+
+
+def semana_del_mes(fechas):
+    """Semana dentro del mes (1 = días 1 a 7, 2 = días 8 a 14, ...)."""
+    return (fechas.dt.day - 1) // 7 + 1
+
+
+def construir_cubo(df, columna_fecha='Fecha ', dimensiones=DIMENSIONES_PERMISOS):
+    """
+    Materializa el conteo de filas por todas las dimensiones presentes en `df`.
+    Los valores nulos se conservan como grupo propio para que cualquier corte
+    posterior dé el mismo resultado que agrupar el DataFrame original.
+    """
+    datos = {}
+    for dim in dimensiones:
+        if dim == COLUMNA_SEMANA and columna_fecha in df.columns:
+            datos[dim] = semana_del_mes(df[columna_fecha])
+        elif dim in df.columns:
+            datos[dim] = df[dim]
+    base = pd.DataFrame(datos)
+    if base.columns.empty:
+        return pd.DataFrame({COLUMNA_CANTIDAD: [len(df)]})
+    return base.groupby(list(base.columns), dropna=False, observed=True).size().reset_index(name=COLUMNA_CANTIDAD)
+
+
+def actualizar_cubo(cubo, df_nuevas, columna_fecha='Fecha '):
+    """Suma al cubo existente los conteos de las filas nuevas (los conteos son aditivos)."""
+    if df_nuevas.empty:
+        return cubo
+    dimensiones = [c for c in cubo.columns if c != COLUMNA_CANTIDAD]
+    nuevo = construir_cubo(df_nuevas, columna_fecha, dimensiones)
+    combinado = pd.concat([cubo, nuevo], ignore_index=True)
+    return combinado.groupby(dimensiones, dropna=False, observed=True)[COLUMNA_CANTIDAD].sum().reset_index()
+
+
+def contar_por(cubo, columnas, filtro=None):
+    """
+    Corte del cubo: suma de 'Cantidad' agrupando por `columnas`.
+    `filtro` es una máscara booleana opcional sobre las filas del cubo.
+    Igual que `df.groupby(columnas).size()`, los grupos con valores nulos se descartan.
+    """
+    if filtro is not None:
+        cubo = cubo[filtro]
+    return cubo.groupby(columnas, observed=True)[COLUMNA_CANTIDAD].sum().reset_index()
+
+
+@st.cache_resource
+def _estado_cubos():
+    return {'lock': threading.Lock(), 'cubos': {}}
+
+
+def cubo_permisos(df, clave_fuente, version_fuente, version_reglas, partes=None):
+    """
+    Devuelve el cubo de `df`, calculado una sola vez por versión de datos y compartido entre sesiones.
+
+    Si la fuente es el store de solo-anexar (`partes` = lista de partes del manifiesto),
+    las reglas no cambiaron y las partes anteriores son prefijo de las actuales, el
+    pre-procesamiento es fila a fila y conserva el orden, así que las filas nuevas son
+    las del final de `df`: solo esas se agregan al cubo existente.
+    """
+    estado = _estado_cubos()
+    with estado['lock']:
+        previo = estado['cubos'].get(clave_fuente)
+    if previo is not None and previo['version'] == (version_fuente, version_reglas):
+        return previo['cubo']
+
+    incremental = (
+        previo is not None and partes is not None and previo['partes'] is not None
+        and previo['version'][1] == version_reglas
+        and partes[:len(previo['partes'])] == previo['partes']
+        and len(df) >= previo['filas']
+    )
+    if incremental:
+        cubo = actualizar_cubo(previo['cubo'], df.iloc[previo['filas']:])
+        logger.info("Cubo '%s' actualizado con %d filas nuevas.", clave_fuente, len(df) - previo['filas'])
+    else:
+        cubo = construir_cubo(df)
+        logger.info("Cubo '%s' construido desde %d filas.", clave_fuente, len(df))
+
+    with estado['lock']:
+        estado['cubos'][clave_fuente] = {
+            'version': (version_fuente, version_reglas),
+            'partes': list(partes) if partes is not None else None,
+            'filas': len(df),
+            'cubo': cubo,
+        }
+    return cubo
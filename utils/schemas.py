@@ -0,0 +1,110 @@
+import tomllib
+
+import pandas as pd
+
+RUTA_ESQUEMAS = 'config/esquemas.toml'
+TIPO_FECHA = 'fecha'
+TIPOS_COLUMNA = ('category', 'string[pyarrow]', TIPO_FECHA)
+
+
+def cargar_esquemas(ruta_config=RUTA_ESQUEMAS):
+    """
+    Lee los esquemas tipados desde un archivo TOML (una tabla por dataset, con
+    `[<dataset>.columnas]`, `[<dataset>.fechas]`, la lista opcional `casillas` y la columna
+    opcional `coordenadas`) y valida tipos, formatos y que las casillas sean columnas declaradas.
+    """
+    with open(ruta_config, 'rb') as f:
+        esquemas = tomllib.load(f)
+    for nombre, esquema in esquemas.items():
+        columnas = esquema.get('columnas')
+        if not columnas:
+            raise ValueError(f"Esquema '{nombre}': falta la tabla 'columnas'.")
+        fechas = esquema.get('fechas', {})
+        for columna, tipo in columnas.items():
+            if tipo not in TIPOS_COLUMNA:
+                raise ValueError(
+                    f"Esquema '{nombre}': tipo '{tipo}' de '{columna}' no soportado ({', '.join(TIPOS_COLUMNA)}).")
+            if tipo == TIPO_FECHA and columna not in fechas:
+                raise ValueError(f"Esquema '{nombre}': la fecha '{columna}' no tiene formato en 'fechas'.")
+        for columna in esquema.get('casillas', []):
+            if columna not in columnas:
+                raise ValueError(f"Esquema '{nombre}': la casilla '{columna}' no está en 'columnas'.")
+        if not isinstance(esquema.get('coordenadas', ''), str):
+            raise ValueError(f"Esquema '{nombre}': 'coordenadas' debe ser el nombre de una columna.")
+    return esquemas
+
+
+def obtener_esquema(nombre, ruta_config=RUTA_ESQUEMAS):
+    """Devuelve el esquema del dataset 'nombre'."""
+    esquemas = cargar_esquemas(ruta_config)
+    if nombre not in esquemas:
+        raise ValueError(f"No hay esquema '{nombre}' en '{ruta_config}'.")
+    return esquemas[nombre]
+
+
+def _dtypes_lectura(esquema):
+    """
+    dtypes para read_csv: las fechas se leen como texto y se parsean después. La columna de
+    `coordenadas` (texto libre, ver utils/coordenadas.py) se lee como texto si está en el archivo.
+    """
+    dtypes = {columna: ('string[pyarrow]' if tipo == TIPO_FECHA else tipo)
+              for columna, tipo in esquema['columnas'].items()}
+    if esquema.get('coordenadas'):
+        dtypes.setdefault(esquema['coordenadas'], 'string[pyarrow]')
+    return dtypes
+
+
+def parsear_fechas(df, esquema):
+    """Convierte las columnas de [<dataset>.fechas] con su formato."""
+    # Con formato fijo y errors='coerce' los valores inválidos quedan como NaT
+    # (read_csv con date_format dejaría la columna entera como texto).
+    for columna, formato in esquema.get('fechas', {}).items():
+        if columna in df.columns:
+            df[columna] = pd.to_datetime(df[columna], format=formato, errors='coerce')
+    return df
+
+
+def leer_csv_tipado(ruta_archivo, esquema, con_fechas=True):
+    """
+    Lee un CSV aplicando el esquema: solo las columnas declaradas (usecols),
+    categorías y texto Arrow desde el parser, y fechas ya convertidas.
+    Con con_fechas=False las fechas quedan como texto (ver parsear_fechas).
+    """
+    dtypes = _dtypes_lectura(esquema)
+    # Las columnas declaradas son obligatorias; la de coordenadas se lee solo si existe
+    df = pd.read_csv(ruta_archivo, usecols=lambda columna: columna in dtypes, dtype=dtypes)
+    faltantes = [c for c in esquema['columnas'] if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Columnas del esquema no encontradas en el archivo: {faltantes}")
+    return parsear_fechas(df, esquema) if con_fechas else df
+
+
+def aplicar_esquema(df, esquema):
+    """
+    Aplica el esquema a un DataFrame ya leído (p. ej. el store en Parquet, todo texto).
+    Las columnas declaradas que falten se ignoran.
+    """
+    dtypes = _dtypes_lectura(esquema)
+    columnas = [c for c in dtypes if c in df.columns]
+    df = df[columnas].astype({c: dtypes[c] for c in columnas})
+    return parsear_fechas(df, esquema)
+
+
+def reporte_memoria(ruta_archivo, esquema):
+    """
+    Compara la memoria (deep) del CSV leído sin tipos contra la lectura con esquema.
+    Devuelve un DataFrame por columna con KB antes/después y el dtype resultante.
+    """
+    antes = pd.read_csv(ruta_archivo)
+    despues = leer_csv_tipado(ruta_archivo, esquema)
+    kb_antes = antes.memory_usage(deep=True, index=False) / 1024
+    kb_despues = despues.memory_usage(deep=True, index=False) / 1024
+    reporte = pd.DataFrame({
+        'Columna': kb_antes.index,
+        'dtype': [str(despues[c].dtype) if c in despues.columns else '(descartada)' for c in kb_antes.index],
+        'KB antes': kb_antes.to_numpy().round(1),
+        'KB después': kb_despues.reindex(kb_antes.index, fill_value=0).to_numpy().round(1),
+    })
+    total = pd.DataFrame([{'Columna': 'TOTAL', 'dtype': '', 'KB antes': round(kb_antes.sum(), 1),
+                           'KB después': round(kb_despues.sum(), 1)}])
+    return pd.concat([reporte, total], ignore_index=True)
@@ -0,0 +1,147 @@
+"""
+Motor SQL embebido (DuckDB, en proceso) sobre los datasets del tablero.
+
+Cada dataset se registra como vista sobre su archivo: DuckDB lee solo las
+columnas que usa cada consulta y recorre el archivo en paralelo, así las
+agregaciones no requieren cargar el DataFrame completo en memoria.
+"""
+import csv
+import os
+import re
+import threading
+
+import streamlit as st
+
+from utils.data_loader import existe_store, version_archivo
+from utils.ingesta import STORE_PERMISOS, ruta_manifiesto
+from utils.permisos import ARCHIVO_PERMISOS
+
+try:
+    import duckdb
+except ImportError:  # DuckDB es opcional: sin él las páginas usan pandas
+    duckdb = None
+
+ARCHIVO_GUIAS_TRASLADO = 'guia_traslado_2.csv'
+ARCHIVO_ESTABLECIMIENTOS = 'planilla-de-inscripción-de-establecimiento-particulares-2025-07-01.csv'
+
+# Solo se permiten consultas de lectura en la consola
+_SENTENCIAS_PERMITIDAS = re.compile(r'^\s*(SELECT|WITH|DESCRIBE|SHOW|SUMMARIZE|EXPLAIN|FROM)\b', re.IGNORECASE)
+
+_lock = threading.Lock()
+
+
+def disponible():
+    """Indica si DuckDB está instalado."""
+    return duckdb is not None
+
+
+def _literal(texto):
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def _encabezado_csv(ruta):
+    """Nombres de columna tal como los lee pandas (DuckDB recorta los espacios, p. ej. en 'Fecha ')."""
+    try:
+        with open(ruta, encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+
+
+def _csv(ruta):
+    # Todas las columnas como texto: igual que el 'object' de pandas y sin errores de inferencia de tipos
+    opciones = "header=true, all_varchar=true"
+    encabezado = _encabezado_csv(ruta)
+    if encabezado:
+        opciones += ", names=[" + ", ".join(_literal(nombre) for nombre in encabezado) + "]"
+    return f"read_csv({_literal(ruta)}, {opciones})"
+
+
+def fuentes():
+    """
+    Devuelve {tabla: (sql de la fuente, ruta usada para versionar)}.
+    Los permisos salen del store consolidado si existe, si no del CSV maestro.
+    """
+    if existe_store(STORE_PERMISOS):
+        patron = os.path.join(STORE_PERMISOS, 'parte-*.parquet')
+        permisos = (f"read_parquet({_literal(patron)}, union_by_name=true)", ruta_manifiesto(STORE_PERMISOS))
+    else:
+        permisos = (_csv(ARCHIVO_PERMISOS), ARCHIVO_PERMISOS)
+    return {
+        'permisos': permisos,
+        'guias_traslado': (_csv(ARCHIVO_GUIAS_TRASLADO), ARCHIVO_GUIAS_TRASLADO),
+        'establecimientos': (_csv(ARCHIVO_ESTABLECIMIENTOS), ARCHIVO_ESTABLECIMIENTOS),
+    }
+
+
+def versiones():
+    """Versión (hash) de cada fuente; forma parte de la clave de caché de las consultas."""
+    resultado = []
+    for tabla, (_, ruta) in sorted(fuentes().items()):
+        try:
+            resultado.append((tabla, version_archivo(ruta)))
+        except FileNotFoundError:
+            resultado.append((tabla, None))
+    return tuple(resultado)
+
+
+def _accesos_permitidos():
+    """
+    (archivos, directorios) que pueden leer las vistas: los tres archivos de datos y el
+    directorio del store de permisos, con su ruta tal como aparece en las vistas y absoluta.
+    """
+    archivos = [ARCHIVO_PERMISOS, ARCHIVO_GUIAS_TRASLADO, ARCHIVO_ESTABLECIMIENTOS]
+    directorios = [STORE_PERMISOS.rstrip('/') + '/']
+    return (tuple(archivos + [os.path.abspath(ruta) for ruta in archivos]),
+            tuple(directorios + [os.path.abspath(ruta) + '/' for ruta in directorios]))
+
+
+@st.cache_resource
+def _conexion(definiciones, archivos, directorios):
+    """
+    Conexión DuckDB en memoria con una vista por dataset (una por cada juego de fuentes).
+    Después de crear las vistas solo se pueden leer `archivos` y `directorios` (la consola
+    no puede abrir otros archivos del servidor con read_text, read_csv, glob...) y la
+    configuración queda bloqueada para que una consulta no pueda volver a habilitarlo.
+    """
+    con = duckdb.connect(':memory:')
+    con.execute(f"SET threads TO {os.cpu_count() or 1}")
+    for tabla, sql_fuente in definiciones:
+        con.execute(f'CREATE OR REPLACE VIEW "{tabla}" AS SELECT * FROM {sql_fuente}')
+    con.execute(f"SET allowed_paths = [{', '.join(_literal(ruta) for ruta in archivos)}]")
+    con.execute(f"SET allowed_directories = [{', '.join(_literal(ruta) for ruta in directorios)}]")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
+
+
+def conexion():
+    """Cursor sobre la conexión compartida (cada hilo/sesión usa su propio cursor)."""
+    if duckdb is None:
+        raise RuntimeError("DuckDB no está instalado. Agrega 'duckdb' a requirements.txt.")
+    definiciones = tuple(sorted((tabla, sql) for tabla, (sql, _) in fuentes().items()))
+    with _lock:
+        return _conexion(definiciones, *_accesos_permitidos()).cursor()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _consultar_cacheado(sql, params, versiones_fuentes):
+    cursor = conexion()
+    try:
+        return cursor.execute(sql, list(params) if params else None).df()
+    finally:
+        cursor.close()
+
+
+def consultar(sql, params=None):
+    """
+    Ejecuta una consulta y devuelve un DataFrame.
+    El resultado se cachea por (sql, parámetros, versión de las fuentes).
+    """
+    return _consultar_cacheado(sql, tuple(params) if params else None, versiones())
+
+
+def es_consulta_de_lectura(sql):
+    """Valida que sea una única sentencia de lectura (para la consola SQL)."""
+    sentencia = sql.strip().rstrip(';')
+    return bool(_SENTENCIAS_PERMITIDAS.match(sentencia)) and ';' not in sentencia
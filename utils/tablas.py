@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.export import hash_dataframe
+
+# Filas que se envían al navegador por página
+TAMANO_PAGINA = 25
+SIN_ORDEN = '(orden original)'
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _texto_busqueda(_df, version):
+    # Texto en minúsculas de cada fila (todas las columnas unidas), compartido entre sesiones
+    texto = _df.iloc[:, 0].astype(str).str.lower().to_numpy(dtype=object)
+    for columna in _df.columns[1:]:
+        texto = texto + '\x1f' + _df[columna].astype(str).str.lower().to_numpy(dtype=object)
+    return pd.Series(texto, dtype=object)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _posiciones(_df, version, busqueda, orden, descendente):
+    """Posiciones (en el orden a mostrar) de las filas que coinciden con la búsqueda."""
+    if busqueda:
+        coincide = _texto_busqueda(_df, version).str.contains(busqueda.lower(), regex=False).to_numpy()
+        posiciones = np.flatnonzero(coincide)
+    else:
+        posiciones = np.arange(len(_df))
+    if orden != SIN_ORDEN:
+        valores = _df[orden].iloc[posiciones].reset_index(drop=True)
+        # Orden estable y nulos al final, igual que sort_values
+        posiciones = posiciones[valores.sort_values(ascending=not descendente, kind='stable',
+                                                    na_position='last').index.to_numpy()]
+    return posiciones
+
+
+def tabla_paginada(df, key, filas_por_pagina=TAMANO_PAGINA, version=None):
+    """
+    Tabla con paginación, búsqueda y orden resueltos en el servidor: al navegador solo
+    llega la ventana de filas visible. Las posiciones de cada búsqueda/orden se cachean por
+    la versión de los datos ('version', o el hash del DataFrame si no se indica), así cambiar
+    de página solo recorta el arreglo. Si el DataFrame entra en una página se muestra entero.
+    """
+    if len(df) <= filas_por_pagina:
+        st.dataframe(df, hide_index=True)
+        return
+
+    col_busqueda, col_orden, col_sentido = st.columns([0.45, 0.4, 0.15])
+    busqueda = col_busqueda.text_input("Buscar", key=f"{key}_buscar").strip()
+    orden = col_orden.selectbox("Ordenar por", [SIN_ORDEN] + list(df.columns), key=f"{key}_orden")
+    descendente = col_sentido.toggle("Desc.", key=f"{key}_desc", disabled=orden == SIN_ORDEN)
+
+    if busqueda or orden != SIN_ORDEN:
+        # La clave de la tabla entra en la versión: dos tablas pueden compartir la versión de los datos
+        version = (key, version if version is not None else hash_dataframe(df))
+        posiciones = _posiciones(df, version, busqueda, orden, descendente)
+    else:
+        # Sin búsqueda ni orden no hace falta hashear ni cachear nada: la ventana es un rango
+        posiciones = np.arange(len(df))
+    n_paginas = max(1, math.ceil(len(posiciones) / filas_por_pagina))
+    clave_pagina = f"{key}_pagina"
+    # Una búsqueda nueva puede dejar menos páginas que la seleccionada
+    if st.session_state.get(clave_pagina, 1) > n_paginas:
+        st.session_state[clave_pagina] = n_paginas
+
+    inicio = (st.session_state.get(clave_pagina, 1) - 1) * filas_por_pagina
+    ventana = df.iloc[posiciones[inicio:inicio + filas_por_pagina]]
+    st.dataframe(ventana, hide_index=True)
+
+    col_pagina, col_resumen = st.columns([0.25, 0.75])
+    col_pagina.number_input("Página", min_value=1, max_value=n_paginas, step=1, key=clave_pagina)
+    if len(posiciones):
+        col_resumen.caption(f"Filas {inicio + 1}–{inicio + len(ventana)} de {len(posiciones)}"
+                            f"{f' (de {len(df)} en total)' if busqueda else ''}.")
+    else:
+        col_resumen.caption("Ninguna fila coincide con la búsqueda.")
@@ -0,0 +1,37 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+# --- Text Normalization Function ---
+def normalize_text(text):
+    """Normalizes text by lowercasing, stripping, removing accents, and non-alphanumeric chars."""
+    if pd.isna(text):
+        return ""  # Return empty string for NaN values
+    text = str(text).lower().strip()
+    # Remove accents
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
+    # Remove characters that are not letters, numbers, spaces, or hyphens (useful for names)
+    text = re.sub(r'[^a-z0-9\s-]', '', text)
+    return text
+
+
+def normalize_series(series):
+    """
+    Equivalente vectorizado de `series.apply(normalize_text)`.
+    Factoriza la columna, normaliza cada valor distinto una sola vez con
+    operaciones vectorizadas de pandas y vuelve a expandir el resultado.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    normalizados = (
+        pd.Series(uniques, dtype=object).astype(str)
+        .str.lower().str.strip()
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('utf-8')
+        .str.replace(r'[^a-z0-9\s-]', '', regex=True)
+        .to_numpy(dtype=object)
+    )
+    # Código -1 = NaN -> cadena vacía, igual que normalize_text
+    normalizados = np.append(normalizados, "")
+    return pd.Series(normalizados[codes], index=series.index, name=series.name, dtype=object)